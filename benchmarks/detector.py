@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import time
+import random
+
+from src.detector import SpreadDetector
+
+COINS = 500
+EXCHANGES = ["mexc", "bybit", "binance", "coinbase"]
+TICKS = 1_000_000
+
+def bench_detector(ticks: int = TICKS, coins: int = COINS, seed: int = 7) -> float:
+    rng = random.Random(seed)
+    names = [f"coin{i}" for i in range(coins)]
+    bases = [rng.uniform(0.01, 1000.0) for _ in names]
+    stream = [
+        (rng.randrange(coins), rng.choice(EXCHANGES), 1.0 + rng.gauss(0.0, 0.01), i)
+        for i in range(ticks)
+    ]
+    detector = SpreadDetector(entry_spread_pct=2.0, exit_spread_pct=1.0)
+
+    update = detector.update
+    start = time.perf_counter()
+    for (index, exchange, drift, timestamp) in stream:
+        update(names[index], exchange, bases[index] * drift, timestamp)
+    elapsed = time.perf_counter() - start
+    return ticks / elapsed
+
+if __name__ == "__main__":
+    rate = bench_detector()
+    print(f"SpreadDetector: {COINS} coins x {len(EXCHANGES)} exchanges, {rate:,.0f} ticks/s")
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import json
+import random
+import asyncio
+import argparse
+import websockets
+
+from typing import Set, List, Dict, Tuple, Optional
+from datetime import datetime, timezone
+
+from src.basics import time_millis
+from src.exchanges.mexc.mexc import ALIAS as ALIAS_MEXC
+from src.exchanges.bybit import ALIAS as ALIAS_BYBIT
+from src.exchanges.binance import ALIAS as ALIAS_BINANCE
+from src.exchanges.coinbase import ALIAS as ALIAS_COINBASE
+from src.exchanges.mexc.proto.PushDataV3ApiWrapper_pb2 import PushDataV3ApiWrapper
+
+VENUES = (ALIAS_MEXC, ALIAS_BYBIT, ALIAS_BINANCE, ALIAS_COINBASE)
+
+MEXC_CHANNEL = "spot@public.aggre.deals.v3.api.pb@100ms@"
+
+class FakeExchange:
+    def __init__(
+        self,
+        venue: str,
+        messages_per_symbol: float = 1.0,
+        disconnects_per_minute: float = 0.0,
+        stalls_per_minute: float = 0.0,
+        stall_seconds: float = 2.0,
+        tick_ms: int = 50,
+        seed: Optional[int] = None,
+    ):
+        if venue not in VENUES:
+            raise ValueError(f"Unknown exchange: {venue}")
+        self.venue = venue
+        self.messages_per_symbol = messages_per_symbol
+        self.disconnects_per_minute = disconnects_per_minute
+        self.stalls_per_minute = stalls_per_minute
+        self.stall_seconds = stall_seconds
+        self.tick_ms = tick_ms
+        self.connections = 0
+        self.disconnects = 0
+        self.stalls = 0
+        self.sent = 0
+        self.port: Optional[int] = None
+        self._rng = random.Random(seed)
+        self._prices: Dict[str, float] = {}
+        self._sockets: Set[websockets.WebSocketServerProtocol] = set()
+        self._server: Optional[websockets.WebSocketServer] = None
+
+    @property
+    def url(self) -> str:
+        return f"ws://127.0.0.1:{self.port}"
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        self._server = await websockets.serve(self.__handle, host, port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.url
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def kick(self) -> None:
+        await asyncio.gather(*(s.close() for s in list(self._sockets)), return_exceptions=True)
+
+    async def __handle(self, socket: websockets.WebSocketServerProtocol) -> None:
+        self.connections += 1
+        self._sockets.add(socket)
+        coins: Set[str] = set()
+        reader = asyncio.create_task(self.__read(socket=socket, coins=coins))
+        try:
+            await self.__push(socket=socket, coins=coins)
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            reader.cancel()
+            self._sockets.discard(socket)
+
+    async def __read(self, socket: websockets.WebSocketServerProtocol, coins: Set[str]) -> None:
+        try:
+            async for message in socket:
+                (subscribe, unsubscribe, reply) = _parse_request(venue=self.venue, message=message)
+                coins.update(subscribe)
+                coins.difference_update(unsubscribe)
+                if reply is not None:
+                    await socket.send(reply)
+        except websockets.ConnectionClosed:
+            pass
+
+    async def __push(self, socket: websockets.WebSocketServerProtocol, coins: Set[str]) -> None:
+        interval = self.tick_ms / 1000
+        due = 0.0
+        cursor = 0
+        # A connection closed before it subscribed never fails a send, so the loop checks the state itself.
+        while not socket.closed:
+            await asyncio.sleep(interval)
+            if self._rng.random() < self.disconnects_per_minute * interval / 60:
+                self.disconnects += 1
+                await socket.close()
+                return
+            if self._rng.random() < self.stalls_per_minute * interval / 60:
+                self.stalls += 1
+                await asyncio.sleep(self.stall_seconds)
+
+            subscribed = sorted(coins)
+            if not subscribed:
+                continue
+            due += len(subscribed) * self.messages_per_symbol * interval
+            for _ in range(int(due)):
+                coin = subscribed[cursor % len(subscribed)]
+                cursor += 1
+                await socket.send(self.__frame(coin))
+                self.sent += 1
+            due -= int(due)
+
+    def __frame(self, coin: str) -> str | bytes:
+        # Seeded by the coin alone, so every fake venue quotes around the same price.
+        price = self._prices.get(coin) or random.Random(coin).uniform(0.1, 1000.0)
+        price *= 1.0 + self._rng.gauss(0.0, 0.001)
+        self._prices[coin] = price
+        return build_frame(venue=self.venue, coin=coin, price=price, timestamp=time_millis())
+
+def _parse_request(venue: str, message: str | bytes) -> Tuple[List[str], List[str], Optional[str]]:
+    try:
+        data = json.loads(message)
+    except (json.JSONDecodeError, TypeError):
+        return [], [], None
+
+    if venue == ALIAS_BINANCE:
+        coins = [p.split("@")[0][:-4] for p in data.get("params", [])]
+        reply = json.dumps({"result": None, "id": data.get("id")})
+        return (coins, [], reply) if data.get("method") == "SUBSCRIBE" else ([], coins, reply)
+    if venue == ALIAS_BYBIT:
+        coins = [a.split(".")[1][:-4].lower() for a in data.get("args", [])]
+        reply = json.dumps({"success": True, "ret_msg": "", "op": data.get("op")})
+        return (coins, [], reply) if data.get("op") == "subscribe" else ([], coins, reply)
+    if venue == ALIAS_COINBASE:
+        coins = [p.split("-")[0].lower() for c in data.get("channels", []) for p in c.get("product_ids", [])]
+        reply = json.dumps({"type": "subscriptions", "channels": data.get("channels", [])})
+        return (coins, [], reply) if data.get("type") == "subscribe" else ([], coins, reply)
+
+    method = data.get("method")
+    if method == "PING":
+        return [], [], json.dumps({"id": 0, "code": 0, "msg": "PONG"})
+    coins = [p.rsplit("@", 1)[1][:-4].lower() for p in data.get("params", [])]
+    reply = json.dumps({"id": data.get("id"), "code": 0, "msg": ",".join(data.get("params", []))})
+    return (coins, [], reply) if method == "SUBSCRIPTION" else ([], coins, reply)
+
+def build_frame(venue: str, coin: str, price: float, timestamp: int) -> str | bytes:
+    symbol = f"{coin.upper()}USDT"
+    if venue == ALIAS_BINANCE:
+        return json.dumps({"e": "24hrTicker", "E": timestamp, "s": symbol, "c": f"{price:.8f}"})
+    if venue == ALIAS_BYBIT:
+        return json.dumps({"topic": f"tickers.{symbol}", "ts": timestamp, "type": "snapshot", "data": {"symbol": symbol, "lastPrice": f"{price:.8f}"}})
+    if venue == ALIAS_COINBASE:
+        time = datetime.fromtimestamp(timestamp / 1000, tz=timezone.utc).isoformat().replace("+00:00", "Z")
+        return json.dumps({"type": "ticker", "product_id": f"{coin.upper()}-USD", "price": f"{price:.8f}", "time": time})
+
+    wrapper = PushDataV3ApiWrapper(channel=MEXC_CHANNEL + symbol, symbol=symbol, sendTime=timestamp)
+    wrapper.publicAggreDeals.deals.add(price=f"{price:.8f}", quantity="1", tradeType=1, time=timestamp)
+    return wrapper.SerializeToString()
+
+async def serve(venue: str, port: int, **options) -> None:
+    exchange = FakeExchange(venue=venue, **options)
+    url = await exchange.start(port=port)
+    print(f"🧪 fake {venue} on {url}")
+    await asyncio.Future()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local websocket server speaking an exchange's ticker dialect")
+    parser.add_argument("--exchange", required=True, choices=VENUES)
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--rate", type=float, default=1.0, help="messages per second per symbol")
+    parser.add_argument("--disconnects", type=float, default=0.0, help="random disconnects per minute per connection")
+    parser.add_argument("--stalls", type=float, default=0.0, help="random stalls per minute per connection")
+    args = parser.parse_args()
+
+    asyncio.run(serve(
+        venue=args.exchange,
+        port=args.port,
+        messages_per_symbol=args.rate,
+        disconnects_per_minute=args.disconnects,
+        stalls_per_minute=args.stalls,
+    ))
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import time
+import json
+import socket
+import random
+import asyncio
+import aiohttp
+import argparse
+import multiprocessing
+
+from typing import List
+from dataclasses import dataclass
+
+from src.hub import QuoteHub
+from src.latency import HdrHistogram
+from src.metrics import Registry
+
+EXCHANGES = ("binance", "bybit", "coinbase", "mexc")
+
+@dataclass
+class FanoutReport:
+    clients: int
+    stalled: int
+    interval_ms: int
+    updates: int
+    seconds: float
+    updates_per_second: float
+    deliveries: int
+    received: int
+    conflated: int
+    slow_disconnects: int
+    cpu_us_per_update: float
+    cpu_us_per_delivery: float
+    publish_p50_us: float
+    publish_p99_us: float
+    publish_max_us: float
+
+def _masked_text(text: str) -> bytes:
+    # A single client frame with a zero mask, enough for a short command.
+    payload = text.encode("utf-8")
+    return bytes([0x81, 0x80 | len(payload)]) + bytes(4) + payload
+
+def _clients(port: int, count: int, stalled: int, interval_ms: int, ready, stop, received) -> None:
+    async def _main():
+        loop = asyncio.get_running_loop()
+        url = f"http://127.0.0.1:{port}/ws?interval_ms={interval_ms}"
+        counts = [0] * count
+
+        async def _read(index: int, ws: aiohttp.ClientWebSocketResponse) -> None:
+            async for message in ws:
+                if message.type == aiohttp.WSMsgType.TEXT:
+                    counts[index] += message.data.count('{"type":"quote"')
+
+        # Stalled clients upgrade and then never read, their kernel buffers are kept small.
+        raw: List[socket.socket] = []
+        for _ in range(stalled):
+            sock = socket.socket()
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+            sock.connect(("127.0.0.1", port))
+            sock.sendall(
+                f"GET /ws HTTP/1.1\r\nHost: 127.0.0.1:{port}\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                "Sec-WebSocket-Key: dGhlIHNhbXBsZSBub25jZQ==\r\nSec-WebSocket-Version: 13\r\n\r\n".encode()
+                + _masked_text(json.dumps({"op": "subscribe", "coins": "*"}))
+            )
+            raw.append(sock)
+
+        # The default connector stops at 100 connections.
+        async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=0)) as session:
+            sockets = [await session.ws_connect(url) for _ in range(count)]
+            for ws in sockets:
+                await ws.send_str(json.dumps({"op": "subscribe", "coins": "*"}))
+            readers = [asyncio.create_task(_read(i, ws)) for (i, ws) in enumerate(sockets)]
+            ready.set()
+            await loop.run_in_executor(None, stop.wait)
+            received.value = sum(counts)
+            for task in readers:
+                task.cancel()
+            await asyncio.gather(*readers, return_exceptions=True)
+            await asyncio.gather(*(ws.close() for ws in sockets), return_exceptions=True)
+        for sock in raw:
+            sock.close()
+
+    asyncio.run(_main())
+
+async def fanout(
+    clients: int = 128,
+    stalled: int = 4,
+    symbols: int = 100,
+    updates_per_second: float = 2000.0,
+    seconds: float = 20.0,
+    interval_ms: int = 0,
+) -> FanoutReport:
+    hub = QuoteHub(port=0, send_timeout_seconds=5.0, metrics=Registry())
+    port = await hub.start()
+
+    # Clients read in their own process so the CPU figures are the hub's alone.
+    context = multiprocessing.get_context("spawn")
+    (ready, stop, received) = (context.Event(), context.Event(), context.Value("q", 0))
+    process = context.Process(target=_clients, args=(port, clients, stalled, interval_ms, ready, stop, received), daemon=True)
+    process.start()
+    loop = asyncio.get_running_loop()
+    try:
+        if not await loop.run_in_executor(None, ready.wait, 60):
+            raise RuntimeError("Fan-out clients did not connect")
+        while len(hub.clients) < clients + stalled:
+            await asyncio.sleep(0.05)
+        await asyncio.sleep(0.5)
+
+        rng = random.Random(7)
+        coins = [f"coin{i}" for i in range(symbols)]
+        publish = hub.publish_quote
+        histogram = HdrHistogram()
+        tick_seconds = 0.01
+        per_tick = max(1, int(updates_per_second * tick_seconds))
+        (sent, conflated) = (hub.total("sent"), hub.total("conflated"))
+        updates = 0
+
+        cpu = time.process_time()
+        start = time.perf_counter()
+        due = start
+        while time.perf_counter() - start < seconds:
+            for _ in range(per_tick):
+                (coin, exchange) = (rng.choice(coins), rng.choice(EXCHANGES))
+                before = time.perf_counter_ns()
+                publish(coin, exchange, rng.uniform(1.0, 100.0), updates)
+                histogram.record((time.perf_counter_ns() - before) // 1000)
+                updates += 1
+            due += tick_seconds
+            await asyncio.sleep(max(0.0, due - time.perf_counter()))
+        # Let the pumps drain what the last ticks queued.
+        await asyncio.sleep(1.0)
+        elapsed = time.perf_counter() - start
+        cpu = time.process_time() - cpu
+        deliveries = hub.total("sent") - sent
+        conflated = hub.total("conflated") - conflated
+    finally:
+        stop.set()
+        await loop.run_in_executor(None, process.join, 30)
+        if process.is_alive():
+            process.kill()
+        await hub.stop()
+
+    return FanoutReport(
+        clients=clients,
+        stalled=stalled,
+        interval_ms=interval_ms,
+        updates=updates,
+        seconds=elapsed,
+        updates_per_second=updates / elapsed,
+        deliveries=deliveries,
+        received=received.value,
+        conflated=conflated,
+        slow_disconnects=hub.slow_disconnects,
+        cpu_us_per_update=cpu * 1_000_000 / updates if updates else 0.0,
+        cpu_us_per_delivery=cpu * 1_000_000 / deliveries if deliveries else 0.0,
+        publish_p50_us=histogram.percentile(50),
+        publish_p99_us=histogram.percentile(99),
+        publish_max_us=histogram.max,
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fan-out cost of the websocket hub with many local clients")
+    parser.add_argument("--clients", type=int, default=128)
+    parser.add_argument("--stalled", type=int, default=4, help="clients that connect and never read")
+    parser.add_argument("--symbols", type=int, default=100)
+    parser.add_argument("--rate", type=float, default=2000.0, help="published updates per second")
+    parser.add_argument("--seconds", type=float, default=20.0)
+    parser.add_argument("--interval-ms", type=int, default=0, help="client batching interval, 0 is full rate")
+    args = parser.parse_args()
+
+    report = asyncio.run(fanout(
+        clients=args.clients,
+        stalled=args.stalled,
+        symbols=args.symbols,
+        updates_per_second=args.rate,
+        seconds=args.seconds,
+        interval_ms=args.interval_ms,
+    ))
+    print(
+        f"{report.clients} clients + {report.stalled} stalled, interval {report.interval_ms} ms: "
+        f"{report.updates_per_second:,.0f} updates/s, {report.deliveries:,} delivered, {report.received:,} received, "
+        f"{report.conflated:,} conflated, {report.slow_disconnects} slow disconnects"
+    )
+    print(
+        f"CPU {report.cpu_us_per_update:.1f} µs per update, {report.cpu_us_per_delivery:.2f} µs per delivery, "
+        f"publish p50 {report.publish_p50_us} µs p99 {report.publish_p99_us} µs max {report.publish_max_us} µs"
+    )
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import time
+import asyncio
+import argparse
+import numpy as np
+
+from typing import Dict, Optional
+from pathlib import Path
+from dataclasses import dataclass, replace
+
+from src.config import Settings, Capture, Discovery, load_config
+from src.database import Database
+from src.manager import MainManager
+from src.writer import DatabaseWriter
+
+from src.exchanges.capture import read_frames, read_coins
+from src.exchanges.mexc.mexc import ALIAS as ALIAS_MEXC, MexcStreamer
+from src.exchanges.bybit import ALIAS as ALIAS_BYBIT, BybitStreamer
+from src.exchanges.binance import ALIAS as ALIAS_BINANCE, BinanceStreamer
+from src.exchanges.coinbase import ALIAS as ALIAS_COINBASE, CoinbaseStreamer
+
+STREAMERS = {
+    ALIAS_MEXC: MexcStreamer,
+    ALIAS_BYBIT: BybitStreamer,
+    ALIAS_BINANCE: BinanceStreamer,
+    ALIAS_COINBASE: CoinbaseStreamer,
+}
+
+PERCENTILES = (50, 90, 99, 99.9)
+
+@dataclass
+class ReplayReport:
+    exchange: str
+    frames: int
+    ticks: int
+    seconds: float
+    frames_per_second: float
+    ticks_per_second: float
+    latency_us: Dict[str, float]
+
+async def replay(
+    path: Path,
+    exchange: str,
+    paced: bool = False,
+    settings: Optional[Settings] = None,
+) -> ReplayReport:
+    settings = settings or load_config()
+    # Replay must not write journal segments, captures or start live feeds.
+    settings = replace(
+        settings,
+        journal=replace(settings.journal, enabled=False),
+        capture=Capture(enabled=False),
+        discovery=Discovery(enabled=False),
+        feed=replace(settings.feed, enabled=False),
+    )
+    frames = list(read_frames(path))
+    coins = read_coins(path)
+
+    database = Database(url="sqlite:///:memory:")
+    writer = DatabaseWriter(database=database, capacity=settings.writer.queue_size, policy=settings.writer.backpressure)
+    writer.start()
+    manager = None
+    try:
+        manager = MainManager(settings=settings, database=database, writer=writer)
+        await asyncio.wrap_future(writer.call(database.register, coins=coins, exchanges=[exchange]))
+        manager.board = manager.board.rebuild(coins=coins)
+
+        ticks = 0
+
+        def _counted(callback):
+            def _tick(price: float, timestamp: int) -> None:
+                nonlocal ticks
+                ticks += 1
+                callback(price, timestamp)
+            return _tick
+
+        callbacks = manager._build_callbacks(alias=exchange, coins=coins)
+        streamer = STREAMERS[exchange](
+            url="",
+            coins=coins,
+            callbacks={c: _counted(cb) for (c, cb) in callbacks.items()},
+            conflator=manager.conflators.get(exchange),
+        )
+
+        manager.sink.start()
+        latencies = np.zeros(len(frames), dtype=np.int64)
+        first_ns = frames[0][0] if frames else 0
+        start = time.perf_counter()
+        for (i, (receive_ns, frame)) in enumerate(frames):
+            if paced:
+                delay = (receive_ns - first_ns) / 1e9 - (time.perf_counter() - start)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            started = time.perf_counter_ns()
+            streamer.frames += 1
+            streamer._handle_frame(frame)
+            latencies[i] = time.perf_counter_ns() - started
+        elapsed = time.perf_counter() - start
+        await manager.sink.stop(flush=True)
+    finally:
+        if manager is not None:
+            await manager.shutdown()
+        writer.close()
+        database.close()
+
+    latency_us = {f"p{p:g}": float(np.percentile(latencies, p)) / 1000 for p in PERCENTILES} if frames else {}
+    if frames:
+        latency_us["max"] = float(latencies.max()) / 1000
+    return ReplayReport(
+        exchange=exchange,
+        frames=len(frames),
+        ticks=ticks,
+        seconds=elapsed,
+        frames_per_second=len(frames) / elapsed if elapsed > 0 else 0.0,
+        ticks_per_second=ticks / elapsed if elapsed > 0 else 0.0,
+        latency_us=latency_us,
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a frame capture through a streamer and the tick chain")
+    parser.add_argument("capture", type=Path)
+    parser.add_argument("--exchange", required=True, choices=sorted(STREAMERS))
+    parser.add_argument("--paced", action="store_true", help="keep the original frame pacing")
+    args = parser.parse_args()
+
+    report = asyncio.run(replay(path=args.capture, exchange=args.exchange, paced=args.paced))
+    print(
+        f"{report.exchange}: {report.frames:,} frames, {report.ticks:,} ticks in {report.seconds:.2f}s "
+        f"({report.frames_per_second:,.0f} frames/s, {report.ticks_per_second:,.0f} ticks/s)"
+    )
+    print("latency us:", ", ".join(f"{k} {v:.1f}" for (k, v) in report.latency_us.items()))
@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import os
+import time
+import asyncio
+import argparse
+import resource
+import multiprocessing
+
+from typing import List, Dict, Optional
+from dataclasses import dataclass, field, replace
+
+from src.config import Settings, Capture, Discovery, load_config
+from src.database import Database
+from src.manager import MODE_SINGLE, MODE_PROCESS, MainManager
+from src.writer import DatabaseWriter
+from src.interests.bubble import Bubble
+
+from benchmarks.fake_exchange import FakeExchange
+
+@dataclass
+class SoakSample:
+    seconds: float
+    frames: int
+    ticks: int
+    cpu_seconds: float
+    rss_mb: float
+
+@dataclass
+class SoakReport:
+    symbols: int
+    frames: int
+    ticks: int
+    seconds: float
+    frames_per_second: float
+    ticks_per_second: float
+    cpu_ms_per_1k_frames: float
+    peak_rss_mb: float
+    mode: str = MODE_SINGLE
+    samples: List[SoakSample] = field(default_factory=list)
+
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/statm", "r") as stream:
+            pages = int(stream.read().split()[1])
+        return pages * resource.getpagesize() / 1_048_576
+    except (OSError, ValueError, IndexError):
+        # Peak instead of current, but better than nothing off Linux.
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def _cpu_seconds(pids: List[int]) -> float:
+    # This process plus its workers, read from /proc while they are still running.
+    total = time.process_time()
+    ticks = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/stat", "r") as stream:
+                fields = stream.read().rsplit(")", 1)[1].split()
+            total += (int(fields[11]) + int(fields[12])) / ticks
+        except (OSError, ValueError, IndexError):
+            continue
+    return total
+
+def _serve(venue: str, options: Dict, ports: multiprocessing.Queue) -> None:
+    async def _main():
+        exchange = FakeExchange(venue=venue, **options)
+        await exchange.start()
+        ports.put((venue, exchange.port))
+        await asyncio.Future()
+
+    asyncio.run(_main())
+
+async def soak(
+    symbols: int = 200,
+    messages_per_symbol: float = 2.0,
+    seconds: float = 60.0,
+    sample_seconds: float = 5.0,
+    disconnects_per_minute: float = 0.2,
+    stalls_per_minute: float = 0.2,
+    mode: str = MODE_SINGLE,
+    settings: Optional[Settings] = None,
+) -> SoakReport:
+    settings = settings or load_config()
+    venues = [e.name for e in settings.exchanges]
+
+    # Fake venues run in their own processes so the CPU figures are the client's alone.
+    context = multiprocessing.get_context("spawn")
+    ports = context.Queue()
+    options = {
+        "messages_per_symbol": messages_per_symbol,
+        "disconnects_per_minute": disconnects_per_minute,
+        "stalls_per_minute": stalls_per_minute,
+    }
+    servers = [context.Process(target=_serve, args=(v, options, ports), daemon=True) for v in venues]
+    for server in servers:
+        server.start()
+    urls = {}
+    for _ in servers:
+        (venue, port) = await asyncio.get_running_loop().run_in_executor(None, ports.get, True, 30)
+        urls[venue] = f"ws://127.0.0.1:{port}"
+
+    settings = replace(
+        settings,
+        exchanges=[replace(e, websocket=urls[e.name]) for e in settings.exchanges],
+        journal=replace(settings.journal, enabled=False),
+        capture=Capture(enabled=False),
+        discovery=Discovery(enabled=False),
+        feed=replace(settings.feed, enabled=False),
+        execution=replace(settings.execution, mode=mode, max_coins=max(settings.execution.max_coins, symbols)),
+    )
+    database = Database(url="sqlite:///:memory:")
+    writer = DatabaseWriter(database=database, capacity=settings.writer.queue_size, policy=settings.writer.backpressure)
+    writer.start()
+    manager = MainManager(settings=settings, database=database, writer=writer)
+
+    ticks = 0
+    on_tick = manager._on_tick
+
+    def _counted(**kwargs) -> None:
+        nonlocal ticks
+        ticks += 1
+        on_tick(**kwargs)
+
+    manager._on_tick = _counted
+    samples: List[SoakSample] = []
+    try:
+        watchlist = [
+            Bubble(id=f"coin{i}", symbol=f"coin{i}", market_cap=float(symbols - i), listed_exc=venues, performance={})
+            for i in range(symbols)
+        ]
+        await manager._start(watchlist)
+
+        start = time.perf_counter()
+
+        def _sample() -> SoakSample:
+            supervisor = manager.supervisor
+            return SoakSample(
+                seconds=time.perf_counter() - start,
+                frames=supervisor.frames() if supervisor is not None else sum(
+                    s.frames for shards in manager.streamers.values() for s in shards
+                ),
+                ticks=ticks,
+                cpu_seconds=_cpu_seconds(supervisor.pids() if supervisor is not None else []),
+                rss_mb=_rss_mb(),
+            )
+
+        while time.perf_counter() - start < seconds:
+            await asyncio.sleep(sample_seconds)
+            samples.append(_sample())
+            last = samples[-1]
+            print(f"{last.seconds:6.1f}s frames {last.frames:,} ticks {last.ticks:,} rss {last.rss_mb:.1f} MB")
+        if not samples:
+            # Runs shorter than one interval still report where they got to.
+            samples.append(_sample())
+    finally:
+        await manager.shutdown()
+        writer.close()
+        database.close()
+        for server in servers:
+            server.terminate()
+            server.join()
+
+    # The first sample covers connects and subscriptions, measure the steady state after it.
+    (first, last) = (samples[0], samples[-1]) if len(samples) > 1 else (SoakSample(0, 0, 0, 0, 0), samples[-1])
+    elapsed = last.seconds - first.seconds
+    frames = last.frames - first.frames
+    return SoakReport(
+        symbols=symbols,
+        frames=last.frames,
+        ticks=last.ticks,
+        seconds=last.seconds,
+        frames_per_second=frames / elapsed if elapsed > 0 else 0.0,
+        ticks_per_second=(last.ticks - first.ticks) / elapsed if elapsed > 0 else 0.0,
+        cpu_ms_per_1k_frames=(last.cpu_seconds - first.cpu_seconds) * 1000 / frames * 1000 if frames else 0.0,
+        peak_rss_mb=max(s.rss_mb for s in samples),
+        mode=mode,
+        samples=samples,
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Soak the streamers against local fake exchanges")
+    parser.add_argument("--symbols", type=int, default=200)
+    parser.add_argument("--rate", type=float, default=2.0, help="messages per second per symbol and venue")
+    parser.add_argument("--seconds", type=float, default=60.0)
+    parser.add_argument("--sample", type=float, default=5.0)
+    parser.add_argument("--disconnects", type=float, default=0.2, help="random disconnects per minute per connection")
+    parser.add_argument("--stalls", type=float, default=0.2, help="random stalls per minute per connection")
+    parser.add_argument("--mode", choices=(MODE_SINGLE, MODE_PROCESS), default=MODE_SINGLE)
+    args = parser.parse_args()
+
+    report = asyncio.run(soak(
+        symbols=args.symbols,
+        messages_per_symbol=args.rate,
+        seconds=args.seconds,
+        sample_seconds=args.sample,
+        disconnects_per_minute=args.disconnects,
+        stalls_per_minute=args.stalls,
+        mode=args.mode,
+    ))
+    print(
+        f"{report.mode}, {report.symbols} symbols: {report.frames_per_second:,.0f} frames/s, {report.ticks_per_second:,.0f} ticks/s, "
+        f"{report.cpu_ms_per_1k_frames:.1f} CPU ms per 1k frames, peak RSS {report.peak_rss_mb:.1f} MB"
+    )
@@ -0,0 +1,302 @@
+from __future__ import annotations
+
+import os
+import sys
+import json
+import time
+import random
+import fnmatch
+import argparse
+import platform
+import tempfile
+
+from typing import Any, Dict, List, Tuple, Callable, Optional
+from pathlib import Path
+
+from src.basics import chunked
+from src.config import BubblesFilter
+from src.database import Database
+from src.metrics import Registry
+from src.hub import HubClient, QuoteHub
+from src.latency import VenueLatency
+from src.quote_feed import QuoteFeed, QuoteFeedReader
+from src.interests.bubbles import _columns, _parse_row, _mask_bubbles
+
+from src.exchanges.mexc.mexc import ALIAS as ALIAS_MEXC, MexcStreamer
+from src.exchanges.bybit import ALIAS as ALIAS_BYBIT, BybitStreamer
+from src.exchanges.binance import ALIAS as ALIAS_BINANCE, BinanceStreamer
+from src.exchanges.coinbase import ALIAS as ALIAS_COINBASE, CoinbaseStreamer
+
+from benchmarks.detector import bench_detector
+from benchmarks.fake_exchange import build_frame
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+DEFAULT_TOLERANCE = 0.4
+
+STREAMERS = {
+    ALIAS_MEXC: MexcStreamer,
+    ALIAS_BYBIT: BybitStreamer,
+    ALIAS_BINANCE: BinanceStreamer,
+    ALIAS_COINBASE: CoinbaseStreamer,
+}
+
+# Benchmarks report operations per second, higher is better.
+Benchmark = Callable[[float], float]
+
+def _best_rate(run: Callable[[], int], repeat: int = 7) -> float:
+    best = 0.0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        ops = run()
+        elapsed = time.perf_counter() - start
+        best = max(best, ops / elapsed)
+    return best
+
+def _bench_parser(venue: str) -> Benchmark:
+    def _bench(scale: float) -> float:
+        rng = random.Random(7)
+        coins = [f"coin{i}" for i in range(100)]
+        frames = [
+            build_frame(venue=venue, coin=rng.choice(coins), price=rng.uniform(0.1, 1000.0), timestamp=1_700_000_000_000 + i)
+            for i in range(max(100, int(20_000 * scale)))
+        ]
+        streamer = STREAMERS[venue](url="", coins=coins, callbacks={})
+        parse = streamer._parse_websocket_frame
+
+        def _run() -> int:
+            for frame in frames:
+                parse(frame)
+            return len(frames)
+        return _best_rate(_run)
+    return _bench
+
+def _bench_handle_frame(venue: str, traced: bool = False) -> Benchmark:
+    # Parse plus dispatch and instrumentation, compare with parse.* for the overhead.
+    def _bench(scale: float) -> float:
+        rng = random.Random(7)
+        coins = [f"coin{i}" for i in range(100)]
+        frames = [
+            build_frame(venue=venue, coin=rng.choice(coins), price=rng.uniform(0.1, 1000.0), timestamp=1_700_000_000_000 + i)
+            for i in range(max(100, int(20_000 * scale)))
+        ]
+        streamer = STREAMERS[venue](
+            url="",
+            coins=coins,
+            callbacks={c: lambda price, timestamp: None for c in coins},
+            latency=VenueLatency(exchange=venue) if traced else None,
+        )
+        handle = streamer._handle_frame
+        receive_ns = 1_700_000_000_000 * 1_000_000
+
+        def _run() -> int:
+            for frame in frames:
+                handle(frame, receive_ns=receive_ns)
+            return len(frames)
+        return _best_rate(_run)
+    return _bench
+
+def _bench_counter(scale: float) -> float:
+    counter = Registry().counter("bench_total", "Bench", ("exchange", "shard")).labels("binance", "0")
+    count = max(10_000, int(1_000_000 * scale))
+
+    def _run() -> int:
+        for _ in range(count):
+            counter.inc()
+        return count
+    return _best_rate(_run)
+
+def _bench_histogram(scale: float) -> float:
+    histogram = Registry().histogram("bench_seconds", "Bench", ("exchange", "shard")).labels("binance", "0")
+    rng = random.Random(7)
+    values = [rng.lognormvariate(-11.0, 1.5) for _ in range(max(10_000, int(1_000_000 * scale)))]
+
+    def _run() -> int:
+        for value in values:
+            histogram.observe(value)
+        return len(values)
+    return _best_rate(_run)
+
+def _bench_insert_price(url: Optional[str]) -> Benchmark:
+    def _bench(scale: float) -> float:
+        with tempfile.TemporaryDirectory() as directory:
+            database = Database(url=url or f"sqlite:///{Path(directory) / 'bench.db'}")
+            coins = [f"coin{i}" for i in range(100)]
+            database.register(coins=coins, exchanges=list(STREAMERS))
+            count = max(100, int(2_000 * scale))
+
+            def _run() -> int:
+                for i in range(count):
+                    database.insert_price(coins[i % len(coins)], ALIAS_BINANCE, 1.0 + i, 1_700_000_000_000 + i)
+                return count
+            try:
+                return _best_rate(_run, repeat=3)
+            finally:
+                database.close()
+    return _bench
+
+def _bench_chunked(scale: float) -> float:
+    items = list(range(max(10_000, int(1_000_000 * scale))))
+
+    def _run() -> int:
+        for _ in chunked(iterable=items, size=30):
+            pass
+        return len(items)
+    return _best_rate(_run)
+
+def _bench_bubble_filters(scale: float) -> float:
+    rng = random.Random(7)
+    items = [
+        {
+            "cg_id": f"coin-{i}",
+            "symbol": f"C{i}",
+            "marketcap": rng.uniform(1e5, 1e11),
+            "exchangePrices": {e: 1.0 for e in rng.sample(list(STREAMERS), 2)},
+            "performance": {k: rng.gauss(0.0, 5.0) for k in ("day", "hour4", "hour", "min15")},
+        } for i in range(1_000)
+    ]
+    columns = _columns([_parse_row(i) for i in items])
+    filter = BubblesFilter(
+        market_cap_min=1e6,
+        market_cap_max=2.3e10,
+        listed_exchanges=2,
+        performance_per_day=1.0,
+        performance_per_hour_4=0.5,
+        performance_per_hour_1=0.25,
+        performance_per_minutes_15=0.1,
+    )
+    rounds = max(10, int(500 * scale))
+
+    def _run() -> int:
+        for _ in range(rounds):
+            mask = _mask_bubbles(filter=filter, columns=columns)
+            selected = mask.nonzero()[0]
+            selected[(-columns.market_cap[selected]).argsort(kind="stable")]
+        return rounds * len(items)
+    return _best_rate(_run)
+
+def _bench_detector(scale: float) -> float:
+    return bench_detector(ticks=max(10_000, int(200_000 * scale)))
+
+def _bench_feed(snapshot: bool) -> Benchmark:
+    def _bench(scale: float) -> float:
+        coins = [f"coin{i}" for i in range(300)]
+        feed = QuoteFeed.create(name=f"referee-bench-{os.getpid()}", capacity=1024, exchanges=list(STREAMERS))
+        feed.set_watchlist(coins)
+        reader = QuoteFeedReader(feed.name)
+        rng = random.Random(7)
+        ticks = [(rng.choice(coins), rng.choice(list(STREAMERS)), rng.uniform(0.1, 1000.0)) for _ in range(1000)]
+        count = max(100, int((1_000 if snapshot else 200_000) * scale))
+        publish = feed.publish
+
+        def _run() -> int:
+            for i in range(count):
+                if snapshot:
+                    reader.snapshot()
+                else:
+                    (coin, exchange, price) = ticks[i % len(ticks)]
+                    publish(coin, exchange, price, i)
+            return count
+        try:
+            return _best_rate(_run)
+        finally:
+            reader.close()
+            feed.close()
+    return _bench
+
+def _bench_fan_out(scale: float) -> float:
+    # Publish side only, the clients never drain so every offer after the first is a conflation.
+    hub = QuoteHub(metrics=Registry())
+    coins = [f"coin{i}" for i in range(100)]
+    for _ in range(128):
+        hub.subscribe(HubClient(socket=None, max_pending=hub.max_pending, interval_ms=0), coins)
+    rng = random.Random(7)
+    ticks = [(rng.choice(coins), rng.choice(list(STREAMERS)), rng.uniform(0.1, 1000.0)) for _ in range(1000)]
+    count = max(100, int(5_000 * scale))
+    publish = hub.publish_quote
+
+    def _run() -> int:
+        for i in range(count):
+            (coin, exchange, price) = ticks[i % len(ticks)]
+            publish(coin, exchange, price, i)
+        return count
+    return _best_rate(_run)
+
+BENCHMARKS: Dict[str, Benchmark] = {
+    "parse.binance": _bench_parser(ALIAS_BINANCE),
+    "parse.bybit": _bench_parser(ALIAS_BYBIT),
+    "parse.coinbase": _bench_parser(ALIAS_COINBASE),
+    "parse.mexc": _bench_parser(ALIAS_MEXC),
+    "stream.handle_frame.binance": _bench_handle_frame(ALIAS_BINANCE),
+    "stream.handle_frame.binance.traced": _bench_handle_frame(ALIAS_BINANCE, traced=True),
+    "metrics.counter_inc": _bench_counter,
+    "metrics.histogram_observe": _bench_histogram,
+    "database.insert_price.memory": _bench_insert_price("sqlite:///:memory:"),
+    "database.insert_price.file": _bench_insert_price(None),
+    "basics.chunked": _bench_chunked,
+    "bubbles.filter_1000": _bench_bubble_filters,
+    "detector.update": _bench_detector,
+    "feed.publish": _bench_feed(snapshot=False),
+    "feed.snapshot": _bench_feed(snapshot=True),
+    "hub.fan_out.128_clients": _bench_fan_out,
+}
+
+def run_suite(names: Optional[List[str]] = None, scale: float = 1.0) -> Dict[str, Any]:
+    results = {}
+    for (name, benchmark) in BENCHMARKS.items():
+        if names and not any(fnmatch.fnmatch(name, n) for n in names):
+            continue
+        results[name] = {"ops_per_second": benchmark(scale)}
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+def compare(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    tolerance: Optional[float] = None,
+) -> List[Tuple[str, float, float, float]]:
+    if tolerance is None:
+        tolerance = baseline.get("tolerance", DEFAULT_TOLERANCE)
+    overrides = baseline.get("tolerances", {})
+
+    regressions = []
+    for (name, result) in current["results"].items():
+        expected = baseline["results"].get(name)
+        if expected is None:
+            continue
+        allowed = next((t for (p, t) in overrides.items() if fnmatch.fnmatch(name, p)), tolerance)
+        ratio = result["ops_per_second"] / expected["ops_per_second"]
+        if ratio < 1.0 - allowed:
+            regressions.append((name, result["ops_per_second"], expected["ops_per_second"], allowed))
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parser and ingest micro-benchmarks")
+    parser.add_argument("names", nargs="*", help="glob patterns of benchmarks to run")
+    parser.add_argument("--output", type=Path, help="write results as JSON")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, help="allowed slowdown as a fraction, overrides the baseline")
+    parser.add_argument("--scale", type=float, default=1.0, help="workload size multiplier")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    current = run_suite(names=args.names, scale=args.scale)
+    for (name, result) in current["results"].items():
+        print(f"{name:32} {result['ops_per_second']:>16,.0f} ops/s")
+    if args.output:
+        args.output.write_text(json.dumps(current, indent=2))
+
+    if args.update_baseline:
+        previous = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+        current["tolerance"] = previous.get("tolerance", DEFAULT_TOLERANCE)
+        current["tolerances"] = previous.get("tolerances", {})
+        args.baseline.write_text(json.dumps(current, indent=2) + "\n")
+        print(f"📏 baseline written to {args.baseline}")
+    elif args.baseline.exists():
+        regressions = compare(current=current, baseline=json.loads(args.baseline.read_text()), tolerance=args.tolerance)
+        for (name, rate, expected, allowed) in regressions:
+            print(f"🐢 {name}: {rate:,.0f} ops/s vs baseline {expected:,.0f} (allowed -{allowed:.0%})")
+        if regressions:
+            sys.exit(1)
@@ -1,15 +1,25 @@
 import time
 
-from typing import TypeVar, List, Dict, Iterator, Iterable, Callable
+from typing import TypeVar, List, Dict, Tuple, Iterator, Iterable, Callable
+from pathlib import Path
 from itertools import islice
 
 T = TypeVar('T')
 
 StreamCallbacks = Dict[str, Callable[[float, int], None]]
+# coin, price, 24h change in percent, timestamp
+MarketTicker = Tuple[str, float, float, int]
+MarketCallback = Callable[[List[MarketTicker]], None]
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
 
 def time_millis() -> int:
     return int(time.time() * 1000)
 
+def project_path(path: str) -> Path:
+    result = Path(path)
+    return result if result.is_absolute() else PROJECT_ROOT / result
+
 def chunked(iterable: Iterable[T], size: int) -> Iterator[List[T]]:
     it = iter(iterable)
     while True:
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import numpy as np
+
+from typing import List, Iterable, Optional
+from dataclasses import dataclass
+
+from src.basics import time_millis
+
+@dataclass
+class SpreadSnapshot:
+    coins: List[str]
+    exchanges: List[str]
+    quotes: np.ndarray
+    min_price: np.ndarray
+    max_price: np.ndarray
+    buy_exchange: np.ndarray
+    sell_exchange: np.ndarray
+    spread_pct: np.ndarray
+
+class QuoteBoard:
+    def __init__(
+        self,
+        coins: Iterable[str],
+        exchanges: Iterable[str],
+        max_age_ms: int = 10_000,
+    ):
+        self.coins = list(dict.fromkeys(coins))
+        self.exchanges = list(dict.fromkeys(exchanges))
+        self.max_age_ms = max_age_ms
+        self.coin_index = {c: i for (i, c) in enumerate(self.coins)}
+        self.exchange_index = {e: i for (i, e) in enumerate(self.exchanges)}
+        shape = (len(self.coins), len(self.exchanges))
+        self.prices = np.full(shape, np.nan, dtype=np.float64)
+        self.timestamps = np.zeros(shape, dtype=np.int64)
+
+    def rebuild(self, coins: Iterable[str]) -> QuoteBoard:
+        board = QuoteBoard(coins=coins, exchanges=self.exchanges, max_age_ms=self.max_age_ms)
+        kept = [(i, self.coin_index[c]) for (i, c) in enumerate(board.coins) if c in self.coin_index]
+        if kept:
+            (new_rows, old_rows) = (list(r) for r in zip(*kept))
+            board.prices[new_rows] = self.prices[old_rows]
+            board.timestamps[new_rows] = self.timestamps[old_rows]
+        return board
+
+    def update(self, coin: str, exchange: str, price: float, timestamp: int) -> None:
+        row = self.coin_index.get(coin)
+        col = self.exchange_index.get(exchange)
+        if row is None or col is None:
+            return
+        self.prices[row, col] = price
+        self.timestamps[row, col] = timestamp
+
+    def snapshot(self, now_ms: Optional[int] = None) -> SpreadSnapshot:
+        if now_ms is None:
+            now_ms = time_millis()
+
+        fresh = (self.timestamps >= now_ms - self.max_age_ms) & (self.prices > 0)
+        quotes = fresh.sum(axis=1)
+        rows = np.arange(len(self.coins))
+
+        lows = np.where(fresh, self.prices, np.inf)
+        highs = np.where(fresh, self.prices, -np.inf)
+        buy = lows.argmin(axis=1)
+        sell = highs.argmax(axis=1)
+        min_price = lows[rows, buy]
+        max_price = highs[rows, sell]
+
+        quoted = quotes > 0
+        paired = quotes > 1
+        with np.errstate(divide="ignore", invalid="ignore"):
+            spread_pct = np.where(paired, (max_price - min_price) / min_price * 100.0, np.nan)
+
+        return SpreadSnapshot(
+            coins=self.coins,
+            exchanges=self.exchanges,
+            quotes=quotes,
+            min_price=np.where(quoted, min_price, np.nan),
+            max_price=np.where(quoted, max_price, np.nan),
+            buy_exchange=np.where(quoted, buy, -1),
+            sell_exchange=np.where(quoted, sell, -1),
+            spread_pct=spread_pct,
+        )
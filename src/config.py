@@ -2,23 +2,59 @@ from __future__ import annotations
 
 import yaml
 
-from typing import List
+from typing import List, Optional
 from pathlib import Path
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 __CONFIG_PATH = Path(__file__).resolve().parents[1] / "config" / "config.yaml"
 __CONFIG_KEY_EXCHANGES = "exchanges"
 __CONFIG_KEY_BUBBLE_FILTER = "bubbles_filter"
+__CONFIG_KEY_SINK = "sink"
+__CONFIG_KEY_WRITER = "writer"
+__CONFIG_KEY_JOURNAL = "journal"
+__CONFIG_KEY_BOARD = "board"
+__CONFIG_KEY_DETECTOR = "detector"
+__CONFIG_KEY_CONFLATION = "conflation"
+__CONFIG_KEY_COINGECKO = "coingecko"
+__CONFIG_KEY_DISCOVERY = "discovery"
+__CONFIG_KEY_CAPTURE = "capture"
+__CONFIG_KEY_METRICS = "metrics"
+__CONFIG_KEY_LATENCY = "latency"
+__CONFIG_KEY_WATCHDOG = "watchdog"
+__CONFIG_KEY_PROFILER = "profiler"
+__CONFIG_KEY_EXECUTION = "execution"
+__CONFIG_KEY_FEED = "feed"
+__CONFIG_KEY_HUB = "hub"
 
 @dataclass
 class Settings:
     filter: BubblesFilter
     exchanges: List[Exchange]
+    sink: Sink = field(default_factory=lambda: Sink())
+    writer: Writer = field(default_factory=lambda: Writer())
+    journal: Journal = field(default_factory=lambda: Journal())
+    board: Board = field(default_factory=lambda: Board())
+    detector: Detector = field(default_factory=lambda: Detector())
+    conflation: Conflation = field(default_factory=lambda: Conflation())
+    coingecko: CoinGecko = field(default_factory=lambda: CoinGecko())
+    discovery: Discovery = field(default_factory=lambda: Discovery())
+    capture: Capture = field(default_factory=lambda: Capture())
+    metrics: Metrics = field(default_factory=lambda: Metrics())
+    latency: Latency = field(default_factory=lambda: Latency())
+    watchdog: Watchdog = field(default_factory=lambda: Watchdog())
+    profiler: Profiler = field(default_factory=lambda: Profiler())
+    execution: Execution = field(default_factory=lambda: Execution())
+    feed: Feed = field(default_factory=lambda: Feed())
+    hub: Hub = field(default_factory=lambda: Hub())
 
 @dataclass
 class Exchange:
     name: str
     websocket: str
+    streams_per_connection: Optional[int] = None
+    args_per_message: Optional[int] = None
+    messages_per_second: Optional[float] = None
+    max_frames_per_second: Optional[float] = None
 
 @dataclass
 class BubblesFilter:
@@ -30,10 +66,139 @@ class BubblesFilter:
     performance_per_hour_1: float
     performance_per_minutes_15: float
 
+@dataclass
+class Sink:
+    flush_interval_ms: int = 250
+    max_buffer_size: int = 1000
+    flush_on_shutdown: bool = True
+
+@dataclass
+class Writer:
+    queue_size: int = 10000
+    backpressure: str = "latest"
+
+@dataclass
+class Journal:
+    enabled: bool = False
+    directory: str = "journal"
+    segment_records: int = 1048576
+    segment_minutes: float = 60.0
+    retention_hours: float = 24.0
+
+@dataclass
+class Board:
+    max_quote_age_ms: int = 10000
+
+@dataclass
+class Detector:
+    enabled: bool = True
+    entry_spread_pct: float = 1.0
+    exit_spread_pct: float = 0.5
+    max_quote_age_ms: int = 10000
+
+@dataclass
+class Conflation:
+    enabled: bool = True
+    deadband: float = 0.0001
+    min_interval_ms: int = 250
+    max_staleness_ms: int = 5000
+
+@dataclass
+class CoinGecko:
+    cache_path: str = "coingecko_cache.json"
+    cache_ttl_hours: float = 24.0
+    negative_ttl_minutes: float = 30.0
+    rate_capacity: int = 5
+    rate_refill_per_second: float = 0.5
+    max_attempts: int = 3
+    use_exchange_index: bool = True
+    index_ttl_hours: float = 6.0
+
+@dataclass
+class Discovery:
+    enabled: bool = False
+    resolution_seconds: int = 60
+    evaluate_interval_seconds: float = 5.0
+    hold_minutes: float = 15.0
+
+@dataclass
+class Capture:
+    enabled: bool = False
+    directory: str = "capture"
+
+@dataclass
+class Metrics:
+    enabled: bool = False
+    host: str = "127.0.0.1"
+    port: int = 9464
+
+@dataclass
+class Latency:
+    enabled: bool = True
+    slow_ms: float = 1000.0
+    offset_window_seconds: int = 300
+    summary_interval_seconds: float = 60.0
+
+@dataclass
+class Watchdog:
+    enabled: bool = True
+    interval_ms: int = 100
+    threshold_ms: int = 250
+    stack_depth: int = 20
+
+@dataclass
+class Profiler:
+    enabled: bool = True
+    directory: str = "profiles"
+    duration_seconds: float = 30.0
+    interval_ms: float = 5.0
+    allocation_top: int = 25
+    allocation_frames: int = 1
+
+@dataclass
+class Execution:
+    mode: str = "single"
+    processes_per_exchange: int = 1
+    max_coins: int = 1024
+    poll_interval_ms: int = 50
+    heartbeat_timeout_seconds: float = 5.0
+    max_restart_delay_seconds: float = 30.0
+
+@dataclass
+class Feed:
+    enabled: bool = False
+    name: str = "referee-quotes"
+    max_coins: int = 1024
+
+@dataclass
+class Hub:
+    enabled: bool = False
+    host: str = "127.0.0.1"
+    port: int = 9465
+    max_pending: int = 1024
+    interval_ms: int = 0
+    send_timeout_seconds: float = 10.0
+
 def load_config(path: Path = __CONFIG_PATH) -> Settings:
     with path.open(mode="r", encoding="utf-8") as stream:
         data = yaml.safe_load(stream)
     return Settings(
         filter=BubblesFilter(**data.get(__CONFIG_KEY_BUBBLE_FILTER, {})),
         exchanges=[Exchange(**s) for s in data.get(__CONFIG_KEY_EXCHANGES, [])],
+        sink=Sink(**data.get(__CONFIG_KEY_SINK, {})),
+        writer=Writer(**data.get(__CONFIG_KEY_WRITER, {})),
+        journal=Journal(**data.get(__CONFIG_KEY_JOURNAL, {})),
+        board=Board(**data.get(__CONFIG_KEY_BOARD, {})),
+        detector=Detector(**data.get(__CONFIG_KEY_DETECTOR, {})),
+        conflation=Conflation(**data.get(__CONFIG_KEY_CONFLATION, {})),
+        coingecko=CoinGecko(**data.get(__CONFIG_KEY_COINGECKO, {})),
+        discovery=Discovery(**data.get(__CONFIG_KEY_DISCOVERY, {})),
+        capture=Capture(**data.get(__CONFIG_KEY_CAPTURE, {})),
+        metrics=Metrics(**data.get(__CONFIG_KEY_METRICS, {})),
+        latency=Latency(**data.get(__CONFIG_KEY_LATENCY, {})),
+        watchdog=Watchdog(**data.get(__CONFIG_KEY_WATCHDOG, {})),
+        profiler=Profiler(**data.get(__CONFIG_KEY_PROFILER, {})),
+        execution=Execution(**data.get(__CONFIG_KEY_EXECUTION, {})),
+        feed=Feed(**data.get(__CONFIG_KEY_FEED, {})),
+        hub=Hub(**data.get(__CONFIG_KEY_HUB, {})),
     )
\ No newline at end of file
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from typing import Dict, List, Tuple, Iterable
 from pathlib import Path
 
 from sqlalchemy import (
@@ -10,9 +11,13 @@ from sqlalchemy import (
     ForeignKey,
     UniqueConstraint,
     text,
+    event,
     create_engine,
     select,
+    delete,
 )
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import StaticPool
 from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import Session, relationship, declarative_base
 from sqlalchemy.dialects.sqlite import insert as sqlite_insert
@@ -26,6 +31,8 @@ _TABLE_NAME_PRICE_RECORD = "price_records"
 
 Base = declarative_base()
 
+PriceRow = Tuple[str, str, float, int]
+
 class Coin(Base):
     __tablename__ = _TABLE_NAME_COIN
     id = Column(Integer, primary_key=True, autoincrement=True)
@@ -51,12 +58,47 @@ class PriceRecord(Base):
         UniqueConstraint("coin_id", "exchange_id", name="uix_coin_exchange"),
     )
 
+def _create_engine(url: str):
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "sqlite":
+        return create_engine(url, echo=False)
+
+    if parsed.database in (None, "", ":memory:"):
+        engine = create_engine(
+            url,
+            echo=False,
+            poolclass=StaticPool,
+            connect_args={"check_same_thread": False},
+        )
+    else:
+        engine = create_engine(url, echo=False, connect_args={"check_same_thread": False})
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, _):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+
+    return engine
+
+_PRICE_UPSERT = sqlite_insert(PriceRecord)
+_PRICE_UPSERT = _PRICE_UPSERT.on_conflict_do_update(
+    index_elements=["coin_id", "exchange_id"],
+    set_={
+        "price": _PRICE_UPSERT.excluded.price,
+        "timestamp": _PRICE_UPSERT.excluded.timestamp,
+    },
+)
+
 class Database:
     def __init__(self, url: str | None = None) -> None:
         if url is None:
             url = f"sqlite:///{_DB_PATH}"
-        self.engine = create_engine(url, echo=False)
+        self.engine = _create_engine(url)
         Base.metadata.create_all(self.engine)
+        self.coin_ids: Dict[str, int] = {}
+        self.exchange_ids: Dict[str, int] = {}
 
     def close(self) -> None:
         self.engine.dispose()
@@ -72,6 +114,33 @@ class Database:
                     except OperationalError as e:
                         if "no such table: sqlite_sequence" not in str(e):
                             raise
+        self.coin_ids.clear()
+        self.exchange_ids.clear()
+
+    def register(self, coins: Iterable[str] = (), exchanges: Iterable[str] = ()) -> None:
+        with Session(self.engine) as session:
+            self.coin_ids.update(self.__upsert_names(session=session, model=Coin, names=coins))
+            self.exchange_ids.update(self.__upsert_names(session=session, model=Exchange, names=exchanges))
+            session.commit()
+
+    def load_registry(self) -> None:
+        with Session(self.engine) as session:
+            self.coin_ids = dict(session.execute(select(Coin.name, Coin.id)).all())
+            self.exchange_ids = dict(session.execute(select(Exchange.name, Exchange.id)).all())
+
+    def retain_prices(self, pairs: Iterable[Tuple[str, str]]) -> None:
+        # Keeps the (coin, exchange) pairs still streamed, a coin can stay while leaving one exchange.
+        kept = set(pairs)
+        with Session(self.engine) as session:
+            rows = session.execute(
+                select(PriceRecord.id, Coin.name, Exchange.name)
+                .join(Coin, PriceRecord.coin_id == Coin.id)
+                .join(Exchange, PriceRecord.exchange_id == Exchange.id)
+            )
+            stale = [record_id for (record_id, coin, exchange) in rows if (coin, exchange) not in kept]
+            if stale:
+                session.execute(delete(PriceRecord).where(PriceRecord.id.in_(stale)))
+            session.commit()
 
     def add_coin(self, name: str | None = None) -> Coin:
         with Session(self.engine) as session:
@@ -81,6 +150,7 @@ class Database:
                 session.add(coin)
                 session.commit()
                 session.refresh(coin)
+            self.coin_ids[coin.name] = coin.id
             return coin
 
     def add_exchange(self, name: str | None = None) -> Exchange:
@@ -91,6 +161,7 @@ class Database:
                 session.add(exchange)
                 session.commit()
                 session.refresh(exchange)
+            self.exchange_ids[exchange.name] = exchange.id
             return exchange
 
     def insert_price(
@@ -102,28 +173,39 @@ class Database:
     ) -> None:
         if timestamp is None:
             timestamp = time_millis()
+        self.insert_prices([(coin_name, exch_name, exch_price, timestamp)])
 
-        with Session(self.engine) as session:
-            coin = session.scalar(select(Coin).where(Coin.name == coin_name))
-            if coin is None:
-                coin = self.add_coin(coin_name)
+    def insert_prices(self, rows: List[PriceRow]) -> None:
+        if not rows:
+            return
 
-            exchange = session.scalar(select(Exchange).where(Exchange.name == exch_name))
-            if exchange is None:
-                exchange = self.add_exchange(exch_name)
+        missing_coins = {r[0] for r in rows if r[0] not in self.coin_ids}
+        missing_exchanges = {r[1] for r in rows if r[1] not in self.exchange_ids}
+        if missing_coins or missing_exchanges:
+            self.register(coins=missing_coins, exchanges=missing_exchanges)
 
-            statement = sqlite_insert(PriceRecord).values(
-                coin_id=coin.id,
-                exchange_id=exchange.id,
-                price=exch_price,
-                timestamp=timestamp,
-            )
-            statement = statement.on_conflict_do_update(
-                index_elements=["coin_id", "exchange_id"],
-                set_={
-                    "price": statement.excluded.price,
-                    "timestamp": statement.excluded.timestamp,
-                },
+        (coin_ids, exchange_ids) = (self.coin_ids, self.exchange_ids)
+        with Session(self.engine) as session:
+            session.execute(
+                _PRICE_UPSERT,
+                [
+                    {
+                        "coin_id": coin_ids[coin_name],
+                        "exchange_id": exchange_ids[exch_name],
+                        "price": exch_price,
+                        "timestamp": timestamp,
+                    } for (coin_name, exch_name, exch_price, timestamp) in rows
+                ],
             )
-            session.execute(statement)
-            session.commit()
\ No newline at end of file
+            session.commit()
+
+    @staticmethod
+    def __upsert_names(session: Session, model: type[Coin | Exchange], names: Iterable[str]) -> Dict[str, int]:
+        names = list(set(names))
+        if not names:
+            return {}
+        session.execute(
+            sqlite_insert(model).on_conflict_do_nothing(index_elements=["name"]),
+            [{"name": name} for name in names],
+        )
+        return dict(session.execute(select(model.name, model.id).where(model.name.in_(names))).all())
\ No newline at end of file
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+from typing import Dict, List, Tuple, Callable, Optional
+from dataclasses import dataclass
+
+EVENT_OPEN = "open"
+EVENT_CLOSE = "close"
+
+@dataclass
+class SpreadEvent:
+    kind: str
+    coin: str
+    buy_exchange: str
+    sell_exchange: str
+    buy_price: float
+    sell_price: float
+    spread_pct: float
+    timestamp: int
+
+class _CoinState:
+    __slots__ = ("prices", "stamps", "low", "high", "is_open")
+
+    def __init__(self):
+        self.prices: Dict[str, float] = {}
+        self.stamps: Dict[str, int] = {}
+        self.low: Optional[str] = None
+        self.high: Optional[str] = None
+        self.is_open = False
+
+class SpreadDetector:
+    def __init__(
+        self,
+        entry_spread_pct: float,
+        exit_spread_pct: float,
+        on_event: Optional[Callable[[SpreadEvent], None]] = None,
+        max_age_ms: int = 10_000,
+    ):
+        if exit_spread_pct > entry_spread_pct:
+            raise ValueError("Exit spread must not exceed entry spread")
+        self.entry_spread_pct = entry_spread_pct
+        self.exit_spread_pct = exit_spread_pct
+        self.max_age_ms = max_age_ms
+        self.on_event = on_event
+        self._states: Dict[str, _CoinState] = {}
+
+    def is_open(self, coin: str) -> bool:
+        state = self._states.get(coin)
+        return state is not None and state.is_open
+
+    def forget(self, coin: str) -> None:
+        self._states.pop(coin, None)
+
+    def reset(self) -> None:
+        self._states.clear()
+
+    def update(self, coin: str, exchange: str, price: float, timestamp: int) -> Optional[SpreadEvent]:
+        if price <= 0:
+            return None
+
+        state = self._states.get(coin)
+        if state is None:
+            state = self._states[coin] = _CoinState()
+
+        (prices, stamps) = (state.prices, state.stamps)
+        previous = prices.get(exchange)
+        prices[exchange] = price
+        stamps[exchange] = timestamp
+        (low, high) = (state.low, state.high)
+
+        if low is None:
+            state.low = state.high = exchange
+            return None
+
+        cutoff = timestamp - self.max_age_ms
+        if stamps[low] < cutoff or stamps[high] < cutoff:
+            # A leg stopped quoting, its last price must not hold a spread open.
+            _pick_extremes(state, cutoff)
+            return self.__evaluate(coin, state, (low, high), timestamp)
+
+        # Only a worsening extreme needs a look at the coin's other venues. Filtering out stale ones
+        # first doubles the cost, and an extreme that turns out fresh is the fresh extreme anyway.
+        (buy, sell) = (low, high)
+        if price < prices[low]:
+            buy = exchange
+        elif exchange == low and previous is not None and price > previous:
+            buy = min(prices, key=prices.__getitem__)
+            if stamps[buy] < cutoff:
+                buy = min(_fresh(state, cutoff), key=prices.__getitem__)
+        if price > prices[high]:
+            sell = exchange
+        elif exchange == high and previous is not None and price < previous:
+            sell = max(prices, key=prices.__getitem__)
+            if stamps[sell] < cutoff:
+                sell = max(_fresh(state, cutoff), key=prices.__getitem__)
+        (state.low, state.high) = (buy, sell)
+
+        # The common case stays inline, only ticks that change the state pay for the call.
+        if buy == sell:
+            return self.__evaluate(coin, state, (low, high), timestamp)
+        buy_price = prices[buy]
+        spread_pct = (prices[sell] - buy_price) / buy_price * 100.0
+        if state.is_open:
+            if spread_pct < self.exit_spread_pct:
+                return self.__evaluate(coin, state, (low, high), timestamp)
+        elif spread_pct >= self.entry_spread_pct:
+            return self.__evaluate(coin, state, (low, high), timestamp)
+        return None
+
+    def expire(self, now_ms: int) -> List[SpreadEvent]:
+        # Closes open spreads whose legs went quiet with no other tick for the coin to notice it.
+        cutoff = now_ms - self.max_age_ms
+        events = []
+        for (coin, state) in self._states.items():
+            (low, high) = (state.low, state.high)
+            if state.is_open and (state.stamps[low] < cutoff or state.stamps[high] < cutoff):
+                _pick_extremes(state, cutoff)
+                event = self.__evaluate(coin, state, (low, high), now_ms)
+                if event is not None:
+                    events.append(event)
+        return events
+
+    def __evaluate(self, coin: str, state: _CoinState, legs: Tuple[str, str], timestamp: int) -> Optional[SpreadEvent]:
+        (buy, sell) = (state.low, state.high)
+        kind: Optional[str] = None
+        if buy == sell:
+            # Fewer than two fresh venues, an open spread closes on the legs it was last seen with.
+            if not state.is_open:
+                return None
+            (buy, sell) = legs
+            kind = EVENT_CLOSE
+        prices = state.prices
+        buy_price = prices[buy]
+        sell_price = prices[sell]
+        spread_pct = (sell_price - buy_price) / buy_price * 100.0
+
+        if kind is None:
+            if not state.is_open and spread_pct >= self.entry_spread_pct:
+                kind = EVENT_OPEN
+            elif state.is_open and spread_pct < self.exit_spread_pct:
+                kind = EVENT_CLOSE
+            else:
+                return None
+        state.is_open = kind == EVENT_OPEN
+
+        event = SpreadEvent(
+            kind=kind,
+            coin=coin,
+            buy_exchange=buy,
+            sell_exchange=sell,
+            buy_price=buy_price,
+            sell_price=sell_price,
+            spread_pct=spread_pct,
+            timestamp=timestamp,
+        )
+        if self.on_event is not None:
+            self.on_event(event)
+        return event
+
+def _fresh(state: _CoinState, cutoff: int) -> List[str]:
+    stamps = state.stamps
+    return [e for e in state.prices if stamps[e] >= cutoff]
+
+def _pick_extremes(state: _CoinState, cutoff: int) -> None:
+    fresh = _fresh(state, cutoff)
+    if not fresh:
+        state.high = state.low
+        return
+    prices = state.prices
+    state.low = min(fresh, key=prices.__getitem__)
+    state.high = max(fresh, key=prices.__getitem__)
@@ -2,15 +2,50 @@ from __future__ import annotations
 
 import ssl
 import json
+import time
 import asyncio
 import certifi
 import websockets
 
 from abc import ABC, abstractmethod
-from typing import Any, List, Dict, Optional
+from typing import Any, List, Dict, Callable, Optional
 from websockets import Origin
 
 from src.basics import StreamCallbacks
+from src.metrics import Registry
+from src.exchanges.conflation import Conflator
+from src.exchanges.planner import ShardPlanner
+from src.exchanges.capture import FrameRecorder
+from src.latency import VenueLatency
+
+DROP_UNPARSED = "unparsed"
+DROP_UNSUBSCRIBED = "unsubscribed"
+DROP_CONFLATED = "conflated"
+
+_DROP_REASONS = (DROP_UNPARSED, DROP_UNSUBSCRIBED, DROP_CONFLATED)
+
+class StreamerMetrics:
+    def __init__(self, registry: Registry, exchange: str, shard: str):
+        labels = (exchange, shard)
+        self.frames = registry.counter(
+            "frames_received_total", "Websocket frames received", ("exchange", "shard"),
+        ).labels(*labels)
+        self.ticks = registry.counter(
+            "ticks_total", "Ticks forwarded to callbacks", ("exchange", "shard"),
+        ).labels(*labels)
+        dropped = registry.counter("frames_dropped_total", "Frames without a forwarded tick", ("exchange", "shard", "reason"))
+        (self.unparsed, self.unsubscribed, self.conflated) = (dropped.labels(*labels, r) for r in _DROP_REASONS)
+        self.reconnects = registry.counter(
+            "reconnects_total", "Websocket reconnects", ("exchange", "shard"),
+        ).labels(*labels)
+        self._errors = registry.counter("stream_errors_total", "Errors that dropped a connection", ("exchange", "shard", "error"))
+        self.parse_seconds = registry.histogram(
+            "parse_seconds", "Time to parse one frame", ("exchange", "shard"),
+        ).labels(*labels)
+        self._labels = labels
+
+    def error(self, e: BaseException) -> None:
+        self._errors.labels(*self._labels, type(e).__name__).inc()
 
 class BaseStreamer(ABC):
     def __init__(
@@ -19,12 +54,26 @@ class BaseStreamer(ABC):
         coins: List[str],
         callbacks: StreamCallbacks,
         origin_header: Optional[Origin] = None,
+        conflator: Optional[Conflator] = None,
+        planner: Optional[ShardPlanner] = None,
+        recorder: Optional[FrameRecorder] = None,
+        metrics: Optional[StreamerMetrics] = None,
+        latency: Optional[VenueLatency] = None,
     ):
         self.url = url
-        self.coins = coins
-        self.callbacks = callbacks
+        self.coins = list(coins)
+        self.callbacks = dict(callbacks)
+        self.conflator = conflator
+        self.planner = planner
+        self.recorder = recorder
+        self.metrics = metrics or StreamerMetrics(registry=Registry(), exchange="", shard="")
+        self.latency = latency
+        self.frames = 0
         self.ssl_context = ssl.create_default_context(cafile=certifi.where())
         self.origin_header = origin_header
+        self.task: Optional[asyncio.Task] = None
+        self._socket: Optional[websockets.WebSocketClientProtocol] = None
+        self._on_coins_changed()
 
     @abstractmethod
     def _get_heartbeat_delay(self) -> Optional[int]:
@@ -35,44 +84,152 @@ class BaseStreamer(ABC):
         ...
 
     @abstractmethod
-    def _get_subscribe_payload(self) -> Dict[str, Any]:
+    def _get_subscribe_payload(self, coins: List[str]) -> Dict[str, Any]:
+        ...
+
+    @abstractmethod
+    def _get_unsubscribe_payload(self, coins: List[str]) -> Dict[str, Any]:
         ...
 
     @abstractmethod
     def _parse_websocket_frame(self, frame: str | bytes) -> Optional[tuple[str, float, int]]:
         ...
 
+    def _on_coins_changed(self) -> None:
+        pass
+
+    def _handle_frame(self, frame: str | bytes, receive_ns: Optional[int] = None) -> None:
+        metrics = self.metrics
+        started = time.perf_counter_ns()
+        result = self._parse_websocket_frame(frame)
+        metrics.parse_seconds.observe((time.perf_counter_ns() - started) / 1e9)
+        if not result:
+            metrics.unparsed.inc()
+            return
+        coin, price, timestamp = result
+        if coin not in self.callbacks:
+            metrics.unsubscribed.inc()
+            return
+        forwarded = self.conflator is None or self.conflator.admit(coin=coin, price=price, timestamp=timestamp)
+        if self.latency is not None and receive_ns is not None:
+            self.latency.observe(
+                coin=coin, exchange_ts=timestamp, receive_ns=receive_ns, parsed_ns=time.time_ns(), forwarded=forwarded,
+            )
+        if forwarded:
+            metrics.ticks.inc()
+            self.callbacks[coin](price, timestamp)
+        else:
+            metrics.conflated.inc()
+
     def run(self) -> asyncio.Task:
-        return asyncio.create_task(coro=self.__run_loop())
+        self.task = asyncio.create_task(coro=self.__run_loop())
+        return self.task
+
+    async def subscribe(self, coins: List[str], callbacks: StreamCallbacks) -> None:
+        coins = [c for c in coins if c not in self.callbacks]
+        if not coins:
+            return
+        self.coins.extend(coins)
+        self.callbacks.update({c: callbacks[c] for c in coins})
+        self._on_coins_changed()
+        if self.recorder is not None:
+            self.recorder.subscribed(coins)
+        await self.__send_live(build=self._get_subscribe_payload, coins=coins)
+
+    async def unsubscribe(self, coins: List[str]) -> None:
+        coins = [c for c in coins if c in self.callbacks]
+        if not coins:
+            return
+        removed = set(coins)
+        self.coins = [c for c in self.coins if c not in removed]
+        for coin in coins:
+            del self.callbacks[coin]
+        self._on_coins_changed()
+        await self.__send_live(build=self._get_unsubscribe_payload, coins=coins)
+
+    async def stop(self) -> None:
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
 
     async def __run_loop(self) -> None:
+        connects = 0
         while True:
+            if connects:
+                self.metrics.reconnects.inc()
+            connects += 1
             try:
                 async with websockets.connect(
                     uri=self.url,
-                    ssl=self.ssl_context,
+                    ssl=self.ssl_context if self.url.startswith("wss://") else None,
                     origin=self.origin_header,
                 ) as socket:
-                    await socket.send(json.dumps(self._get_subscribe_payload()))
+                    self._socket = socket
+                    if self.recorder is not None:
+                        self.recorder.subscribed(self.coins)
+                    await self.__send_batches(socket=socket, build=self._get_subscribe_payload, coins=list(self.coins))
 
                     interval = self._get_heartbeat_delay()
                     heartbeat: Optional[asyncio.Task] = None
                     if interval is not None:
                         heartbeat = asyncio.create_task(self.__heartbeat(interval=interval, websocket=socket))
+                    releasing: Optional[asyncio.Task] = None
+                    if self.conflator is not None and self.conflator.min_interval_ms > 0:
+                        releasing = asyncio.create_task(self.__release_loop(interval_ms=self.conflator.min_interval_ms))
 
                     try:
                         async for frame in socket:
-                            result = self._parse_websocket_frame(frame)
-                            if result:
-                                coin, price, timestamp = result
-                                if coin in self.callbacks:
-                                    self.callbacks[coin](price, timestamp)
+                            receive_ns = time.time_ns()
+                            self.frames += 1
+                            self.metrics.frames.inc()
+                            if self.recorder is not None:
+                                self.recorder.write(frame, receive_ns=receive_ns)
+                            self._handle_frame(frame, receive_ns=receive_ns)
                     finally:
+                        self._socket = None
                         if heartbeat:
                             heartbeat.cancel()
-            except Exception:
+                        if releasing:
+                            releasing.cancel()
+            except Exception as e:
+                self.metrics.error(e)
+                print(f"⚠️ {type(self).__name__} connection to {self.url} failed: {e!r}")
                 await asyncio.sleep(1)
 
+    async def __send_live(self, build: Callable[[List[str]], Dict[str, Any]], coins: List[str]) -> None:
+        # Without a live socket the next connect subscribes to self.coins anyway.
+        if self._socket is None:
+            return
+        try:
+            await self.__send_batches(socket=self._socket, build=build, coins=coins)
+        except websockets.ConnectionClosed:
+            pass
+
+    async def __send_batches(
+        self,
+        socket: websockets.WebSocketClientProtocol,
+        build: Callable[[List[str]], Dict[str, Any]],
+        coins: List[str],
+    ) -> None:
+        if self.planner is None:
+            await socket.send(json.dumps(build(coins)))
+            return
+        for batch in self.planner.batches(coins):
+            await self.planner.throttle()
+            await socket.send(json.dumps(build(batch)))
+
+    async def __release_loop(self, interval_ms: int) -> None:
+        # Moves the conflator held back for min_interval_ms go out even if the coin goes quiet.
+        while True:
+            await asyncio.sleep(interval_ms / 2000)
+            self._release_held()
+
+    def _release_held(self, now_ms: Optional[int] = None) -> None:
+        for (coin, price, timestamp) in self.conflator.release(coins=self.callbacks, now_ms=now_ms):
+            self.metrics.ticks.inc()
+            self.callbacks[coin](price, timestamp)
+
     async def __heartbeat(self, interval: int, websocket: websockets.WebSocketClientProtocol) -> None:
         while True:
             await asyncio.sleep(interval)
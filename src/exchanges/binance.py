@@ -1,18 +1,40 @@
 from __future__ import annotations
 
 import json
-import asyncio
+import itertools
 
 from typing import Any, List, Dict, Optional
 
-from src.basics import StreamCallbacks, time_millis
-from src.exchanges.base import BaseStreamer
+from src.basics import StreamCallbacks, MarketTicker, MarketCallback, time_millis
+from src.exchanges.base import BaseStreamer, StreamerMetrics
+from src.exchanges.conflation import Conflator
+from src.exchanges.planner import ShardPlanner
+from src.exchanges.capture import FrameRecorder
+from src.latency import VenueLatency
 
 ALIAS = "binance"
 
-def run(url: str, coins: List[str], callbacks: StreamCallbacks) -> asyncio.Task:
-    streamer = BinanceStreamer(url=url, coins=coins, callbacks=callbacks)
-    return streamer.run()
+def run(
+    url: str,
+    coins: List[str],
+    callbacks: StreamCallbacks,
+    conflator: Optional[Conflator] = None,
+    planner: Optional[ShardPlanner] = None,
+    recorder: Optional[FrameRecorder] = None,
+    metrics: Optional[StreamerMetrics] = None,
+    latency: Optional[VenueLatency] = None,
+) -> BinanceStreamer:
+    streamer = BinanceStreamer(
+        url=url, coins=coins, callbacks=callbacks, conflator=conflator, planner=planner, recorder=recorder,
+        metrics=metrics, latency=latency,
+    )
+    streamer.run()
+    return streamer
+
+def run_market(url: str, on_tickers: MarketCallback) -> BinanceMarketStreamer:
+    streamer = BinanceMarketStreamer(url=url, on_tickers=on_tickers)
+    streamer.run()
+    return streamer
 
 class BinanceStreamer(BaseStreamer):
     __TICKER_24_H = "24hrTicker"
@@ -22,19 +44,19 @@ class BinanceStreamer(BaseStreamer):
     __KEY_COIN_PRICE = "c"
     __KEY_COIN_TIMESTAMP = "E"
 
+    __request_ids = itertools.count(1)
+
     def _get_heartbeat_delay(self) -> Optional[int]:
         return None
 
     def _get_heartbeat_message(self) -> Any:
         return None
 
-    def _get_subscribe_payload(self) -> Dict[str, Any]:
-        params = [f"{coin.lower()}usdt@ticker" for coin in self.coins]
-        return {
-            "id": 1,
-            "method": "SUBSCRIBE",
-            "params": params,
-        }
+    def _get_subscribe_payload(self, coins: List[str]) -> Dict[str, Any]:
+        return self.__get_payload(method="SUBSCRIBE", coins=coins)
+
+    def _get_unsubscribe_payload(self, coins: List[str]) -> Dict[str, Any]:
+        return self.__get_payload(method="UNSUBSCRIBE", coins=coins)
 
     def _parse_websocket_frame(self, frame: str | bytes) -> Optional[tuple[str, float, int]]:
         try:
@@ -49,4 +71,74 @@ class BinanceStreamer(BaseStreamer):
         coin = sym[:-4].lower() if sym.endswith("USDT") else sym.lower()
         price = float(data.get(self.__KEY_COIN_PRICE, 0))
         timestamp = int(data.get(self.__KEY_COIN_TIMESTAMP, time_millis()))
-        return coin, price, timestamp
\ No newline at end of file
+        return coin, price, timestamp
+
+    def __get_payload(self, method: str, coins: List[str]) -> Dict[str, Any]:
+        params = [f"{coin.lower()}usdt@ticker" for coin in coins]
+        return {
+            "id": next(self.__request_ids),
+            "method": method,
+            "params": params,
+        }
+
+class BinanceMarketStreamer(BaseStreamer):
+    __STREAM = "!miniTicker@arr"
+    __TICKER_MINI = "24hrMiniTicker"
+    __QUOTE = "USDT"
+
+    __KEY_TICKER = "e"
+    __KEY_SYMBOL = "s"
+    __KEY_CLOSE = "c"
+    __KEY_OPEN = "o"
+    __KEY_TIMESTAMP = "E"
+
+    __request_ids = itertools.count(1)
+
+    def __init__(self, url: str, on_tickers: MarketCallback):
+        super().__init__(url=url, coins=[], callbacks={})
+        self.on_tickers = on_tickers
+
+    def _get_heartbeat_delay(self) -> Optional[int]:
+        return None
+
+    def _get_heartbeat_message(self) -> Any:
+        return None
+
+    def _get_subscribe_payload(self, coins: List[str]) -> Dict[str, Any]:
+        return {"id": next(self.__request_ids), "method": "SUBSCRIBE", "params": [self.__STREAM]}
+
+    def _get_unsubscribe_payload(self, coins: List[str]) -> Dict[str, Any]:
+        return {"id": next(self.__request_ids), "method": "UNSUBSCRIBE", "params": [self.__STREAM]}
+
+    def _parse_websocket_frame(self, frame: str | bytes) -> Optional[tuple[str, float, int]]:
+        return None
+
+    def _handle_frame(self, frame: str | bytes, receive_ns: Optional[int] = None) -> None:
+        tickers = self._parse_tickers(frame)
+        if tickers:
+            self.on_tickers(tickers)
+
+    def _parse_tickers(self, frame: str | bytes) -> List[MarketTicker]:
+        try:
+            data = json.loads(frame)
+        except json.JSONDecodeError:
+            return []
+        if not isinstance(data, list):
+            return []
+
+        tickers = []
+        for item in data:
+            if item.get(self.__KEY_TICKER) != self.__TICKER_MINI:
+                continue
+            sym = item.get(self.__KEY_SYMBOL, "")
+            if not sym.endswith(self.__QUOTE):
+                continue
+            try:
+                price = float(item[self.__KEY_CLOSE])
+                open_price = float(item[self.__KEY_OPEN])
+            except (KeyError, ValueError):
+                continue
+            change = (price / open_price - 1.0) * 100.0 if open_price > 0 else 0.0
+            timestamp = int(item.get(self.__KEY_TIMESTAMP, time_millis()))
+            tickers.append((sym[:-4].lower(), price, change, timestamp))
+        return tickers
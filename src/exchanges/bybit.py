@@ -1,18 +1,34 @@
 from __future__ import annotations
 
 import json
-import asyncio
 
 from typing import Any, List, Dict, Optional
 
 from src.basics import StreamCallbacks, time_millis
-from src.exchanges.base import BaseStreamer
+from src.exchanges.base import BaseStreamer, StreamerMetrics
+from src.exchanges.conflation import Conflator
+from src.exchanges.planner import ShardPlanner
+from src.exchanges.capture import FrameRecorder
+from src.latency import VenueLatency
 
 ALIAS = "bybit"
 
-def run(url: str, coins: List[str], callbacks: StreamCallbacks) -> asyncio.Task:
-    streamer = BybitStreamer(url=url, coins=coins, callbacks=callbacks)
-    return streamer.run()
+def run(
+    url: str,
+    coins: List[str],
+    callbacks: StreamCallbacks,
+    conflator: Optional[Conflator] = None,
+    planner: Optional[ShardPlanner] = None,
+    recorder: Optional[FrameRecorder] = None,
+    metrics: Optional[StreamerMetrics] = None,
+    latency: Optional[VenueLatency] = None,
+) -> BybitStreamer:
+    streamer = BybitStreamer(
+        url=url, coins=coins, callbacks=callbacks, conflator=conflator, planner=planner, recorder=recorder,
+        metrics=metrics, latency=latency,
+    )
+    streamer.run()
+    return streamer
 
 class BybitStreamer(BaseStreamer):
     __KEY_DATA = "data"
@@ -24,15 +40,27 @@ class BybitStreamer(BaseStreamer):
             self,
             url: str,
             coins: List[str],
-            callbacks: StreamCallbacks
+            callbacks: StreamCallbacks,
+            conflator: Optional[Conflator] = None,
+            planner: Optional[ShardPlanner] = None,
+            recorder: Optional[FrameRecorder] = None,
+            metrics: Optional[StreamerMetrics] = None,
+            latency: Optional[VenueLatency] = None,
     ):
         super().__init__(
             url=url,
             coins=coins,
             callbacks=callbacks,
+            conflator=conflator,
+            planner=planner,
+            recorder=recorder,
+            metrics=metrics,
+            latency=latency,
             origin_header=None,
         )
-        self._tickers = [f"tickers.{coin.upper()}USDT" for coin in self.coins]
+
+    def _on_coins_changed(self) -> None:
+        self._tickers = {self.__ticker(coin) for coin in self.coins}
 
     def _get_heartbeat_delay(self) -> Optional[int]:
         return None
@@ -40,10 +68,16 @@ class BybitStreamer(BaseStreamer):
     def _get_heartbeat_message(self) -> Any:
         return None
 
-    def _get_subscribe_payload(self) -> Dict[str, Any]:
+    def _get_subscribe_payload(self, coins: List[str]) -> Dict[str, Any]:
         return {
             "op": "subscribe",
-            "args": self._tickers,
+            "args": [self.__ticker(coin) for coin in coins],
+        }
+
+    def _get_unsubscribe_payload(self, coins: List[str]) -> Dict[str, Any]:
+        return {
+            "op": "unsubscribe",
+            "args": [self.__ticker(coin) for coin in coins],
         }
 
     def _parse_websocket_frame(self, frame: str | bytes) -> Optional[tuple[str, float, int]]:
@@ -59,4 +93,8 @@ class BybitStreamer(BaseStreamer):
             price = float(data.get(self.__KEY_COIN_PRICE, 0))
             timestamp = int(raw.get(self.__KEY_COIN_TIMESTAMP, time_millis()))
             return coin, price, timestamp
-        return None
\ No newline at end of file
+        return None
+
+    @staticmethod
+    def __ticker(coin: str) -> str:
+        return f"tickers.{coin.upper()}USDT"
\ No newline at end of file
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import gzip
+import json
+import time
+import struct
+
+from typing import Set, List, Tuple, Iterator, Iterable, Optional
+from pathlib import Path
+
+_MAGIC = b"RFTC"
+_VERSION = 1
+_SUFFIX = ".frames.gz"
+
+_KIND_TEXT = 0
+_KIND_BINARY = 1
+_KIND_COINS = 2
+
+# magic, version
+_HEADER = struct.Struct("<4sH")
+# receive time in ns, kind, payload length
+_RECORD = struct.Struct("<qBI")
+
+class FrameRecorder:
+    def __init__(self, path: Path, compresslevel: int = 1):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.frames = 0
+        self._file: Optional[gzip.GzipFile] = gzip.open(self.path, mode="wb", compresslevel=compresslevel)
+        self._file.write(_HEADER.pack(_MAGIC, _VERSION))
+
+    @staticmethod
+    def in_directory(directory: Path, name: str) -> FrameRecorder:
+        return FrameRecorder(path=Path(directory) / f"{name}-{time.time_ns() // 1_000_000:016d}{_SUFFIX}")
+
+    def write(self, frame: str | bytes, receive_ns: Optional[int] = None) -> None:
+        if isinstance(frame, str):
+            self.__append(kind=_KIND_TEXT, payload=frame.encode("utf-8"), receive_ns=receive_ns)
+        else:
+            self.__append(kind=_KIND_BINARY, payload=bytes(frame), receive_ns=receive_ns)
+        self.frames += 1
+
+    def subscribed(self, coins: Iterable[str]) -> None:
+        # Venues filter frames by the subscribed symbols, so replay needs them too.
+        self.__append(kind=_KIND_COINS, payload=json.dumps(list(coins)).encode("utf-8"))
+
+    def close(self) -> None:
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
+
+    def __append(self, kind: int, payload: bytes, receive_ns: Optional[int] = None) -> None:
+        if self._file is None:
+            return
+        if receive_ns is None:
+            receive_ns = time.time_ns()
+        self._file.write(_RECORD.pack(receive_ns, kind, len(payload)))
+        self._file.write(payload)
+
+def read_frames(path: Path) -> Iterator[Tuple[int, str | bytes]]:
+    for (receive_ns, kind, payload) in _read_records(path):
+        if kind == _KIND_TEXT:
+            yield receive_ns, payload.decode("utf-8")
+        elif kind == _KIND_BINARY:
+            yield receive_ns, payload
+
+def read_coins(path: Path) -> List[str]:
+    coins: Set[str] = set()
+    for (_, kind, payload) in _read_records(path):
+        if kind == _KIND_COINS:
+            coins.update(json.loads(payload))
+    return sorted(coins)
+
+def _read_records(path: Path) -> Iterator[Tuple[int, int, bytes]]:
+    with gzip.open(Path(path), mode="rb") as stream:
+        header = stream.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            return
+        (magic, version) = _HEADER.unpack(header)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"Not a frame capture: {path}")
+
+        while True:
+            try:
+                head = stream.read(_RECORD.size)
+                if len(head) < _RECORD.size:
+                    return
+                (receive_ns, kind, length) = _RECORD.unpack(head)
+                payload = stream.read(length)
+            except EOFError:
+                # Capture cut short by a crash, keep what was flushed.
+                return
+            if len(payload) < length:
+                return
+            yield receive_ns, kind, payload
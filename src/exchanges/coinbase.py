@@ -1,20 +1,36 @@
 from __future__ import annotations
 
 import json
-import asyncio
 
-from typing import Any, List, Dict, Optional
+from typing import Any, Set, List, Dict, Optional
 from datetime import datetime
 from websockets import Origin
 
 from src.basics import StreamCallbacks, time_millis
-from src.exchanges.base import BaseStreamer
+from src.exchanges.base import BaseStreamer, StreamerMetrics
+from src.exchanges.conflation import Conflator
+from src.exchanges.planner import ShardPlanner
+from src.exchanges.capture import FrameRecorder
+from src.latency import VenueLatency
 
 ALIAS = "coinbase"
 
-def run(url: str, coins: List[str], callbacks: StreamCallbacks) -> asyncio.Task:
-    streamer = CoinbaseStreamer(url=url, coins=coins, callbacks=callbacks)
-    return streamer.run()
+def run(
+    url: str,
+    coins: List[str],
+    callbacks: StreamCallbacks,
+    conflator: Optional[Conflator] = None,
+    planner: Optional[ShardPlanner] = None,
+    recorder: Optional[FrameRecorder] = None,
+    metrics: Optional[StreamerMetrics] = None,
+    latency: Optional[VenueLatency] = None,
+) -> CoinbaseStreamer:
+    streamer = CoinbaseStreamer(
+        url=url, coins=coins, callbacks=callbacks, conflator=conflator, planner=planner, recorder=recorder,
+        metrics=metrics, latency=latency,
+    )
+    streamer.run()
+    return streamer
 
 class CoinbaseStreamer(BaseStreamer):
     __ORIGIN = "https://api.coinbase.com/"
@@ -31,14 +47,26 @@ class CoinbaseStreamer(BaseStreamer):
         url: str,
         coins: List[str],
         callbacks: StreamCallbacks,
+        conflator: Optional[Conflator] = None,
+        planner: Optional[ShardPlanner] = None,
+        recorder: Optional[FrameRecorder] = None,
+        metrics: Optional[StreamerMetrics] = None,
+        latency: Optional[VenueLatency] = None,
     ):
         super().__init__(
             url=url,
             coins=coins,
             callbacks=callbacks,
+            conflator=conflator,
+            planner=planner,
+            recorder=recorder,
+            metrics=metrics,
+            latency=latency,
             origin_header=Origin(self.__ORIGIN),
         )
-        self._tickers: List[str] = [f"{coin.upper()}-USD" for coin in self.coins]
+
+    def _on_coins_changed(self) -> None:
+        self._tickers: Set[str] = {self.__ticker(coin) for coin in self.coins}
 
     def _get_heartbeat_delay(self) -> Optional[int]:
         return None
@@ -46,10 +74,16 @@ class CoinbaseStreamer(BaseStreamer):
     def _get_heartbeat_message(self) -> Any:
         return None
 
-    def _get_subscribe_payload(self) -> Dict[str, Any]:
+    def _get_subscribe_payload(self, coins: List[str]) -> Dict[str, Any]:
         return {
             "type": "subscribe",
-            "channels": [{"name": self.__TYPE_TICKER, "product_ids": self._tickers}],
+            "channels": [{"name": self.__TYPE_TICKER, "product_ids": [self.__ticker(c) for c in coins]}],
+        }
+
+    def _get_unsubscribe_payload(self, coins: List[str]) -> Dict[str, Any]:
+        return {
+            "type": "unsubscribe",
+            "channels": [{"name": self.__TYPE_TICKER, "product_ids": [self.__ticker(c) for c in coins]}],
         }
 
     def _parse_websocket_frame(self, frame: str | bytes) -> Optional[tuple[str, float, int]]:
@@ -75,3 +109,7 @@ class CoinbaseStreamer(BaseStreamer):
             timestamp = time_millis()
 
         return coin, price, timestamp
+
+    @staticmethod
+    def __ticker(coin: str) -> str:
+        return f"{coin.upper()}-USD"
\ No newline at end of file
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import time
+
+from typing import Dict, List, Tuple, Optional, Container
+
+class Conflator:
+    def __init__(
+        self,
+        deadband: float = 0.0,
+        min_interval_ms: int = 0,
+        max_staleness_ms: int = 5000,
+    ):
+        self.deadband = deadband
+        self.min_interval_ms = min_interval_ms
+        self.max_staleness_ms = max_staleness_ms
+        self.forwarded = 0
+        self.suppressed = 0
+        self._last: Dict[str, Tuple[float, int]] = {}
+        # Moves past the deadband that came too soon: price, exchange timestamp, due time.
+        self._pending: Dict[str, Tuple[float, int, int]] = {}
+
+    def admit(self, coin: str, price: float, now_ms: Optional[int] = None, timestamp: int = 0) -> bool:
+        if now_ms is None:
+            now_ms = int(time.monotonic() * 1000)
+
+        last = self._last.get(coin)
+        if last is not None:
+            (last_price, last_ms) = last
+            elapsed = now_ms - last_ms
+            if elapsed < self.max_staleness_ms:
+                if abs(price - last_price) <= self.deadband * last_price:
+                    # Back within the band of what was sent, a held move is no longer news.
+                    if self._pending:
+                        self.__drop_pending(coin)
+                    self.suppressed += 1
+                    return False
+                if elapsed < self.min_interval_ms:
+                    # A real move is held back, release() sends it once the interval ends. It is counted
+                    # when it is either sent or replaced.
+                    self.__drop_pending(coin)
+                    self._pending[coin] = (price, timestamp, last_ms + self.min_interval_ms)
+                    return False
+
+        if self._pending:
+            self.__drop_pending(coin)
+        self._last[coin] = (price, now_ms)
+        self.forwarded += 1
+        return True
+
+    def release(self, coins: Container[str], now_ms: Optional[int] = None) -> List[Tuple[str, float, int]]:
+        # Held moves of the given coins whose interval ended, as (coin, price, timestamp) to forward.
+        if not self._pending:
+            return []
+        if now_ms is None:
+            now_ms = int(time.monotonic() * 1000)
+
+        released = []
+        for (coin, (price, timestamp, due_ms)) in list(self._pending.items()):
+            if due_ms <= now_ms and coin in coins:
+                del self._pending[coin]
+                self._last[coin] = (price, now_ms)
+                self.forwarded += 1
+                released.append((coin, price, timestamp))
+        return released
+
+    def forget(self, coin: str) -> None:
+        self._last.pop(coin, None)
+        self.__drop_pending(coin)
+
+    def __drop_pending(self, coin: str) -> None:
+        if self._pending.pop(coin, None) is not None:
+            self.suppressed += 1
@@ -1,19 +1,41 @@
 from __future__ import annotations
 
 import json
-import asyncio
+import itertools
 
 from typing import Any, List, Dict, Optional
 
-from src.basics import StreamCallbacks
-from src.exchanges.base import BaseStreamer
+from src.basics import StreamCallbacks, MarketTicker, MarketCallback, time_millis
+from src.exchanges.base import BaseStreamer, StreamerMetrics
+from src.exchanges.conflation import Conflator
+from src.exchanges.planner import ShardPlanner
+from src.exchanges.capture import FrameRecorder
+from src.latency import VenueLatency
 from src.exchanges.mexc.proto.PushDataV3ApiWrapper_pb2 import PushDataV3ApiWrapper
 
 ALIAS = "mexc"
 
-def run(url: str, coins: List[str], callbacks: StreamCallbacks) -> asyncio.Task:
-    streamer = MexcStreamer(url=url, coins=coins, callbacks=callbacks)
-    return streamer.run()
+def run(
+    url: str,
+    coins: List[str],
+    callbacks: StreamCallbacks,
+    conflator: Optional[Conflator] = None,
+    planner: Optional[ShardPlanner] = None,
+    recorder: Optional[FrameRecorder] = None,
+    metrics: Optional[StreamerMetrics] = None,
+    latency: Optional[VenueLatency] = None,
+) -> MexcStreamer:
+    streamer = MexcStreamer(
+        url=url, coins=coins, callbacks=callbacks, conflator=conflator, planner=planner, recorder=recorder,
+        metrics=metrics, latency=latency,
+    )
+    streamer.run()
+    return streamer
+
+def run_market(url: str, on_tickers: MarketCallback) -> MexcMarketStreamer:
+    streamer = MexcMarketStreamer(url=url, on_tickers=on_tickers)
+    streamer.run()
+    return streamer
 
 class MexcStreamer(BaseStreamer):
     __CHANNEL = "spot@public.aggre.deals.v3.api.pb@"
@@ -26,22 +48,30 @@ class MexcStreamer(BaseStreamer):
     __KEY_CODE = "code"
     __KEY_MESSAGE = "msg"
 
+    __request_ids = itertools.count(1)
+
     def __init__(
         self,
         url: str,
         coins: List[str],
         callbacks: StreamCallbacks,
+        conflator: Optional[Conflator] = None,
+        planner: Optional[ShardPlanner] = None,
+        recorder: Optional[FrameRecorder] = None,
+        metrics: Optional[StreamerMetrics] = None,
+        latency: Optional[VenueLatency] = None,
     ):
         super().__init__(
             url=url,
             coins=coins,
             callbacks=callbacks,
+            conflator=conflator,
+            planner=planner,
+            recorder=recorder,
+            metrics=metrics,
+            latency=latency,
             origin_header=None,
         )
-        self._tickers: List[str] = [
-            f"{self.__CHANNEL}{self.__FRAME_INTERVAL}@{coin.upper()}USDT"
-            for coin in self.coins
-        ]
 
     def _get_heartbeat_delay(self) -> Optional[int]:
         return self.__HEARTBEAT_INTERVAL
@@ -49,8 +79,11 @@ class MexcStreamer(BaseStreamer):
     def _get_heartbeat_message(self) -> Any:
         return {"method": "PING"}
 
-    def _get_subscribe_payload(self) -> Dict[str, Any]:
-        return {"method": "SUBSCRIPTION", "params": self._tickers, "id": 1}
+    def _get_subscribe_payload(self, coins: List[str]) -> Dict[str, Any]:
+        return {"method": "SUBSCRIPTION", "params": self.__tickers(coins), "id": next(self.__request_ids)}
+
+    def _get_unsubscribe_payload(self, coins: List[str]) -> Dict[str, Any]:
+        return {"method": "UNSUBSCRIPTION", "params": self.__tickers(coins), "id": next(self.__request_ids)}
 
     def _parse_websocket_frame(self, frame: str | bytes) -> Optional[tuple[str, float, int]]:
         if isinstance(frame, str):
@@ -82,4 +115,65 @@ class MexcStreamer(BaseStreamer):
         return coin, price, timestamp
 
     def __is_pong_frame(self, data: Any) -> bool:
-        return data.get(self.__KEY_CODE) == self.__CODE_OK or data.get(self.__KEY_MESSAGE) == self.__MSG_PONG
\ No newline at end of file
+        return data.get(self.__KEY_CODE) == self.__CODE_OK or data.get(self.__KEY_MESSAGE) == self.__MSG_PONG
+
+    def __tickers(self, coins: List[str]) -> List[str]:
+        return [f"{self.__CHANNEL}{self.__FRAME_INTERVAL}@{coin.upper()}USDT" for coin in coins]
+
+class MexcMarketStreamer(BaseStreamer):
+    __CHANNEL = "spot@public.miniTickers.v3.api.pb@"
+    # The rolling window, like Binance's !miniTicker@arr. A UTC+8 channel reports change since that day's open.
+    __TIMEZONE = "24H"
+    __HEARTBEAT_INTERVAL = 25
+    __QUOTE = "USDT"
+
+    __request_ids = itertools.count(1)
+
+    def __init__(self, url: str, on_tickers: MarketCallback):
+        super().__init__(url=url, coins=[], callbacks={}, origin_header=None)
+        self.on_tickers = on_tickers
+
+    def _get_heartbeat_delay(self) -> Optional[int]:
+        return self.__HEARTBEAT_INTERVAL
+
+    def _get_heartbeat_message(self) -> Any:
+        return {"method": "PING"}
+
+    def _get_subscribe_payload(self, coins: List[str]) -> Dict[str, Any]:
+        return {"method": "SUBSCRIPTION", "params": [self.__CHANNEL + self.__TIMEZONE], "id": next(self.__request_ids)}
+
+    def _get_unsubscribe_payload(self, coins: List[str]) -> Dict[str, Any]:
+        return {"method": "UNSUBSCRIPTION", "params": [self.__CHANNEL + self.__TIMEZONE], "id": next(self.__request_ids)}
+
+    def _parse_websocket_frame(self, frame: str | bytes) -> Optional[tuple[str, float, int]]:
+        return None
+
+    def _handle_frame(self, frame: str | bytes, receive_ns: Optional[int] = None) -> None:
+        tickers = self._parse_tickers(frame)
+        if tickers:
+            self.on_tickers(tickers)
+
+    def _parse_tickers(self, frame: str | bytes) -> List[MarketTicker]:
+        if isinstance(frame, str):
+            return []
+
+        wrapper = PushDataV3ApiWrapper()
+        try:
+            wrapper.ParseFromString(frame)
+        except Exception:
+            return []
+        if not wrapper.channel.startswith(self.__CHANNEL):
+            return []
+
+        timestamp = int(wrapper.sendTime or time_millis())
+        tickers = []
+        for item in wrapper.publicMiniTickers.items:
+            if not item.symbol.endswith(self.__QUOTE):
+                continue
+            try:
+                price = float(item.price)
+                change = float(item.rate or 0) * 100.0
+            except ValueError:
+                continue
+            tickers.append((item.symbol[:-4].lower(), price, change, timestamp))
+        return tickers
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import asyncio
+
+from typing import List, Tuple, Optional
+
+from src.basics import chunked
+
+class ShardPlanner:
+    def __init__(
+        self,
+        streams_per_connection: Optional[int] = None,
+        args_per_message: Optional[int] = None,
+        messages_per_second: Optional[float] = None,
+        max_frames_per_second: Optional[float] = None,
+    ):
+        self.streams_per_connection = streams_per_connection
+        self.args_per_message = args_per_message
+        self.messages_per_second = messages_per_second
+        self.max_frames_per_second = max_frames_per_second
+        self._next_slot = 0.0
+
+    def plan(self, symbols: List[str]) -> List[List[str]]:
+        if not symbols:
+            return []
+        return list(chunked(iterable=symbols, size=self.streams_per_connection or len(symbols)))
+
+    def place(self, shards: List[List[str]], symbols: List[str]) -> Tuple[List[List[str]], List[List[str]]]:
+        remaining = list(symbols)
+        assigned: List[List[str]] = []
+        for shard in shards:
+            room = len(remaining) if self.streams_per_connection is None else self.streams_per_connection - len(shard)
+            room = max(0, room)
+            assigned.append(remaining[:room])
+            remaining = remaining[room:]
+        return assigned, self.plan(remaining)
+
+    def batches(self, symbols: List[str]) -> List[List[str]]:
+        if not symbols:
+            return []
+        return list(chunked(iterable=symbols, size=self.args_per_message or len(symbols)))
+
+    def spill(self, shard: List[str], frames_per_second: float) -> List[str]:
+        if self.max_frames_per_second is None or frames_per_second <= self.max_frames_per_second:
+            return []
+        if len(shard) < 2:
+            return []
+        return shard[len(shard) // 2:]
+
+    async def throttle(self) -> None:
+        if not self.messages_per_second:
+            return
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + 1.0 / self.messages_per_second
+        if slot > now:
+            await asyncio.sleep(slot - now)
@@ -0,0 +1,285 @@
+from __future__ import annotations
+
+import json
+import asyncio
+
+from typing import Any, Dict, List, Set, Tuple, Optional
+from aiohttp import web, WSMsgType, WSCloseCode
+
+from src.detector import SpreadEvent
+from src.metrics import Registry
+
+KIND_QUOTE = "quote"
+KIND_SPREAD = "spread"
+KIND_SUBSCRIBED = "subscribed"
+KIND_ERROR = "error"
+
+OP_SUBSCRIBE = "subscribe"
+OP_UNSUBSCRIBE = "unsubscribe"
+OP_THROTTLE = "throttle"
+
+ALL_COINS = "*"
+
+# kind, coin, exchange
+Key = Tuple[str, str, str]
+
+def _encode(payload: Dict[str, Any]) -> str:
+    return json.dumps(payload, separators=(",", ":"))
+
+def _quote(coin: str, exchange: str, price: float, timestamp: int) -> str:
+    return _encode({"type": KIND_QUOTE, "coin": coin, "exchange": exchange, "price": price, "timestamp": timestamp})
+
+class HubClient:
+    # Holds the latest update per key, a slow reader costs memory bounded by max_pending, never ingest time.
+    def __init__(self, socket: web.WebSocketResponse, max_pending: int, interval_ms: int, transport: Any = None):
+        self.socket = socket
+        self.transport = transport
+        self.max_pending = max_pending
+        self.interval_ms = interval_ms
+        self.coins: Set[str] = set()
+        self.everything = False
+        self.pending: Dict[Key, str] = {}
+        # Set exactly while pending holds something.
+        self.ready = asyncio.Event()
+        self.sending_since: Optional[float] = None
+        self.sent = 0
+        self.conflated = 0
+        self.evicted = 0
+
+    def offer(self, key: Key, text: str) -> None:
+        pending = self.pending
+        if not pending:
+            self.ready.set()
+        elif key in pending:
+            self.conflated += 1
+        elif len(pending) >= self.max_pending:
+            del pending[next(iter(pending))]
+            self.evicted += 1
+        pending[key] = text
+
+class QuoteHub:
+    __PATH = "/ws"
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 9465,
+        max_pending: int = 1024,
+        interval_ms: int = 0,
+        send_timeout_seconds: float = 10.0,
+        metrics: Optional[Registry] = None,
+    ):
+        self.host = host
+        self.port = port
+        self.max_pending = max_pending
+        self.interval_ms = interval_ms
+        self.send_timeout_seconds = send_timeout_seconds
+        self.clients: Set[HubClient] = set()
+        self.slow_disconnects = 0
+        self._subscribers: Dict[str, Set[HubClient]] = {}
+        self._everyone: Set[HubClient] = set()
+        self._latest: Dict[Tuple[str, str], Tuple[float, int]] = {}
+        self._spreads = 0
+        self._departed = {"sent": 0, "conflated": 0, "evicted": 0}
+        self._runner: Optional[web.AppRunner] = None
+        self._sweeper: Optional[asyncio.Task] = None
+
+        registry = metrics or Registry()
+        registry.gauge("hub_clients", "Connected fan-out clients").labels().set_function(lambda: len(self.clients))
+        for (name, description) in (
+            ("sent", "Updates sent to fan-out clients"),
+            ("conflated", "Updates replaced by a newer one before a client read them"),
+            ("evicted", "Updates dropped from a full client queue"),
+        ):
+            registry.counter(f"hub_updates_{name}_total", description).labels().set_function(lambda name=name: self.total(name))
+        registry.counter("hub_slow_disconnects_total", "Clients closed for not reading in time").labels().set_function(
+            lambda: self.slow_disconnects,
+        )
+
+    async def start(self) -> int:
+        app = web.Application()
+        app.router.add_get(self.__PATH, self.__handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host=self.host, port=self.port)
+        await site.start()
+        # Port 0 picks a free one, report what was bound.
+        self.port = site._server.sockets[0].getsockname()[1]
+        self._sweeper = asyncio.create_task(coro=self.__sweep())
+        return self.port
+
+    async def stop(self) -> None:
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            await asyncio.gather(self._sweeper, return_exceptions=True)
+            self._sweeper = None
+        await asyncio.gather(
+            *(c.socket.close(code=WSCloseCode.GOING_AWAY) for c in list(self.clients)), return_exceptions=True,
+        )
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def total(self, name: str) -> int:
+        return self._departed[name] + sum(getattr(c, name) for c in self.clients)
+
+    def publish_quote(self, coin: str, exchange: str, price: float, timestamp: int) -> None:
+        self._latest[(coin, exchange)] = (price, timestamp)
+        subscribers = self._subscribers.get(coin)
+        if not subscribers and not self._everyone:
+            return
+        self.__fan_out(
+            key=(KIND_QUOTE, coin, exchange), text=_quote(coin, exchange, price, timestamp), subscribers=subscribers,
+        )
+
+    def publish_spread(self, event: SpreadEvent) -> None:
+        subscribers = self._subscribers.get(event.coin)
+        if not subscribers and not self._everyone:
+            return
+        text = _encode({
+            "type": KIND_SPREAD,
+            "event": event.kind,
+            "coin": event.coin,
+            "buy_exchange": event.buy_exchange,
+            "sell_exchange": event.sell_exchange,
+            "buy_price": event.buy_price,
+            "sell_price": event.sell_price,
+            "spread_pct": event.spread_pct,
+            "timestamp": event.timestamp,
+        })
+        # Opens and closes are transitions, a client must see every one in order, so none is conflated.
+        self._spreads += 1
+        self.__fan_out(key=(KIND_SPREAD, event.coin, str(self._spreads)), text=text, subscribers=subscribers)
+
+    def forget(self, coin: str) -> None:
+        for key in [k for k in self._latest if k[0] == coin]:
+            del self._latest[key]
+
+    def subscribe(self, client: HubClient, coins: List[str]) -> None:
+        if ALL_COINS in coins:
+            client.everything = True
+            self._everyone.add(client)
+        for coin in coins:
+            if coin != ALL_COINS:
+                client.coins.add(coin)
+                self._subscribers.setdefault(coin, set()).add(client)
+        # New subscribers start from the latest quotes instead of waiting for the next tick.
+        for ((coin, exchange), (price, timestamp)) in list(self._latest.items()):
+            if client.everything or coin in coins:
+                client.offer(key=(KIND_QUOTE, coin, exchange), text=_quote(coin, exchange, price, timestamp))
+
+    def unsubscribe(self, client: HubClient, coins: List[str]) -> None:
+        if ALL_COINS in coins:
+            client.everything = False
+            self._everyone.discard(client)
+            coins = list(client.coins)
+        for coin in coins:
+            client.coins.discard(coin)
+            subscribers = self._subscribers.get(coin)
+            if subscribers is not None:
+                subscribers.discard(client)
+                if not subscribers:
+                    del self._subscribers[coin]
+
+    def __fan_out(self, key: Key, text: str, subscribers: Optional[Set[HubClient]]) -> None:
+        # HubClient.offer inlined, this runs once per subscriber for every tick.
+        for clients in (subscribers, self._everyone):
+            if not clients:
+                continue
+            for client in clients:
+                if clients is subscribers and client.everything:
+                    continue
+                pending = client.pending
+                if not pending:
+                    client.ready.set()
+                elif key in pending:
+                    client.conflated += 1
+                elif len(pending) >= client.max_pending:
+                    del pending[next(iter(pending))]
+                    client.evicted += 1
+                pending[key] = text
+
+    async def __handle(self, request: web.Request) -> web.WebSocketResponse:
+        # Deflating every batch for every client would cost the loop more than the fan-out itself.
+        socket = web.WebSocketResponse(heartbeat=30, compress=False)
+        await socket.prepare(request)
+        try:
+            interval_ms = max(0, int(request.query.get("interval_ms", self.interval_ms)))
+        except ValueError:
+            interval_ms = self.interval_ms
+        client = HubClient(
+            socket=socket, max_pending=self.max_pending, interval_ms=interval_ms, transport=request.transport,
+        )
+        self.clients.add(client)
+        pump = asyncio.create_task(coro=self.__pump(client))
+        try:
+            async for message in socket:
+                if message.type == WSMsgType.TEXT:
+                    self.__command(client, message.data)
+                elif message.type == WSMsgType.ERROR:
+                    break
+        finally:
+            pump.cancel()
+            await asyncio.gather(pump, return_exceptions=True)
+            self.unsubscribe(client, [ALL_COINS])
+            self.clients.discard(client)
+            for name in self._departed:
+                self._departed[name] += getattr(client, name)
+        return socket
+
+    def __command(self, client: HubClient, data: str) -> None:
+        try:
+            command = json.loads(data)
+            op = command["op"]
+            if op in (OP_SUBSCRIBE, OP_UNSUBSCRIBE):
+                coins = command["coins"]
+                coins = [coins] if isinstance(coins, str) else [str(c) for c in coins]
+                (self.subscribe if op == OP_SUBSCRIBE else self.unsubscribe)(client, coins)
+                reply = {"type": KIND_SUBSCRIBED, "coins": sorted(client.coins), "all": client.everything}
+            elif op == OP_THROTTLE:
+                client.interval_ms = max(0, int(command["interval_ms"]))
+                return
+            else:
+                raise ValueError(f"unknown op {op!r}")
+        except (ValueError, KeyError, TypeError) as e:
+            reply = {"type": KIND_ERROR, "message": str(e) or type(e).__name__}
+        client.offer(key=(reply["type"], "", ""), text=_encode(reply))
+
+    async def __pump(self, client: HubClient) -> None:
+        loop = asyncio.get_running_loop()
+        due = 0.0
+        while True:
+            await client.ready.wait()
+            if client.interval_ms:
+                # Throttled clients get one batch per interval, conflated meanwhile.
+                delay = due - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                due = loop.time() + client.interval_ms / 1000
+            client.ready.clear()
+            (batch, client.pending) = (client.pending, {})
+            if not batch:
+                continue
+            # No wait_for here, it costs a task per send. The sweeper drops clients stuck in a send.
+            client.sending_since = loop.time()
+            try:
+                await client.socket.send_str("[" + ",".join(batch.values()) + "]")
+            except ConnectionError:
+                return
+            client.sending_since = None
+            client.sent += len(batch)
+
+    async def __sweep(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(min(1.0, self.send_timeout_seconds / 2))
+            for client in list(self.clients):
+                since = client.sending_since
+                if since is None or loop.time() - since < self.send_timeout_seconds:
+                    continue
+                self.slow_disconnects += 1
+                client.sending_since = None
+                print(f"🐢 Fan-out client did not read for {self.send_timeout_seconds:g}s, disconnecting")
+                # A close handshake would queue behind the unread data, drop the connection instead.
+                if client.transport is not None:
+                    client.transport.abort()
@@ -1,11 +1,19 @@
-import requests
+import time
+import asyncio
 
-from typing import List, Dict
+import numpy as np
+
+from typing import Any, List, Dict, Tuple, Optional, Sequence
+from dataclasses import dataclass
+from aiohttp import ClientSession, ClientTimeout, ClientError
 
-from src.basics import matches_number
 from src.config import BubblesFilter
 
 from src.interests.bubble import Bubble
+from src.interests.cache import ListingCache
+from src.interests.decoder import JsonArrayDecoder
+from src.interests.listings import ListingIndex
+from src.interests.scheduler import TokenBucket
 from src.interests.coingecko import usdt_exchanges
 
 from src.exchanges.mexc.mexc import ALIAS as ALIAS_MEXC
@@ -13,9 +21,6 @@ from src.exchanges.bybit import ALIAS as ALIAS_BYBIT
 from src.exchanges.binance import ALIAS as ALIAS_BINANCE
 from src.exchanges.coinbase import ALIAS as ALIAS_COINBASE
 
-__API_URL = "https://cryptobubbles.net/backend/data/bubbles1000.usd"
-__RESPONSE_TIMEOUT = 10
-
 __KEY_ID = "cg_id"
 __KEY_SYMBOL = "symbol"
 __KEY_MARKET_CAP = "marketcap"
@@ -26,83 +31,227 @@ __KEY_PERFORMANCE_HOUR_4 = "hour4"
 __KEY_PERFORMANCE_HOUR_1 = "hour"
 __KEY_PERFORMANCE_MINUTES_15 = "min15"
 
+__performance_keys = (
+    __KEY_PERFORMANCE_DAY,
+    __KEY_PERFORMANCE_HOUR_4,
+    __KEY_PERFORMANCE_HOUR_1,
+    __KEY_PERFORMANCE_MINUTES_15,
+)
+
+__item_keys = (__KEY_ID, __KEY_SYMBOL, __KEY_MARKET_CAP, __KEY_PRICES_EXC, __KEY_PERFORMANCE)
+
 __supported_exchanges = [ALIAS_MEXC, ALIAS_BYBIT, ALIAS_BINANCE, ALIAS_COINBASE]
+__exchange_bits = {e: 1 << i for (i, e) in enumerate(__supported_exchanges)}
+
+BubbleRow = Tuple[Optional[str], str, float, List[str], Tuple[float, ...]]
+
+@dataclass
+class BubbleColumns:
+    ids: List[Optional[str]]
+    symbols: List[str]
+    listed: List[List[str]]
+    market_cap: np.ndarray
+    # Columns follow the day, hour4, hour, min15 windows.
+    performance: np.ndarray
+    # One bit per supported exchange alias.
+    exchanges: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+class BubblesSource:
+    __API_URL = "https://cryptobubbles.net/backend/data/bubbles1000.usd"
+    __RESPONSE_TIMEOUT = 10
+    __CHUNK_SIZE = 64 * 1024
+
+    __STATUS_NOT_MODIFIED = 304
+    __HEADER_ETAG = "ETag"
+    __HEADER_LAST_MODIFIED = "Last-Modified"
+    __HEADER_IF_NONE_MATCH = "If-None-Match"
+    __HEADER_IF_MODIFIED_SINCE = "If-Modified-Since"
+    __HEADER_ACCEPT_ENCODING = "Accept-Encoding"
+
+    def __init__(self, url: str = __API_URL, timeout: float = __RESPONSE_TIMEOUT):
+        self.url = url
+        self.timeout = timeout
+        self.etag: Optional[str] = None
+        self.last_modified: Optional[str] = None
+        self.not_modified = 0
+        self.longest_slice_ms = 0.0
+        self._snapshot = _columns([])
+        self._session: Optional[ClientSession] = None
+
+    @property
+    def snapshot(self) -> BubbleColumns:
+        return self._snapshot
+
+    async def fetch(self) -> BubbleColumns:
+        headers = {}
+        if self.etag is not None:
+            headers[self.__HEADER_IF_NONE_MATCH] = self.etag
+        if self.last_modified is not None:
+            headers[self.__HEADER_IF_MODIFIED_SINCE] = self.last_modified
+
+        try:
+            async with self.__get_session().get(self.url, headers=headers) as response:
+                if response.status == self.__STATUS_NOT_MODIFIED:
+                    self.not_modified += 1
+                    return self._snapshot
+                response.raise_for_status()
+                columns = await self.__read(response.content)
+                (etag, last_modified) = (
+                    response.headers.get(self.__HEADER_ETAG),
+                    response.headers.get(self.__HEADER_LAST_MODIFIED),
+                )
+        except (ClientError, asyncio.TimeoutError, ValueError) as e:
+            print("cryptobubbles", e)
+            return _columns([])
+
+        self.etag = etag
+        self.last_modified = last_modified
+        self._snapshot = columns
+        return columns
 
-async def bubbles_fetch(filter: BubblesFilter) -> List[Bubble]:
-    items = _fetch_bubbles()
-    bubbles = _parse_bubbles(items)
-    bubbles = _filter_bubbles_cap(filter=filter, bubbles=bubbles)
-    bubbles = _filter_bubbles_perf(filter=filter, bubbles=bubbles)
-    await usdt_exchanges(bubbles)
-    return _filter_bubbles_exch(filter=filter, bubbles=bubbles)
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __read(self, content) -> BubbleColumns:
+        decoder = JsonArrayDecoder(object_pairs_hook=_project)
+        rows = []
+        self.longest_slice_ms = 0.0
+        async for chunk in content.iter_chunked(self.__CHUNK_SIZE):
+            started = time.perf_counter()
+            rows.extend(_parse_row(i) for i in decoder.feed(chunk))
+            self.longest_slice_ms = max(self.longest_slice_ms, (time.perf_counter() - started) * 1000)
+            # Buffered chunks come back without suspending, so yield explicitly.
+            await asyncio.sleep(0)
+        rows.extend(_parse_row(i) for i in decoder.close())
+        return _columns(rows)
+
+    def __get_session(self) -> ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = ClientSession(
+                timeout=ClientTimeout(total=self.timeout),
+                headers={self.__HEADER_ACCEPT_ENCODING: "gzip, deflate"},
+            )
+        return self._session
+
+async def bubbles_fetch(
+    filters: List[BubblesFilter],
+    source: Optional[BubblesSource] = None,
+    cache: Optional[ListingCache] = None,
+    bucket: Optional[TokenBucket] = None,
+    index: Optional[ListingIndex] = None,
+    max_attempts: int = 3,
+) -> List[List[Bubble]]:
+    if source is None:
+        source = BubblesSource()
+        try:
+            columns = await source.fetch()
+        finally:
+            await source.close()
+    else:
+        columns = await source.fetch()
+
+    masks = np.array([_mask_bubbles(filter=f, columns=columns) for f in filters], dtype=bool)
+    rows = np.flatnonzero(masks.any(axis=0)) if len(filters) else np.empty(0, dtype=np.int64)
+    candidates = {int(r): _materialize(columns, int(r)) for r in rows}
+    await usdt_exchanges(list(candidates.values()), cache=cache, bucket=bucket, index=index, max_attempts=max_attempts)
+
+    exchanges = columns.exchanges.copy()
+    for (row, bubble) in candidates.items():
+        exchanges[row] = _exchange_mask(bubble.listed_exc)
+    listed_count = np.unpackbits(exchanges[:, None], axis=1).sum(axis=1)
+
+    results = []
+    for (filter, mask) in zip(filters, masks):
+        selected = np.flatnonzero(mask & (listed_count >= filter.listed_exchanges))
+        order = selected[np.argsort(-columns.market_cap[selected], kind="stable")]
+        results.append([candidates[int(r)] for r in order])
+    return results
 
 def bubbles_filter(bubbles: List[Bubble], exchange: str) -> List[Bubble]:
     return [b for b in bubbles if exchange in b.listed_exc]
 
-def _fetch_bubbles() -> List[Dict]:
-    try:
-        response = requests.get(url=__API_URL, timeout=__RESPONSE_TIMEOUT)
-        response.raise_for_status()
-        return response.json()
-    except (requests.RequestException, ValueError):
-        return []
-
-def _parse_bubbles(items: List[Dict]) -> List[Bubble]:
-    bubbles = []
-    for item in items:
-        bubble = Bubble(
-            id=item[__KEY_ID],
-            symbol=item.get(__KEY_SYMBOL).lower(),
-            market_cap=float(item.get(__KEY_MARKET_CAP, 0)),
-            listed_exc=[e.lower() for e in list(item.get(__KEY_PRICES_EXC, {}).keys())],
-            performance=item.get(__KEY_PERFORMANCE, {}),
-        )
-        bubbles.append(bubble)
-    return bubbles
-
-def _filter_bubbles_cap(filter: BubblesFilter, bubbles: List[Bubble]) -> List[Bubble]:
-    filtered = []
-    for b in bubbles:
-        if b.id is None:
-            continue
-        if b.market_cap < filter.market_cap_min:
-            continue
-        if b.market_cap > filter.market_cap_max:
-            continue
-        filtered.append(b)
-    if filtered:
-        filtered.sort(key=lambda x: x.market_cap, reverse=True)
-    return filtered
-
-def _filter_bubbles_perf(filter: BubblesFilter, bubbles: List[Bubble]) -> List[Bubble]:
-    filtered = []
-    for b in bubbles:
-        perf_day = b.performance.get(__KEY_PERFORMANCE_DAY, 0.0) or 0.0
-        perf_hour_4 = b.performance.get(__KEY_PERFORMANCE_HOUR_4, 0.0) or 0.0
-        perf_hour_1 = b.performance.get(__KEY_PERFORMANCE_HOUR_1, 0.0) or 0.0
-        perf_minutes_15 = b.performance.get(__KEY_PERFORMANCE_MINUTES_15, 0.0) or 0.0
-        performance_slice = [perf_day, perf_hour_4, perf_hour_1, perf_minutes_15]
-        if not (all(v > 0 for v in performance_slice) or all(v < 0 for v in performance_slice)):
-            continue
-        if abs(perf_day) < filter.performance_per_day:
-            continue
-        if abs(perf_hour_4) < filter.performance_per_hour_4:
-            continue
-        if abs(perf_hour_1) < filter.performance_per_hour_1:
-            continue
-        if abs(perf_minutes_15) < filter.performance_per_minutes_15:
-            continue
-        filtered.append(b)
-    if filtered:
-        filtered.sort(key=lambda x: x.market_cap, reverse=True)
-    return filtered
-
-def _filter_bubbles_exch(filter: BubblesFilter, bubbles: List[Bubble]) -> List[Bubble]:
-    filtered = []
-    for b in bubbles:
-        if matches_number(b.listed_exc, __supported_exchanges) < filter.listed_exchanges:
-            continue
-        filtered.append(b)
-    if filtered:
-        filtered.sort(key=lambda x: x.market_cap, reverse=True)
-    return filtered
\ No newline at end of file
+def make_bubble(
+    id: Optional[str],
+    symbol: str,
+    market_cap: float,
+    listed_exc: List[str],
+    performance: Sequence[float],
+) -> Bubble:
+    return Bubble(
+        id=id,
+        symbol=symbol,
+        market_cap=market_cap,
+        listed_exc=listed_exc,
+        performance=dict(zip(__performance_keys, performance)),
+    )
+
+def trend_mask(filter: BubblesFilter, performance: np.ndarray) -> np.ndarray:
+    thresholds = np.array([
+        filter.performance_per_day,
+        filter.performance_per_hour_4,
+        filter.performance_per_hour_1,
+        filter.performance_per_minutes_15,
+    ], dtype=np.float64)
+    same_trend = (performance > 0).all(axis=1) | (performance < 0).all(axis=1)
+    strong = (np.abs(performance) >= thresholds).all(axis=1)
+    return same_trend & strong
+
+def _project(pairs: List[Tuple[str, Any]]) -> Dict:
+    # Called for every object, innermost first. Nested objects pass through until their item
+    # keeps only what _parse_row reads: the listing exchanges by key and the four windows.
+    item = dict(pairs)
+    if __KEY_ID not in item:
+        return item
+    projected = {k: item[k] for k in __item_keys if k in item}
+    if isinstance(projected.get(__KEY_PRICES_EXC), dict):
+        projected[__KEY_PRICES_EXC] = dict.fromkeys(projected[__KEY_PRICES_EXC])
+    if isinstance(projected.get(__KEY_PERFORMANCE), dict):
+        performance = projected[__KEY_PERFORMANCE]
+        projected[__KEY_PERFORMANCE] = {k: performance[k] for k in __performance_keys if k in performance}
+    return projected
+
+def _parse_row(item: Dict) -> BubbleRow:
+    performance = item.get(__KEY_PERFORMANCE) or {}
+    return (
+        item.get(__KEY_ID),
+        (item.get(__KEY_SYMBOL) or "").lower(),
+        float(item.get(__KEY_MARKET_CAP) or 0),
+        [e.lower() for e in (item.get(__KEY_PRICES_EXC) or {})],
+        tuple(float(performance.get(k) or 0.0) for k in __performance_keys),
+    )
+
+def _columns(rows: List[BubbleRow]) -> BubbleColumns:
+    return BubbleColumns(
+        ids=[r[0] for r in rows],
+        symbols=[r[1] for r in rows],
+        listed=[r[3] for r in rows],
+        market_cap=np.array([r[2] for r in rows], dtype=np.float64),
+        performance=np.array([r[4] for r in rows], dtype=np.float64).reshape(len(rows), len(__performance_keys)),
+        exchanges=np.array([_exchange_mask(r[3]) for r in rows], dtype=np.uint8),
+    )
+
+def _exchange_mask(exchanges: List[str]) -> int:
+    mask = 0
+    for exchange in exchanges:
+        mask |= __exchange_bits.get(exchange, 0)
+    return mask
+
+def _materialize(columns: BubbleColumns, row: int) -> Bubble:
+    return make_bubble(
+        id=columns.ids[row],
+        symbol=columns.symbols[row],
+        market_cap=float(columns.market_cap[row]),
+        listed_exc=list(columns.listed[row]),
+        performance=columns.performance[row].tolist(),
+    )
+
+def _mask_bubbles(filter: BubblesFilter, columns: BubbleColumns) -> np.ndarray:
+    has_id = np.array([i is not None for i in columns.ids], dtype=bool)
+    cap = columns.market_cap
+    in_cap = (cap >= filter.market_cap_min) & (cap <= filter.market_cap_max)
+    return has_id & in_cap & trend_mask(filter=filter, performance=columns.performance)
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import os
+import json
+
+from typing import Dict, List, Tuple, Optional
+from pathlib import Path
+
+from src.basics import time_millis
+
+class ListingCache:
+    __KEY_EXCHANGES = "exchanges"
+    __KEY_EXPIRES = "expires"
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        ttl_ms: int = 24 * 3_600_000,
+        negative_ttl_ms: int = 30 * 60_000,
+    ):
+        self.path = Path(path) if path is not None else None
+        self.ttl_ms = ttl_ms
+        self.negative_ttl_ms = negative_ttl_ms
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[str, Tuple[Optional[List[str]], int]] = {}
+        self.load()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, coin_id: str, now_ms: Optional[int] = None) -> Tuple[bool, Optional[List[str]]]:
+        entry = self._entries.get(coin_id)
+        if entry is None or entry[1] <= (now_ms if now_ms is not None else time_millis()):
+            self.misses += 1
+            return False, None
+        self.hits += 1
+        return True, entry[0]
+
+    def put(self, coin_id: str, exchanges: Optional[List[str]], now_ms: Optional[int] = None) -> None:
+        ttl = self.ttl_ms if exchanges is not None else self.negative_ttl_ms
+        self._entries[coin_id] = (exchanges, (now_ms if now_ms is not None else time_millis()) + ttl)
+
+    def retry_later(self, coin_id: str, now_ms: Optional[int] = None) -> Optional[List[str]]:
+        # A failed lookup keeps the last known listing, even an expired one, until the negative TTL ends.
+        exchanges = self._entries.get(coin_id, (None, 0))[0]
+        self._entries[coin_id] = (exchanges, (now_ms if now_ms is not None else time_millis()) + self.negative_ttl_ms)
+        return exchanges
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+    def load(self) -> None:
+        if self.path is None or not self.path.exists():
+            return
+        try:
+            with self.path.open(mode="r", encoding="utf-8") as stream:
+                data = json.load(stream)
+        except (OSError, ValueError):
+            return
+        # Expired entries stay one more TTL, as the fallback when a lookup fails.
+        kept_after = time_millis() - self.ttl_ms
+        self._entries = {
+            coin_id: (entry.get(self.__KEY_EXCHANGES), int(entry.get(self.__KEY_EXPIRES, 0)))
+            for (coin_id, entry) in data.items()
+            if isinstance(entry, dict) and int(entry.get(self.__KEY_EXPIRES, 0)) > kept_after
+        }
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        data = {
+            coin_id: {self.__KEY_EXCHANGES: exchanges, self.__KEY_EXPIRES: expires}
+            for (coin_id, (exchanges, expires)) in self._entries.items()
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = self.path.with_suffix(self.path.suffix + ".tmp")
+        with temporary.open(mode="w", encoding="utf-8") as stream:
+            json.dump(data, stream)
+        os.replace(temporary, self.path)
@@ -1,9 +1,13 @@
+import time
 import asyncio
 
-from typing import List, Dict
+from typing import List, Dict, Optional
 from aiohttp import ClientSession, ClientTimeout, ClientError
 
 from src.interests.bubble import Bubble
+from src.interests.cache import ListingCache
+from src.interests.listings import ListingIndex
+from src.interests.scheduler import RateLimited, TokenBucket, retry_after_seconds
 
 from src.exchanges.mexc.mexc import ALIAS as ALIAS_MEXC
 from src.exchanges.bybit import ALIAS as ALIAS_BYBIT
@@ -13,8 +17,8 @@ from src.exchanges.coinbase import ALIAS as ALIAS_COINBASE
 __API_URL = "https://api.coingecko.com/api/v3/coins/{coin_id}/tickers"
 
 __RESPONSE_TIMEOUT = 10
-__BUBBLES_BATCH_SIZE = 1
-__BUBBLES_BATCH_DELAY_SECONDS = 10.0
+__STATUS_TOO_MANY_REQUESTS = 429
+__HEADER_RETRY_AFTER = "Retry-After"
 
 __USDT_ID = "tether"
 
@@ -30,37 +34,116 @@ __id_to_alias = {
     "gdax": ALIAS_COINBASE,
 }
 
-async def usdt_exchanges(bubbles: List[Bubble]):
+def listing_index(ttl_ms: int) -> ListingIndex:
+    return ListingIndex(exchanges=dict(__id_to_alias), ttl_ms=ttl_ms)
+
+async def usdt_exchanges(
+    bubbles: List[Bubble],
+    cache: Optional[ListingCache] = None,
+    bucket: Optional[TokenBucket] = None,
+    index: Optional[ListingIndex] = None,
+    max_attempts: int = 3,
+    api_url: str = __API_URL,
+):
+    started = time.monotonic()
     timeout = ClientTimeout(total=__RESPONSE_TIMEOUT)
-    async with ClientSession(timeout=timeout) as session:
-        for i in range(0, len(bubbles), __BUBBLES_BATCH_SIZE):
-            batch = bubbles[i:i + __BUBBLES_BATCH_SIZE]
-            tasks = [__usdt_exchanges(b.id, session) for b in batch]
-            batch_results = await asyncio.gather(*tasks, return_exceptions=True)
-
-            for bubble, result in zip(batch, batch_results):
-                if isinstance(result, Exception):
-                    bubble.listed_exc = [] or bubble.listed_exc
-                else:
-                    bubble.listed_exc = result or bubble.listed_exc
-
-            await asyncio.sleep(__BUBBLES_BATCH_DELAY_SECONDS)
-
-async def __usdt_exchanges(coin_id: str, session: ClientSession) -> List[str]:
-    data = await __fetch_coingecko(coin_id=coin_id, session=session)
+    if bucket is None:
+        bucket = TokenBucket(capacity=1, refill_per_second=0.1)
+
+    if index is not None and not index.is_fresh:
+        async with ClientSession(timeout=timeout) as session:
+            if await index.refresh(session=session, bucket=bucket):
+                print(f"📇 CoinGecko listing index: {len(index)} coins from {index.pages} pages")
+
+    misses = []
+    skipped = []
+    for bubble in bubbles:
+        if index is not None and index.is_fresh:
+            listed = index.lookup(bubble.id)
+            # Exchanges the index failed to load keep what cryptobubbles says about them.
+            listed += [e for e in bubble.listed_exc if e in index.failed and e not in listed]
+            bubble.listed_exc = listed or bubble.listed_exc
+            continue
+        (found, exchanges) = cache.get(bubble.id) if cache is not None else (False, None)
+        if not found:
+            misses.append(bubble)
+        elif exchanges is None:
+            # Failed recently with nothing known, the cryptobubbles listing is not a substitute.
+            bubble.listed_exc = []
+            skipped.append(bubble.id)
+        else:
+            bubble.listed_exc = exchanges or bubble.listed_exc
+
+    failed = []
+    if misses:
+        async with ClientSession(timeout=timeout) as session:
+            tasks = [
+                __usdt_exchanges_retrying(
+                    coin_id=b.id, session=session, bucket=bucket, max_attempts=max_attempts, api_url=api_url,
+                ) for b in misses
+            ]
+            results = await asyncio.gather(*tasks)
+
+        for bubble, result in zip(misses, results):
+            if result is None:
+                failed.append(bubble.id)
+                known = cache.retry_later(bubble.id) if cache is not None else None
+                if known is None:
+                    skipped.append(bubble.id)
+                bubble.listed_exc = known or []
+                continue
+            if cache is not None:
+                cache.put(bubble.id, result)
+            bubble.listed_exc = result or bubble.listed_exc
+
+    if cache is not None:
+        cache.save()
+        print("🦎 CoinGecko listings cache:", cache.stats())
+    if failed:
+        print(f"⚠️ CoinGecko lookup failed after {max_attempts} attempts, using the last known listings:", failed)
+    if skipped:
+        print("⚠️ Skipping coins with no known CoinGecko listing:", skipped)
+    print(f"⏱️ CoinGecko refresh: {len(misses)} lookups in {time.monotonic() - started:.1f}s")
+
+async def __usdt_exchanges_retrying(
+    coin_id: str,
+    session: ClientSession,
+    bucket: TokenBucket,
+    max_attempts: int,
+    api_url: str,
+) -> Optional[List[str]]:
+    for _ in range(max_attempts):
+        await bucket.acquire()
+        try:
+            result = await __usdt_exchanges(coin_id=coin_id, session=session, api_url=api_url)
+        except RateLimited as e:
+            bucket.penalize(retry_after=e.retry_after)
+            continue
+        if result is not None:
+            bucket.reward()
+            return result
+    bucket.failures += 1
+    return None
+
+async def __usdt_exchanges(coin_id: str, session: ClientSession, api_url: str) -> Optional[List[str]]:
+    data = await __fetch_coingecko(coin_id=coin_id, session=session, api_url=api_url)
+    if data is None:
+        return None
     return __filter_usdt_exchanges(data.get(__KEY_ITEMS, []))
 
-async def __fetch_coingecko(coin_id: str, session: ClientSession) -> Dict:
+async def __fetch_coingecko(coin_id: str, session: ClientSession, api_url: str) -> Optional[Dict]:
     try:
-        async with session.get(__API_URL.format(coin_id=coin_id)) as response:
+        async with session.get(api_url.format(coin_id=coin_id)) as response:
             if response.status == 200:
                 return await response.json()
+            elif response.status == __STATUS_TOO_MANY_REQUESTS:
+                raise RateLimited(retry_after=retry_after_seconds(response.headers.get(__HEADER_RETRY_AFTER)))
             else:
                 print(coin_id, response)
-                return {}
-    except ClientError as e:
+                return None
+    except (ClientError, asyncio.TimeoutError) as e:
         print(coin_id, e)
-        return {}
+        return None
 
 def __filter_usdt_exchanges(items: List[Dict]) -> List[str]:
     result = []
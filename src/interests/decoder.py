@@ -0,0 +1,59 @@
+import json
+import codecs
+
+from typing import Any, List, Tuple, Callable, Optional
+
+class JsonArrayDecoder:
+    __WHITESPACE = " \t\r\n"
+
+    def __init__(self, object_pairs_hook: Optional[Callable[[List[Tuple[str, Any]]], Any]] = None):
+        # The hook sees every object as it is decoded, innermost first, and decides what is kept of it.
+        self._json = json.JSONDecoder(object_pairs_hook=object_pairs_hook)
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._started = False
+        self._finished = False
+
+    def feed(self, data: bytes) -> List[Any]:
+        self._buffer += self._text.decode(data)
+        return self.__drain()
+
+    def close(self) -> List[Any]:
+        self._buffer += self._text.decode(b"", final=True)
+        items = self.__drain()
+        if not self._finished:
+            raise ValueError("Truncated JSON array")
+        return items
+
+    def __drain(self) -> List[Any]:
+        items = []
+        buffer = self._buffer
+        pos = 0
+        while True:
+            while pos < len(buffer) and buffer[pos] in self.__WHITESPACE:
+                pos += 1
+            if pos == len(buffer):
+                break
+
+            char = buffer[pos]
+            if self._finished:
+                raise ValueError(f"Unexpected data after JSON array at {pos}")
+            if not self._started:
+                if char != "[":
+                    raise ValueError("Expected a JSON array")
+                self._started = True
+                pos += 1
+            elif char == "]":
+                self._finished = True
+                pos += 1
+            elif char == ",":
+                pos += 1
+            else:
+                try:
+                    (item, pos) = self._json.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    # Incomplete item, wait for the next chunk.
+                    break
+                items.append(item)
+        self._buffer = buffer[pos:]
+        return items
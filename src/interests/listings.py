@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import asyncio
+
+from typing import Set, Dict, List, Iterable, Optional
+from aiohttp import ClientSession, ClientError
+
+from src.basics import time_millis
+from src.interests.scheduler import RateLimited, TokenBucket, retry_after_seconds
+
+class ListingIndex:
+    __API_URL = "https://api.coingecko.com/api/v3/exchanges/{exchange_id}/tickers"
+    __PAGE_SIZE = 100
+    __MAX_PAGES = 100
+    __MAX_ATTEMPTS = 3
+    # A partial index is retried sooner than a complete one.
+    __RETRY_MS = 15 * 60_000
+
+    __STATUS_TOO_MANY_REQUESTS = 429
+    __HEADER_RETRY_AFTER = "Retry-After"
+
+    __USDT_ID = "tether"
+
+    __KEY_ITEMS = "tickers"
+    __KEY_COIN_ID = "coin_id"
+    __KEY_TARGET_ID = "target_coin_id"
+
+    def __init__(
+        self,
+        exchanges: Dict[str, str],
+        ttl_ms: int = 6 * 3_600_000,
+        api_url: str = __API_URL,
+    ):
+        self.exchanges = exchanges
+        self.ttl_ms = ttl_ms
+        self.api_url = api_url
+        self.pages = 0
+        # Aliases whose tickers did not load in the last refresh.
+        self.failed: Set[str] = set()
+        self._index: Dict[str, Set[str]] = {}
+        self._expires = 0
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    @property
+    def is_fresh(self) -> bool:
+        return time_millis() < self._expires
+
+    def lookup(self, coin_id: str) -> List[str]:
+        return sorted(self._index.get(coin_id, ()))
+
+    async def refresh(self, session: ClientSession, bucket: TokenBucket) -> bool:
+        results = await asyncio.gather(*(
+            self.__fetch_exchange(exchange_id=e, session=session, bucket=bucket) for e in self.exchanges
+        ))
+        failed = {self.exchanges[e] for (e, r) in zip(self.exchanges, results) if r is None}
+        if len(failed) == len(self.exchanges):
+            return False
+
+        index: Dict[str, Set[str]] = {}
+        for (exchange_id, coin_ids) in zip(self.exchanges, results):
+            alias = self.exchanges[exchange_id]
+            if coin_ids is None:
+                # Whatever the previous refresh knew about a failed exchange beats nothing.
+                coin_ids = [c for (c, aliases) in self._index.items() if alias in aliases]
+            for coin_id in coin_ids:
+                index.setdefault(coin_id, set()).add(alias)
+        self._index = index
+        self.failed = failed
+        if failed:
+            print(f"⚠️ CoinGecko listing index is missing {', '.join(sorted(failed))}, keeping the other exchanges")
+        self._expires = time_millis() + (min(self.ttl_ms, self.__RETRY_MS) if failed else self.ttl_ms)
+        return True
+
+    async def __fetch_exchange(
+        self,
+        exchange_id: str,
+        session: ClientSession,
+        bucket: TokenBucket,
+    ) -> Optional[Set[str]]:
+        coin_ids: Set[str] = set()
+        for page in range(1, self.__MAX_PAGES + 1):
+            items = await self.__fetch_page(exchange_id=exchange_id, page=page, session=session, bucket=bucket)
+            if items is None:
+                return None
+            coin_ids.update(self.__usdt_coin_ids(items))
+            if len(items) < self.__PAGE_SIZE:
+                break
+        else:
+            print(f"⚠️ CoinGecko listing index for {exchange_id} stopped at {self.__MAX_PAGES} pages, later tickers are missing")
+        return coin_ids
+
+    async def __fetch_page(
+        self,
+        exchange_id: str,
+        page: int,
+        session: ClientSession,
+        bucket: TokenBucket,
+    ) -> Optional[List[Dict]]:
+        url = self.api_url.format(exchange_id=exchange_id)
+        for _ in range(self.__MAX_ATTEMPTS):
+            await bucket.acquire()
+            try:
+                async with session.get(url, params={"page": page}) as response:
+                    if response.status == self.__STATUS_TOO_MANY_REQUESTS:
+                        raise RateLimited(retry_after=retry_after_seconds(response.headers.get(self.__HEADER_RETRY_AFTER)))
+                    if response.status != 200:
+                        print(exchange_id, page, response.status)
+                        continue
+                    data = await response.json()
+            except RateLimited as e:
+                bucket.penalize(retry_after=e.retry_after)
+                continue
+            except (ClientError, asyncio.TimeoutError, ValueError) as e:
+                print(exchange_id, page, e)
+                continue
+
+            bucket.reward()
+            self.pages += 1
+            items = data.get(self.__KEY_ITEMS, []) if isinstance(data, dict) else []
+            return [i for i in items if isinstance(i, dict)]
+        return None
+
+    def __usdt_coin_ids(self, items: Iterable[Dict]) -> Iterable[str]:
+        for item in items:
+            if item.get(self.__KEY_TARGET_ID) == self.__USDT_ID:
+                coin_id = item.get(self.__KEY_COIN_ID)
+                if coin_id:
+                    yield coin_id
@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import asyncio
+import numpy as np
+
+from typing import Set, List, Dict, Tuple, Callable, Optional, Awaitable
+
+from src.basics import MarketTicker, time_millis
+from src.config import BubblesFilter
+
+from src.interests.bubble import Bubble
+from src.interests.bubbles import BubbleColumns, make_bubble, trend_mask
+
+class MoverWindows:
+    # Same order as the BubblesFilter thresholds after the 24h change.
+    __WINDOWS_MS = (4 * 3_600_000, 3_600_000, 15 * 60_000)
+    __GROWTH = 256
+
+    def __init__(self, resolution_ms: int = 60_000):
+        self.resolution_ms = resolution_ms
+        self.slots = max(self.__WINDOWS_MS) // resolution_ms + 1
+        self.coins: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.prices = np.full((0, self.slots), np.nan, dtype=np.float64)
+        self.buckets = np.full((0, self.slots), -1, dtype=np.int64)
+        self.last_price = np.full(0, np.nan, dtype=np.float64)
+        self.last_bucket = np.full(0, -1, dtype=np.int64)
+        self.day_change = np.full(0, np.nan, dtype=np.float64)
+
+    def __len__(self) -> int:
+        return len(self.coins)
+
+    def update(self, coin: str, price: float, day_change: float, timestamp: int) -> None:
+        if price <= 0:
+            return
+        row = self.index.get(coin)
+        if row is None:
+            row = self.__add(coin)
+
+        bucket = timestamp // self.resolution_ms
+        previous = int(self.last_bucket[row])
+        if bucket < previous:
+            return
+        if previous >= 0:
+            # Quiet symbols do not tick every bucket, carry the last price over the gap.
+            for b in range(max(previous + 1, bucket - self.slots + 1), bucket):
+                self.__write(row, b, self.last_price[row])
+        self.__write(row, bucket, price)
+        self.last_price[row] = price
+        self.last_bucket[row] = bucket
+        self.day_change[row] = day_change
+
+    def changes(self, now_ms: Optional[int] = None) -> np.ndarray:
+        if now_ms is None:
+            now_ms = time_millis()
+        count = len(self.coins)
+        now_bucket = now_ms // self.resolution_ms
+        result = np.full((count, 1 + len(self.__WINDOWS_MS)), np.nan, dtype=np.float64)
+        result[:, 0] = self.day_change[:count]
+
+        rows = np.arange(count)
+        last_price = self.last_price[:count]
+        last_bucket = self.last_bucket[:count]
+        for (i, window_ms) in enumerate(self.__WINDOWS_MS, start=1):
+            target = now_bucket - window_ms // self.resolution_ms
+            slot = target % self.slots
+            reference = np.where(self.buckets[rows, slot] == target, self.prices[rows, slot], np.nan)
+            # Nothing traded since the window started: the price has not moved.
+            reference = np.where((last_bucket >= 0) & (last_bucket < target), last_price, reference)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                result[:, i] = (last_price / reference - 1.0) * 100.0
+        return result
+
+    def __add(self, coin: str) -> int:
+        row = len(self.coins)
+        if row == len(self.last_price):
+            grow = self.__GROWTH
+            self.prices = np.vstack([self.prices, np.full((grow, self.slots), np.nan)])
+            self.buckets = np.vstack([self.buckets, np.full((grow, self.slots), -1, dtype=np.int64)])
+            self.last_price = np.concatenate([self.last_price, np.full(grow, np.nan)])
+            self.last_bucket = np.concatenate([self.last_bucket, np.full(grow, -1, dtype=np.int64)])
+            self.day_change = np.concatenate([self.day_change, np.full(grow, np.nan)])
+        self.coins.append(coin)
+        self.index[coin] = row
+        return row
+
+    def __write(self, row: int, bucket: int, price: float) -> None:
+        slot = bucket % self.slots
+        self.prices[row, slot] = price
+        self.buckets[row, slot] = bucket
+
+class MoverEngine:
+    def __init__(
+        self,
+        filter: BubblesFilter,
+        exchanges: List[str],
+        on_change: Callable[[List[Bubble]], Awaitable[None]],
+        resolution_ms: int = 60_000,
+        evaluate_interval_ms: int = 5_000,
+        hold_ms: int = 15 * 60_000,
+    ):
+        self.filter = filter
+        self.exchanges = list(exchanges)
+        self.on_change = on_change
+        self.resolution_ms = resolution_ms
+        self.evaluate_interval_ms = evaluate_interval_ms
+        self.hold_ms = hold_ms
+        self.windows: Dict[str, MoverWindows] = {}
+        self.movers: List[Bubble] = []
+        self.task: Optional[asyncio.Task] = None
+        self._universe: Dict[str, Tuple[Optional[str], float, List[str]]] = {}
+        self._qualified: Dict[str, Tuple[int, List[float]]] = {}
+
+    def set_universe(self, columns: BubbleColumns) -> None:
+        universe = {}
+        # Ascending market cap, so the largest coin wins a shared symbol.
+        for row in np.argsort(columns.market_cap, kind="stable"):
+            universe[columns.symbols[row]] = (
+                columns.ids[row],
+                float(columns.market_cap[row]),
+                [e for e in columns.listed[row] if e in self.exchanges],
+            )
+        self._universe = universe
+
+    def update(self, venue: str, tickers: List[MarketTicker]) -> None:
+        windows = self.windows.get(venue)
+        if windows is None:
+            windows = self.windows[venue] = MoverWindows(resolution_ms=self.resolution_ms)
+        for (coin, price, day_change, timestamp) in tickers:
+            windows.update(coin=coin, price=price, day_change=day_change, timestamp=timestamp)
+
+    def evaluate(self, now_ms: Optional[int] = None) -> List[Bubble]:
+        if now_ms is None:
+            now_ms = time_millis()
+
+        for windows in self.windows.values():
+            changes = windows.changes(now_ms)
+            for row in np.flatnonzero(trend_mask(filter=self.filter, performance=changes)):
+                coin = windows.coins[row]
+                if self.__eligible(coin):
+                    self._qualified[coin] = (now_ms, changes[row].tolist())
+
+        self._qualified = {c: q for (c, q) in self._qualified.items() if now_ms - q[0] <= self.hold_ms}
+        movers = []
+        for (coin, (_, performance)) in self._qualified.items():
+            known = self._universe.get(coin)
+            if known is None:
+                continue
+            (coin_id, market_cap, _) = known
+            movers.append(make_bubble(
+                id=coin_id,
+                symbol=coin,
+                market_cap=market_cap,
+                listed_exc=sorted(self.__venues(coin)),
+                performance=performance,
+            ))
+        movers.sort(key=lambda b: b.market_cap, reverse=True)
+        return movers
+
+    def start(self) -> None:
+        if self.task is None:
+            self.task = asyncio.create_task(coro=self.__run_loop())
+
+    async def stop(self) -> None:
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+    def __eligible(self, coin: str) -> bool:
+        known = self._universe.get(coin)
+        if known is None:
+            return False
+        market_cap = known[1]
+        if market_cap < self.filter.market_cap_min or market_cap > self.filter.market_cap_max:
+            return False
+        return len(self.__venues(coin)) >= self.filter.listed_exchanges
+
+    def __venues(self, coin: str) -> Set[str]:
+        venues = {v for (v, w) in self.windows.items() if coin in w.index and v in self.exchanges}
+        known = self._universe.get(coin)
+        if known is not None:
+            venues.update(known[2])
+        return venues
+
+    async def __run_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.evaluate_interval_ms / 1000)
+            movers = self.evaluate()
+            if [b.symbol for b in movers] != [b.symbol for b in self.movers]:
+                # Committed only once applied, so a failed change is retried on the next evaluation.
+                try:
+                    await self.on_change(movers)
+                except Exception as e:
+                    print(f"⚠️ Applying movers failed, retrying: {e!r}")
+                    continue
+                self.movers = movers
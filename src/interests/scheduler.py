@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import time
+import asyncio
+
+from typing import Optional
+
+class RateLimited(Exception):
+    def __init__(self, retry_after: Optional[float] = None):
+        super().__init__(f"Rate limited, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+class TokenBucket:
+    __MIN_RATE_FRACTION = 0.1
+    __RATE_DECREASE = 0.5
+    __RATE_INCREASE = 0.05
+    __BACKOFF_SECONDS = 5.0
+    __BACKOFF_MAX_SECONDS = 120.0
+
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = capacity
+        self.max_refill_per_second = refill_per_second
+        self.refill_per_second = refill_per_second
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._backoff = self.__BACKOFF_SECONDS
+        # Requests that ran out of attempts.
+        self.failures = 0
+
+    async def acquire(self) -> None:
+        while True:
+            now = time.monotonic()
+            if now < self._blocked_until:
+                await asyncio.sleep(self._blocked_until - now)
+                continue
+
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.refill_per_second)
+            self._updated = now
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return
+            await asyncio.sleep((1.0 - self._tokens) / self.refill_per_second)
+
+    def penalize(self, retry_after: Optional[float] = None) -> None:
+        delay = retry_after if retry_after is not None else self._backoff
+        self._backoff = min(self._backoff * 2, self.__BACKOFF_MAX_SECONDS)
+        self._blocked_until = max(self._blocked_until, time.monotonic() + delay)
+        self._tokens = 0.0
+        self._updated = self._blocked_until
+        self.refill_per_second = max(
+            self.max_refill_per_second * self.__MIN_RATE_FRACTION,
+            self.refill_per_second * self.__RATE_DECREASE,
+        )
+
+    def reward(self) -> None:
+        self._backoff = self.__BACKOFF_SECONDS
+        self.refill_per_second = min(
+            self.max_refill_per_second,
+            self.refill_per_second + self.max_refill_per_second * self.__RATE_INCREASE,
+        )
+
+def retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except ValueError:
+        return None
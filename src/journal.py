@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import os
+import mmap
+import struct
+import numpy as np
+
+from typing import Dict, List, Tuple, Iterator, Optional
+from pathlib import Path
+
+from src.basics import time_millis
+
+TICK_DTYPE = np.dtype([
+    ("coin_id", "<u4"),
+    ("exchange_id", "<u4"),
+    ("price", "<f8"),
+    ("exchange_ts", "<i8"),
+    ("receive_ts", "<i8"),
+])
+
+_MAGIC = b"RFTJ"
+_VERSION = 1
+_SUFFIX = ".ticks"
+
+# magic, version, record size, capacity, count, first receive_ts, last receive_ts
+_HEADER = struct.Struct("<4sHHIQqq")
+_HEADER_SIZE = 64
+_HEADER_STATE = struct.Struct("<Qqq")
+_HEADER_STATE_OFFSET = 12
+_RECORD = struct.Struct("<IIdqq")
+
+class TickJournal:
+    def __init__(
+        self,
+        directory: Path,
+        segment_records: int = 1 << 20,
+        retention_ms: Optional[int] = None,
+        segment_ms: Optional[int] = None,
+    ):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_records = segment_records
+        # Segments also rotate by age, so a slow feed still reaches retention.
+        self.segment_ms = segment_ms
+        self.retention_ms = retention_ms
+        self._path: Optional[Path] = None
+        self._mmap: Optional[mmap.mmap] = None
+        self._count = 0
+        self._first_ts = 0
+        self._last_ts = 0
+        self.enforce_retention()
+
+    def append(
+        self,
+        coin_id: int,
+        exchange_id: int,
+        price: float,
+        exchange_ts: int,
+        receive_ts: int,
+    ) -> None:
+        if (
+            self._mmap is None
+            or self._count == self.segment_records
+            or (self.segment_ms is not None and receive_ts - self._first_ts >= self.segment_ms)
+        ):
+            self.__rotate(receive_ts)
+
+        # Readers binary-search on receive_ts, so keep it non-decreasing within the journal.
+        if receive_ts < self._last_ts:
+            receive_ts = self._last_ts
+        _RECORD.pack_into(
+            self._mmap, _HEADER_SIZE + self._count * TICK_DTYPE.itemsize,
+            coin_id, exchange_id, price, exchange_ts, receive_ts,
+        )
+        self._count += 1
+        self._last_ts = receive_ts
+        _HEADER_STATE.pack_into(self._mmap, _HEADER_STATE_OFFSET, self._count, self._first_ts, self._last_ts)
+
+    def close(self) -> None:
+        if self._mmap is None:
+            return
+        self._mmap.flush()
+        self._mmap.close()
+        os.truncate(self._path, _HEADER_SIZE + self._count * TICK_DTYPE.itemsize)
+        self._mmap = None
+        self._path = None
+
+    def enforce_retention(self, now_ms: Optional[int] = None) -> List[Path]:
+        if self.retention_ms is None:
+            return []
+        cutoff = (now_ms if now_ms is not None else time_millis()) - self.retention_ms
+
+        removed = []
+        for path in _segments(self.directory):
+            if path == self._path:
+                continue
+            header = _read_header(path)
+            if header is not None and header[-1] < cutoff:
+                path.unlink(missing_ok=True)
+                removed.append(path)
+        return removed
+
+    def __rotate(self, receive_ts: int) -> None:
+        self.close()
+
+        receive_ts = max(receive_ts, self._last_ts)
+        sequence = 0
+        path = self.directory / f"{receive_ts:016d}-{sequence:04d}{_SUFFIX}"
+        while path.exists():
+            sequence += 1
+            path = self.directory / f"{receive_ts:016d}-{sequence:04d}{_SUFFIX}"
+
+        size = _HEADER_SIZE + self.segment_records * TICK_DTYPE.itemsize
+        with path.open(mode="w+b") as stream:
+            stream.truncate(size)
+            self._mmap = mmap.mmap(stream.fileno(), size)
+        _HEADER.pack_into(
+            self._mmap, 0,
+            _MAGIC, _VERSION, TICK_DTYPE.itemsize, self.segment_records, 0, receive_ts, receive_ts,
+        )
+        self._path = path
+        self._count = 0
+        self._first_ts = receive_ts
+        self._last_ts = receive_ts
+        self.enforce_retention(now_ms=receive_ts)
+
+class TickJournalReader:
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self._maps: Dict[Path, mmap.mmap] = {}
+
+    def __enter__(self) -> TickJournalReader:
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def close(self) -> None:
+        # A mapping still viewed by a chunk from scan() is released with the last such chunk.
+        for buffer in self._maps.values():
+            try:
+                buffer.close()
+            except BufferError:
+                pass
+        self._maps.clear()
+
+    def scan(self, start_ms: int, end_ms: int) -> Iterator[np.ndarray]:
+        for path in _segments(self.directory):
+            header = _read_header(path)
+            if header is None:
+                continue
+            (count, first_ts, last_ts) = header
+            if count == 0 or last_ts < start_ms or first_ts >= end_ms:
+                continue
+
+            records = self.__map(path=path, count=count)
+            receive_ts = records["receive_ts"]
+            lo = int(np.searchsorted(receive_ts, start_ms, side="left"))
+            hi = int(np.searchsorted(receive_ts, end_ms, side="left"))
+            if lo < hi:
+                yield records[lo:hi]
+
+    def __map(self, path: Path, count: int) -> np.ndarray:
+        buffer = self._maps.get(path)
+        if buffer is None:
+            with path.open(mode="rb") as stream:
+                buffer = self._maps[path] = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+        count = min(count, (len(buffer) - _HEADER_SIZE) // TICK_DTYPE.itemsize)
+        return np.frombuffer(buffer, dtype=TICK_DTYPE, count=count, offset=_HEADER_SIZE)
+
+def _segments(directory: Path) -> List[Path]:
+    return sorted(directory.glob(f"*{_SUFFIX}"))
+
+def _read_header(path: Path) -> Optional[Tuple[int, int, int]]:
+    try:
+        with path.open(mode="rb") as stream:
+            data = stream.read(_HEADER.size)
+    except OSError:
+        return None
+    if len(data) < _HEADER.size:
+        return None
+    (magic, version, record_size, _, count, first_ts, last_ts) = _HEADER.unpack(data)
+    if magic != _MAGIC or version != _VERSION or record_size != TICK_DTYPE.itemsize:
+        return None
+    return count, first_ts, last_ts
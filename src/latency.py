@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import math
+import time
+import asyncio
+
+from typing import Set, Dict, List, Tuple, Iterable, Optional, Sequence
+
+from src.database import PriceRow
+
+STAGE_NETWORK = "exchange_receive"
+STAGE_PARSE = "receive_parsed"
+STAGE_PERSIST = "parsed_persisted"
+
+STAGES = (STAGE_NETWORK, STAGE_PARSE, STAGE_PERSIST)
+PERCENTILES = (50, 90, 99, 99.9)
+
+class HdrHistogram:
+    # Log-linear buckets over microseconds, every value kept within 10^-figures relative error.
+    def __init__(self, highest: int = 3_600_000_000, significant_figures: int = 2):
+        if not 1 <= significant_figures <= 5:
+            raise ValueError("Significant figures must be between 1 and 5")
+        self.highest = highest
+        self.significant_figures = significant_figures
+        self._sub_bits = math.ceil(math.log2(2 * 10 ** significant_figures))
+        self._shift = self._sub_bits - 1
+        self._half = 1 << self._shift
+        buckets = max(1, highest.bit_length() - self._sub_bits + 1)
+        self.counts = [0] * ((buckets + 1) * self._half)
+        self.count = 0
+        self.total = 0
+        self.min = 0
+        self.max = 0
+
+    def record(self, value: int) -> None:
+        if value < 0:
+            value = 0
+        elif value > self.highest:
+            value = self.highest
+        bucket = value.bit_length() - self._sub_bits
+        self.counts[value if bucket < 0 else (bucket << self._shift) + (value >> bucket)] += 1
+        if value > self.max:
+            self.max = value
+        if value < self.min or not self.count:
+            self.min = value
+        self.count += 1
+        self.total += value
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, p: float) -> int:
+        if not self.count:
+            return 0
+        target = max(1, math.ceil(round(p / 100 * self.count, 9)))
+        seen = 0
+        for (index, count) in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return min(self.__highest_equivalent(index), self.max)
+        return self.max
+
+    def percentiles(self, percentiles: Sequence[float] = PERCENTILES) -> Dict[str, int]:
+        return {f"p{p:g}": self.percentile(p) for p in percentiles}
+
+    def copy(self) -> HdrHistogram:
+        other = HdrHistogram(highest=self.highest, significant_figures=self.significant_figures)
+        other.counts = list(self.counts)
+        (other.count, other.total, other.min, other.max) = (self.count, self.total, self.min, self.max)
+        return other
+
+    def since(self, earlier: HdrHistogram) -> HdrHistogram:
+        # Counts recorded after `earlier` was copied, min and max are kept from the whole run.
+        other = self.copy()
+        other.counts = [a - b for (a, b) in zip(self.counts, earlier.counts)]
+        other.count = self.count - earlier.count
+        other.total = self.total - earlier.total
+        return other
+
+    def merge(self, other: HdrHistogram) -> None:
+        if len(other.counts) != len(self.counts):
+            raise ValueError("Histograms have different ranges")
+        self.counts = [a + b for (a, b) in zip(self.counts, other.counts)]
+        if other.count and (not self.count or other.min < self.min):
+            self.min = other.min
+        self.max = max(self.max, other.max)
+        self.count += other.count
+        self.total += other.total
+
+    def reset(self) -> None:
+        self.counts = [0] * len(self.counts)
+        self.count = self.total = self.min = self.max = 0
+
+    def __highest_equivalent(self, index: int) -> int:
+        bucket = index // self._half - 1
+        sub = index % self._half + self._half
+        if bucket < 0:
+            (bucket, sub) = (0, sub - self._half)
+        return ((sub + 1) << bucket) - 1
+
+class ClockOffset:
+    # Windowed minimum of receive minus exchange time: the venue's clock skew plus the fastest path.
+    def __init__(self, window_ms: int = 300_000, slots: int = 10):
+        self.slot_ms = max(1, window_ms // slots)
+        self.slots = slots
+        self.offset_us: Optional[int] = None
+        self._slot: Optional[int] = None
+        self._current = 0
+        self._minimums: List[Tuple[int, int]] = []
+
+    def update(self, delay_us: int, now_ms: int) -> int:
+        if now_ms // self.slot_ms == self._slot:
+            if delay_us < self._current:
+                self._current = delay_us
+                if delay_us < self.offset_us:
+                    self.offset_us = delay_us
+            return self.offset_us
+        return self.__rotate(slot=now_ms // self.slot_ms, delay_us=delay_us)
+
+    def __rotate(self, slot: int, delay_us: int) -> int:
+        if self._slot is not None:
+            self._minimums.append((self._slot, self._current))
+        self._minimums = [(s, d) for (s, d) in self._minimums if s > slot - self.slots]
+        (self._slot, self._current) = (slot, delay_us)
+        self.offset_us = min([delay_us] + [d for (_, d) in self._minimums])
+        return self.offset_us
+
+class VenueLatency:
+    def __init__(self, exchange: str, slow_ms: float = 1000.0, offset_window_ms: int = 300_000):
+        self.exchange = exchange
+        self.slow_us = int(slow_ms * 1000)
+        self.histograms = {stage: HdrHistogram() for stage in STAGES}
+        (self._network, self._parse, self._persist) = (self.histograms[s] for s in STAGES)
+        self.offset = ClockOffset(window_ms=offset_window_ms)
+        self.slow = 0
+        self._flagged: Set[str] = set()
+        self._pending: Dict[str, Tuple[int, int]] = {}
+
+    def observe(self, coin: str, exchange_ts: int, receive_ns: int, parsed_ns: int, forwarded: bool = True) -> bool:
+        receive_us = receive_ns // 1000
+        delay = receive_us - exchange_ts * 1000
+        latency = delay - self.offset.update(delay, receive_us // 1000)
+        self._network.record(latency)
+        self._parse.record((parsed_ns - receive_ns) // 1000)
+        if forwarded:
+            self._pending[coin] = (exchange_ts, parsed_ns)
+
+        if latency > self.slow_us:
+            self.slow += 1
+            self._flagged.add(coin)
+            return True
+        self._flagged.discard(coin)
+        return False
+
+    def persisted(self, coin: str, exchange_ts: int, persisted_ns: int) -> None:
+        # The sink keeps the latest price per coin, so only that tick reaches the database.
+        pending = self._pending.pop(coin, None)
+        if pending is None:
+            return
+        if pending[0] != exchange_ts:
+            self._pending[coin] = pending
+            return
+        self._persist.record((persisted_ns - pending[1]) // 1000)
+
+    def is_slow(self, coin: str) -> bool:
+        return coin in self._flagged
+
+    def forget(self, coin: str) -> None:
+        self._flagged.discard(coin)
+        self._pending.pop(coin, None)
+
+class LatencyTracer:
+    def __init__(
+        self,
+        exchanges: Iterable[str],
+        slow_ms: float = 1000.0,
+        offset_window_ms: int = 300_000,
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+    ):
+        self.venues = {
+            e: VenueLatency(exchange=e, slow_ms=slow_ms, offset_window_ms=offset_window_ms) for e in exchanges
+        }
+        # Venues are only touched on this loop, the writer thread hands its rows over.
+        self.loop = loop
+        self._reported = self.__copies()
+
+    def on_written(self, rows: List[PriceRow]) -> None:
+        now_ns = time.time_ns()
+        if self.loop is None:
+            self.__persisted(rows=rows, now_ns=now_ns)
+        elif not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self.__persisted, rows, now_ns)
+
+    def __persisted(self, rows: List[PriceRow], now_ns: int) -> None:
+        for (coin, exchange, _, timestamp) in rows:
+            venue = self.venues.get(exchange)
+            if venue is not None:
+                venue.persisted(coin=coin, exchange_ts=timestamp, persisted_ns=now_ns)
+
+    def is_slow(self, exchange: str, coin: str) -> bool:
+        venue = self.venues.get(exchange)
+        return venue is not None and venue.is_slow(coin)
+
+    def forget(self, coin: str) -> None:
+        for venue in self.venues.values():
+            venue.forget(coin)
+
+    def stats(self, percentiles: Sequence[float] = PERCENTILES) -> Dict[str, Dict]:
+        # Milliseconds, per exchange and stage.
+        return {
+            exchange: {
+                "offset_ms": (venue.offset.offset_us or 0) / 1000,
+                "slow": venue.slow,
+                "stages": {
+                    stage: {"count": h.count, **{k: v / 1000 for (k, v) in h.percentiles(percentiles).items()}}
+                    for (stage, h) in venue.histograms.items()
+                },
+            } for (exchange, venue) in self.venues.items()
+        }
+
+    def summary(self) -> List[str]:
+        # One line per exchange over the ticks seen since the previous summary.
+        current = self.__copies()
+        lines = []
+        for (exchange, venue) in self.venues.items():
+            interval = {s: current[exchange][s].since(self._reported[exchange][s]) for s in STAGES}
+            if not interval[STAGE_NETWORK].count:
+                continue
+            parts = [
+                f"{stage} p50 {h.percentile(50) / 1000:.1f} p99 {h.percentile(99) / 1000:.1f}"
+                for (stage, h) in interval.items() if h.count
+            ]
+            lines.append(
+                f"{exchange}: {interval[STAGE_NETWORK].count} ticks, " + ", ".join(parts)
+                + f" ms, offset {(venue.offset.offset_us or 0) / 1000:+.1f} ms, slow {venue.slow}"
+            )
+        self._reported = current
+        return lines
+
+    def __copies(self) -> Dict[str, Dict[str, HdrHistogram]]:
+        return {e: {s: h.copy() for (s, h) in v.histograms.items()} for (e, v) in self.venues.items()}
@@ -3,15 +3,72 @@ from __future__ import annotations
 import signal
 import asyncio
 
+from src.basics import project_path
 from src.config import load_config
 from src.database import Database
+from src.hub import QuoteHub
+from src.metrics import Registry, MetricsServer
+from src.watchdog import LoopWatchdog
+from src.profiler import SamplingProfiler, AllocationTracer
+from src.writer import DatabaseWriter
 
 from src.manager import main_loop, MainManager
 
 async def main(shutdown_event: asyncio.Event) -> None:
     settings = load_config()
     database = Database()
-    main_manager = MainManager(settings=settings, database=database)
+    metrics = Registry()
+    writer = DatabaseWriter(
+        database=database,
+        capacity=settings.writer.queue_size,
+        policy=settings.writer.backpressure,
+        metrics=metrics,
+    )
+    writer.start()
+    await asyncio.wrap_future(writer.call(database.load_registry))
+    hub = None
+    if settings.hub.enabled:
+        hub = QuoteHub(
+            host=settings.hub.host,
+            port=settings.hub.port,
+            max_pending=settings.hub.max_pending,
+            interval_ms=settings.hub.interval_ms,
+            send_timeout_seconds=settings.hub.send_timeout_seconds,
+            metrics=metrics,
+        )
+        await hub.start()
+        print(f"📡 Fan-out hub on ws://{hub.host}:{hub.port}/ws")
+    main_manager = MainManager(settings=settings, database=database, writer=writer, metrics=metrics, hub=hub)
+    watchdog = None
+    if settings.watchdog.enabled:
+        watchdog = LoopWatchdog(
+            interval_ms=settings.watchdog.interval_ms,
+            threshold_ms=settings.watchdog.threshold_ms,
+            stack_depth=settings.watchdog.stack_depth,
+            metrics=metrics,
+        )
+        watchdog.start()
+    server = None
+    if settings.metrics.enabled:
+        server = MetricsServer(registry=metrics, host=settings.metrics.host, port=settings.metrics.port)
+        await server.start()
+        print(f"📈 Metrics on http://{server.host}:{server.port}/metrics")
+    allocations = None
+    if settings.profiler.enabled and hasattr(signal, "SIGUSR1"):
+        loop = asyncio.get_running_loop()
+        profiler = SamplingProfiler(
+            directory=project_path(settings.profiler.directory),
+            duration_seconds=settings.profiler.duration_seconds,
+            interval_ms=settings.profiler.interval_ms,
+        )
+        allocations = AllocationTracer(
+            directory=project_path(settings.profiler.directory),
+            top=settings.profiler.allocation_top,
+            frames=settings.profiler.allocation_frames,
+        )
+        loop.add_signal_handler(signal.SIGUSR1, profiler.start)
+        # Snapshots of a large heap take a while, keep them off the loop.
+        loop.add_signal_handler(signal.SIGUSR2, lambda: loop.run_in_executor(None, allocations.dump))
     main_promise = asyncio.create_task(coro=main_loop(manager=main_manager))
 
     shutdown_task = asyncio.create_task(shutdown_event.wait())
@@ -23,6 +80,16 @@ async def main(shutdown_event: asyncio.Event) -> None:
         await main_manager.shutdown()
         await asyncio.gather(main_promise, return_exceptions=True)
 
+    if server is not None:
+        await server.stop()
+    if hub is not None:
+        await hub.stop()
+    if watchdog is not None:
+        await watchdog.stop()
+    if allocations is not None:
+        allocations.stop()
+
+    writer.close()
     database.close()
 
 if __name__ == "__main__":
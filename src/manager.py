@@ -1,107 +1,563 @@
+import time
 import asyncio
+import itertools
+import numpy as np
 
-from typing import List
+from typing import List, Dict, Optional
 
-from config import Settings
+from src.config import Settings, Exchange as ExchangeSettings
 
-from src.basics import StreamCallbacks, chunked, are_contents_the_same
+from src.basics import StreamCallbacks, time_millis, project_path, are_contents_the_same
+from src.board import QuoteBoard
 from src.database import Database
+from src.detector import EVENT_OPEN, SpreadEvent, SpreadDetector
+from src.hub import QuoteHub
+from src.journal import TickJournal
+from src.latency import STAGES, LatencyTracer
+from src.metrics import Registry
+from src.quote_feed import QuoteFeed
+from src.sink import PriceSink
+from src.writer import DatabaseWriter
+from src.workers import ProcessSupervisor
+
+from src.exchanges.base import BaseStreamer, StreamerMetrics
+from src.exchanges.conflation import Conflator
+from src.exchanges.planner import ShardPlanner
+from src.exchanges.capture import FrameRecorder
 
 from src.interests.bubble import Bubble
-from src.interests.bubbles import bubbles_fetch, bubbles_filter
+from src.interests.cache import ListingCache
+from src.interests.listings import ListingIndex
+from src.interests.scheduler import TokenBucket
+from src.interests.coingecko import listing_index
+from src.interests.movers import MoverEngine
+from src.interests.bubbles import BubblesSource, bubbles_fetch, bubbles_filter
 
-from src.exchanges.mexc.mexc import ALIAS as ALIAS_MEXC, run as run_mexc
+from src.exchanges.mexc.mexc import ALIAS as ALIAS_MEXC, run as run_mexc, run_market as run_mexc_market
 from src.exchanges.bybit import ALIAS as ALIAS_BYBIT, run as run_bybit
-from src.exchanges.binance import ALIAS as ALIAS_BINANCE, run as run_binance
+from src.exchanges.binance import ALIAS as ALIAS_BINANCE, run as run_binance, run_market as run_binance_market
 from src.exchanges.coinbase import ALIAS as ALIAS_COINBASE, run as run_coinbase
 
+MODE_SINGLE = "single"
+MODE_PROCESS = "process"
+
 class MainManager:
-    _CHUNK_SIZE_MEXC = 30
-    _CHUNK_SIZE_COINBASE = 25
+    _REBALANCE_INTERVAL_SECONDS = 60
+    # CoinGecko pacing stretches a refresh to minutes, far past the default buckets.
+    _REFRESH_BUCKETS = (1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 180.0, 300.0, 600.0)
 
-    def __init__(self, settings: Settings, database: Database):
+    def __init__(
+        self,
+        settings: Settings,
+        database: Database,
+        writer: DatabaseWriter,
+        metrics: Optional[Registry] = None,
+        hub: Optional[QuoteHub] = None,
+    ):
         self.settings = settings
         self.database = database
+        self.writer = writer
+        self.metrics = metrics or Registry()
+        self.hub = hub
+        self.sink = PriceSink(
+            writer=writer,
+            flush_interval_ms=settings.sink.flush_interval_ms,
+            max_buffer_size=settings.sink.max_buffer_size,
+            metrics=self.metrics,
+        )
+        self.journal: Optional[TickJournal] = None
+        if settings.journal.enabled:
+            self.journal = TickJournal(
+                directory=project_path(settings.journal.directory),
+                segment_records=settings.journal.segment_records,
+                retention_ms=int(settings.journal.retention_hours * 3_600_000),
+                segment_ms=int(settings.journal.segment_minutes * 60_000),
+            )
+        self.board = self._build_board(watchlist=[])
+        self.detector: Optional[SpreadDetector] = None
+        if settings.detector.enabled:
+            self.detector = SpreadDetector(
+                entry_spread_pct=settings.detector.entry_spread_pct,
+                exit_spread_pct=settings.detector.exit_spread_pct,
+                on_event=self._on_spread_event,
+                max_age_ms=settings.detector.max_quote_age_ms,
+            )
+        self.conflators: Dict[str, Conflator] = {}
+        if settings.conflation.enabled:
+            self.conflators = {
+                e.name: Conflator(
+                    deadband=settings.conflation.deadband,
+                    min_interval_ms=settings.conflation.min_interval_ms,
+                    max_staleness_ms=settings.conflation.max_staleness_ms,
+                ) for e in settings.exchanges
+            }
+        self.listings = ListingCache(
+            path=project_path(settings.coingecko.cache_path),
+            ttl_ms=int(settings.coingecko.cache_ttl_hours * 3_600_000),
+            negative_ttl_ms=int(settings.coingecko.negative_ttl_minutes * 60_000),
+        )
+        self.coingecko_bucket = TokenBucket(
+            capacity=settings.coingecko.rate_capacity,
+            refill_per_second=settings.coingecko.rate_refill_per_second,
+        )
+        self.listing_index: Optional[ListingIndex] = None
+        if settings.coingecko.use_exchange_index:
+            self.listing_index = listing_index(ttl_ms=int(settings.coingecko.index_ttl_hours * 3_600_000))
+        self.planners: Dict[str, ShardPlanner] = {
+            e.name: ShardPlanner(
+                streams_per_connection=e.streams_per_connection,
+                args_per_message=e.args_per_message,
+                messages_per_second=e.messages_per_second,
+                max_frames_per_second=e.max_frames_per_second,
+            ) for e in settings.exchanges
+        }
+        self.bubbles_source = BubblesSource()
+        self.discovery: Optional[MoverEngine] = None
+        if settings.discovery.enabled:
+            self.discovery = MoverEngine(
+                filter=settings.filter,
+                exchanges=[e.name for e in settings.exchanges],
+                on_change=self._on_movers,
+                resolution_ms=settings.discovery.resolution_seconds * 1000,
+                evaluate_interval_ms=int(settings.discovery.evaluate_interval_seconds * 1000),
+                hold_ms=int(settings.discovery.hold_minutes * 60_000),
+            )
+        self.latency: Optional[LatencyTracer] = None
+        if settings.latency.enabled:
+            self.latency = LatencyTracer(
+                exchanges=[e.name for e in settings.exchanges],
+                slow_ms=settings.latency.slow_ms,
+                offset_window_ms=settings.latency.offset_window_seconds * 1000,
+            )
+            writer.on_written = self.latency.on_written
+        self.supervisor: Optional[ProcessSupervisor] = None
+        if settings.execution.mode == MODE_PROCESS:
+            self.supervisor = ProcessSupervisor(
+                exchanges=settings.exchanges,
+                conflation=settings.conflation,
+                capacity=settings.execution.max_coins,
+                processes_per_exchange=settings.execution.processes_per_exchange,
+                heartbeat_timeout_seconds=settings.execution.heartbeat_timeout_seconds,
+                max_restart_delay_seconds=settings.execution.max_restart_delay_seconds,
+            )
+        elif settings.execution.mode != MODE_SINGLE:
+            raise ValueError(f"Unknown execution mode: {settings.execution.mode}")
+        self.feed: Optional[QuoteFeed] = None
+        if settings.feed.enabled:
+            self.feed = QuoteFeed.create(
+                name=settings.feed.name,
+                capacity=settings.feed.max_coins,
+                exchanges=[e.name for e in settings.exchanges],
+            )
+        self.recorders: Dict[str, FrameRecorder] = {}
+        if settings.capture.enabled:
+            self.recorders = {
+                e.name: FrameRecorder.in_directory(directory=project_path(settings.capture.directory), name=e.name)
+                for e in settings.exchanges
+            }
+        self.fetched: List[Bubble] = []
         self.watchlist: List[Bubble] = []
-        self.asynchronous: List[asyncio.Task] = []
+        self.streamers: Dict[str, List[BaseStreamer]] = {}
+        self._frames: Dict[BaseStreamer, int] = {}
+        self._shards: Dict[BaseStreamer, int] = {}
+        self._rebalancing: Optional[asyncio.Task] = None
+        self._summaries: Optional[asyncio.Task] = None
+        self._polling: Optional[asyncio.Task] = None
+        self._expiring: Optional[asyncio.Task] = None
+        self._market_streamers: List[BaseStreamer] = []
+        self._starting = asyncio.Lock()
+        self._register_metrics()
 
     async def run(self) -> bool:
+        started = time.perf_counter()
+        (watchlist,) = await bubbles_fetch(
+            [self.settings.filter],
+            source=self.bubbles_source,
+            cache=self.listings,
+            bucket=self.coingecko_bucket,
+            index=self.listing_index,
+            max_attempts=self.settings.coingecko.max_attempts,
+        )
+        self._refresh_seconds.observe(time.perf_counter() - started)
+        if self.discovery is not None:
+            self.discovery.set_universe(self.bubbles_source.snapshot)
+            self._start_discovery()
+        if not watchlist:
+            return False
+        self.fetched = watchlist
+        return await self._apply_watchlist()
+
+    async def shutdown(self):
+        await self._stop_discovery()
+        await self._stop_streams()
+        if self._summaries is not None:
+            self._summaries.cancel()
+            await asyncio.gather(self._summaries, return_exceptions=True)
+            self._summaries = None
+        if self.latency is not None and self.writer.on_written == self.latency.on_written:
+            self.writer.on_written = None
+        if self.supervisor is not None:
+            await self.supervisor.stop()
+            self.supervisor.close()
+        if self.feed is not None:
+            self.feed.close()
+            self.feed = None
+        await self.sink.stop(flush=self.settings.sink.flush_on_shutdown)
+        if self.journal is not None:
+            self.journal.close()
+        for recorder in self.recorders.values():
+            recorder.close()
+        await self.bubbles_source.close()
+        self.watchlist.clear()
+
+    async def _apply_watchlist(self, movers: Optional[List[Bubble]] = None) -> bool:
         def _symbols(bubbles: List[Bubble]) -> List[str]:
             return [b.symbol for b in bubbles]
 
-        watchlist = await bubbles_fetch(self.settings.filter)
-        if not watchlist:
-            return False
-        if are_contents_the_same(_symbols(watchlist), _symbols(self.watchlist)):
-            return False
+        async with self._starting:
+            fetched = {b.symbol for b in self.fetched}
+            if movers is None:
+                movers = self.discovery.movers if self.discovery is not None else []
+            watchlist = self.fetched + [b for b in movers if b.symbol not in fetched]
+            if are_contents_the_same(_symbols(watchlist), _symbols(self.watchlist)):
+                return False
+            await self._start(watchlist)
+            return True
 
-        await self._start(watchlist)
-        return True
+    async def _on_movers(self, movers: List[Bubble]):
+        if self.fetched:
+            await self._apply_watchlist(movers=movers)
 
-    async def shutdown(self):
-        if self.asynchronous:
-            for task in self.asynchronous:
-                if not task.done():
-                    task.cancel()
-            await asyncio.gather(*self.asynchronous, return_exceptions=True)
-            self.asynchronous.clear()
+    def _start_discovery(self):
+        if self._market_streamers:
+            return
+        for exchange in self.settings.exchanges:
+            if exchange.name == ALIAS_MEXC:
+                run = run_mexc_market
+            elif exchange.name == ALIAS_BINANCE:
+                run = run_binance_market
+            else:
+                continue
+            self._market_streamers.append(
+                run(
+                    url=exchange.websocket,
+                    on_tickers=lambda tickers, alias=exchange.name: self.discovery.update(venue=alias, tickers=tickers),
+                ),
+            )
+        self.discovery.start()
 
-        self.watchlist.clear()
-        self.database.clear()
+    async def _stop_discovery(self):
+        if self.discovery is not None:
+            await self.discovery.stop()
+        await asyncio.gather(*(s.stop() for s in self._market_streamers), return_exceptions=True)
+        self._market_streamers.clear()
+
+    async def _stop_streams(self):
+        for task in (self._rebalancing, self._polling, self._expiring):
+            if task is not None:
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+        (self._rebalancing, self._polling, self._expiring) = (None, None, None)
+
+        streamers = [s for shards in self.streamers.values() for s in shards]
+        await asyncio.gather(*(s.stop() for s in streamers), return_exceptions=True)
+        self.streamers.clear()
+        self._frames.clear()
+        self._shards.clear()
 
     async def _start(self, watchlist: List[Bubble]):
-        await self.shutdown()
+        if self.latency is not None and self.latency.loop is None:
+            self.latency.loop = asyncio.get_running_loop()
+        coins = [b.symbol for b in watchlist]
+        removed = {b.symbol for b in self.watchlist} - set(coins)
+
+        await asyncio.wrap_future(
+            self.writer.call(
+                self.database.register,
+                coins=coins,
+                exchanges=[e.name for e in self.settings.exchanges],
+            ),
+        )
         self.watchlist = watchlist
+        self.board = self.board.rebuild(coins=coins)
+        if self.feed is not None:
+            self.feed.set_watchlist(coins)
+        for coin in removed:
+            if self.detector is not None:
+                self.detector.forget(coin)
+            for conflator in self.conflators.values():
+                conflator.forget(coin)
+            if self.latency is not None:
+                self.latency.forget(coin)
+            if self.hub is not None:
+                self.hub.forget(coin)
 
+        if self.supervisor is not None:
+            self.supervisor.set_watchlist(coins)
+            self.supervisor.start()
+        pairs = []
         for exchange in self.settings.exchanges:
             symbols = [b.symbol for b in bubbles_filter(bubbles=watchlist, exchange=exchange.name)]
-            if not symbols: continue
+            pairs.extend((s, exchange.name) for s in symbols)
+            if self.supervisor is not None:
+                self.supervisor.assign(exchange=exchange.name, coins=symbols)
+            else:
+                await self._update_streams(exchange=exchange, symbols=symbols)
 
-            callbacks = self._build_callbacks(alias=exchange.name, coins=symbols)
-            if exchange.name == ALIAS_MEXC:
-                for chunk in chunked(iterable=symbols, size=self._CHUNK_SIZE_MEXC):
-                    self.asynchronous.append(
-                        run_mexc(
-                            url=exchange.websocket,
-                            coins=symbols,
-                            callbacks={c: callbacks[c] for c in chunk},
-                        ),
-                    )
-            elif exchange.name == ALIAS_BYBIT:
-                self.asynchronous.append(
-                    run_bybit(
-                        url=exchange.websocket,
-                        coins=symbols,
-                        callbacks=callbacks,
-                    ),
-                )
-            elif exchange.name == ALIAS_BINANCE:
-                self.asynchronous.append(
-                    run_binance(
-                        url=exchange.websocket,
-                        coins=symbols,
-                        callbacks=callbacks,
-                    ),
+        self.sink.flush()
+        await asyncio.wrap_future(self.writer.call(self.database.retain_prices, pairs=pairs))
+        self.sink.start()
+        if self._rebalancing is None:
+            self._rebalancing = asyncio.create_task(coro=self._rebalance_loop())
+        if self.latency is not None and self._summaries is None:
+            self._summaries = asyncio.create_task(coro=self._summary_loop())
+        if self.supervisor is not None and self._polling is None:
+            self._polling = asyncio.create_task(coro=self._poll_loop())
+        if self.detector is not None and self._expiring is None:
+            self._expiring = asyncio.create_task(coro=self._expire_loop())
+
+    async def _update_streams(self, exchange: ExchangeSettings, symbols: List[str]):
+        shards = self.streamers.setdefault(exchange.name, [])
+        wanted = set(symbols)
+        for streamer in list(shards):
+            stale = [c for c in streamer.coins if c not in wanted]
+            if len(stale) == len(streamer.coins):
+                await streamer.stop()
+                shards.remove(streamer)
+                self._frames.pop(streamer, None)
+                self._shards.pop(streamer, None)
+            elif stale:
+                await streamer.unsubscribe(coins=stale)
+
+        subscribed = {c for s in shards for c in s.coins}
+        added = [c for c in symbols if c not in subscribed]
+        if not added:
+            return
+
+        callbacks = self._build_callbacks(alias=exchange.name, coins=added)
+        planner = self.planners[exchange.name]
+        (assigned, fresh) = planner.place(shards=[s.coins for s in shards], symbols=added)
+        for (streamer, chunk) in zip(list(shards), assigned):
+            if chunk:
+                await streamer.subscribe(coins=chunk, callbacks=callbacks)
+        for chunk in fresh:
+            shards.append(
+                self._run_streamer(
+                    exchange=exchange,
+                    coins=chunk,
+                    callbacks={c: callbacks[c] for c in chunk},
+                ),
+            )
+
+    async def _rebalance_loop(self):
+        while True:
+            await asyncio.sleep(self._REBALANCE_INTERVAL_SECONDS)
+            await self._rebalance(interval_seconds=self._REBALANCE_INTERVAL_SECONDS)
+
+    async def _poll_loop(self):
+        interval = self.settings.execution.poll_interval_ms / 1000
+        coin_ids = self.database.coin_ids
+        exchange_ids = self.database.exchange_ids
+        while True:
+            await asyncio.sleep(interval)
+            for (coin, alias, price, timestamp) in self.supervisor.poll():
+                self._on_tick(
+                    alias=alias,
+                    coin=coin,
+                    coin_id=coin_ids.get(coin),
+                    exchange_id=exchange_ids.get(alias),
+                    price=price,
+                    timestamp=timestamp,
                 )
-            elif exchange.name == ALIAS_COINBASE:
-                for chunk in chunked(iterable=symbols, size=self._CHUNK_SIZE_COINBASE):
-                    self.asynchronous.append(
-                        run_coinbase(
-                            url=exchange.websocket,
+
+    async def _expire_loop(self):
+        # Ticks expire stale legs on their own, this catches coins whose every feed went quiet.
+        interval = min(1.0, self.settings.detector.max_quote_age_ms / 2000)
+        while True:
+            await asyncio.sleep(interval)
+            self.detector.expire(now_ms=time_millis())
+
+    async def _summary_loop(self):
+        while True:
+            await asyncio.sleep(self.settings.latency.summary_interval_seconds)
+            for line in self.latency.summary():
+                print(f"⏱️ {line}")
+
+    async def _rebalance(self, interval_seconds: float):
+        for exchange in self.settings.exchanges:
+            planner = self.planners[exchange.name]
+            shards = self.streamers.get(exchange.name, [])
+            for streamer in list(shards):
+                rate = (streamer.frames - self._frames.get(streamer, 0)) / interval_seconds
+                self._frames[streamer] = streamer.frames
+                moved = planner.spill(shard=streamer.coins, frames_per_second=rate)
+                if not moved:
+                    continue
+
+                callbacks = {c: streamer.callbacks[c] for c in moved}
+                await streamer.unsubscribe(coins=moved)
+                for chunk in planner.plan(moved):
+                    shards.append(
+                        self._run_streamer(
+                            exchange=exchange,
                             coins=chunk,
                             callbacks={c: callbacks[c] for c in chunk},
                         ),
                     )
-            else:
-                raise ValueError(f"Unknown exchange: {exchange.name}")
+
+    def _run_streamer(self, exchange: ExchangeSettings, coins: List[str], callbacks: StreamCallbacks) -> BaseStreamer:
+        if exchange.name == ALIAS_MEXC:
+            run = run_mexc
+        elif exchange.name == ALIAS_BYBIT:
+            run = run_bybit
+        elif exchange.name == ALIAS_BINANCE:
+            run = run_binance
+        elif exchange.name == ALIAS_COINBASE:
+            run = run_coinbase
+        else:
+            raise ValueError(f"Unknown exchange: {exchange.name}")
+
+        # Reuse the lowest free shard number so the label set stays bounded across restarts.
+        used = {self._shards.get(s) for s in self.streamers.get(exchange.name, [])}
+        shard = next(i for i in itertools.count() if i not in used)
+        streamer = run(
+            url=exchange.websocket,
+            coins=coins,
+            callbacks=callbacks,
+            conflator=self.conflators.get(exchange.name),
+            planner=self.planners[exchange.name],
+            recorder=self.recorders.get(exchange.name),
+            metrics=StreamerMetrics(registry=self.metrics, exchange=exchange.name, shard=str(shard)),
+            latency=self.latency.venues.get(exchange.name) if self.latency is not None else None,
+        )
+        self._shards[streamer] = shard
+        return streamer
 
     def _build_callbacks(self, alias: str, coins: List[str]) -> StreamCallbacks:
+        exchange_id = self.database.exchange_ids.get(alias)
         return {
-            item: lambda price, timestamp, coin=item: self.database.insert_price(
-                coin_name=coin, exch_name=alias, exch_price=price, timestamp=timestamp
+            item: lambda price, timestamp, coin=item, coin_id=self.database.coin_ids.get(item): self._on_tick(
+                alias=alias, coin=coin, coin_id=coin_id, exchange_id=exchange_id, price=price, timestamp=timestamp
             ) for item in coins
         }
 
+    def latency_stats(self) -> Dict[str, Dict]:
+        return self.latency.stats() if self.latency is not None else {}
+
+    def conflation_stats(self) -> Dict[str, Dict[str, int]]:
+        return {
+            alias: {"forwarded": c.forwarded, "suppressed": c.suppressed}
+            for (alias, c) in self.conflators.items()
+        }
+
+    def _register_metrics(self) -> None:
+        registry = self.metrics
+        self._refresh_seconds = registry.histogram(
+            "watchlist_refresh_seconds", "Time to fetch and filter the watchlist", buckets=self._REFRESH_BUCKETS,
+        ).labels()
+        registry.gauge("watchlist_size", "Coins on the watchlist").labels().set_function(lambda: len(self.watchlist))
+        registry.counter("listing_cache_hits_total", "Listing cache hits").labels().set_function(lambda: self.listings.hits)
+        registry.counter("listing_cache_misses_total", "Listing cache misses").labels().set_function(lambda: self.listings.misses)
+        registry.counter(
+            "coingecko_lookup_failures_total", "CoinGecko lookups that ran out of attempts",
+        ).labels().set_function(lambda: self.coingecko_bucket.failures)
+        registry.counter(
+            "bubbles_not_modified_total", "Bubbles refreshes answered with 304",
+        ).labels().set_function(lambda: self.bubbles_source.not_modified)
+        forwarded = registry.counter("conflation_forwarded_total", "Ticks passed by the conflator", ("exchange",))
+        suppressed = registry.counter("conflation_suppressed_total", "Ticks suppressed by the conflator", ("exchange",))
+        for (alias, conflator) in self.conflators.items():
+            forwarded.labels(alias).set_function(lambda c=conflator: c.forwarded)
+            suppressed.labels(alias).set_function(lambda c=conflator: c.suppressed)
+        if self.latency is not None:
+            latency = registry.gauge("latency_ms", "Latency percentiles since start", ("exchange", "stage", "quantile"))
+            offset = registry.gauge("clock_offset_ms", "Estimated exchange clock offset", ("exchange",))
+            slow = registry.counter("slow_quotes_total", "Quotes above the one-way latency threshold", ("exchange",))
+            for (alias, venue) in self.latency.venues.items():
+                for stage in STAGES:
+                    for quantile in (0.5, 0.99):
+                        latency.labels(alias, stage, quantile).set_function(
+                            lambda h=venue.histograms[stage], q=quantile: h.percentile(q * 100) / 1000,
+                        )
+                offset.labels(alias).set_function(lambda v=venue: (v.offset.offset_us or 0) / 1000)
+                slow.labels(alias).set_function(lambda v=venue: v.slow)
+        if self.supervisor is not None:
+            frames = registry.counter("worker_frames_total", "Websocket frames received by worker processes", ("exchange",))
+            restarts = registry.counter("worker_restarts_total", "Worker processes restarted after a crash", ("exchange",))
+            for exchange in self.settings.exchanges:
+                frames.labels(exchange.name).set_function(lambda alias=exchange.name: self.supervisor.frames(alias))
+                restarts.labels(exchange.name).set_function(
+                    lambda alias=exchange.name: sum(n for ((e, _), n) in self.supervisor.restarts.items() if e == alias),
+                )
+        if self.feed is not None:
+            registry.gauge("quote_feed_generation", "Symbol table version of the shared memory quote feed").labels().set_function(
+                lambda: self.feed.generation if self.feed is not None else 0,
+            )
+        # The detector only reports spreads crossing its thresholds, the board shows where the watchlist stands.
+        registry.gauge(
+            "board_paired_coins", "Watchlist coins with fresh quotes on two or more exchanges",
+        ).labels().set_function(lambda: int((self.board.snapshot().quotes > 1).sum()))
+        registry.gauge(
+            "board_max_spread_pct", "Widest fresh cross-exchange spread on the watchlist",
+        ).labels().set_function(self._widest_spread)
+        streams = registry.gauge("streams", "Open websocket shards", ("exchange",))
+        for exchange in self.settings.exchanges:
+            streams.labels(exchange.name).set_function(lambda alias=exchange.name: len(self.streamers.get(alias, [])))
+
+    def _widest_spread(self) -> float:
+        spreads = self.board.snapshot().spread_pct
+        spreads = spreads[~np.isnan(spreads)]
+        return float(spreads.max()) if spreads.size else 0.0
+
+    def _build_board(self, watchlist: List[Bubble]) -> QuoteBoard:
+        return QuoteBoard(
+            coins=[b.symbol for b in watchlist],
+            exchanges=[e.name for e in self.settings.exchanges],
+            max_age_ms=self.settings.board.max_quote_age_ms,
+        )
+
+    def _on_tick(
+        self,
+        alias: str,
+        coin: str,
+        coin_id: Optional[int],
+        exchange_id: Optional[int],
+        price: float,
+        timestamp: int,
+    ) -> None:
+        self.sink.push(coin_name=coin, exch_name=alias, exch_price=price, timestamp=timestamp)
+        self.board.update(coin=coin, exchange=alias, price=price, timestamp=timestamp)
+        if self.feed is not None:
+            self.feed.publish(coin, alias, price, timestamp)
+        if self.hub is not None:
+            self.hub.publish_quote(coin, alias, price, timestamp)
+        if self.detector is not None:
+            self.detector.update(coin=coin, exchange=alias, price=price, timestamp=timestamp)
+        if self.journal is not None and coin_id is not None and exchange_id is not None:
+            self.journal.append(
+                coin_id=coin_id,
+                exchange_id=exchange_id,
+                price=price,
+                exchange_ts=timestamp,
+                receive_ts=time_millis(),
+            )
+
+    def _on_spread_event(self, event: SpreadEvent) -> None:
+        if self.hub is not None:
+            self.hub.publish_spread(event)
+        if event.kind == EVENT_OPEN:
+            slow = [
+                e for e in (event.buy_exchange, event.sell_exchange)
+                if self.latency is not None and self.latency.is_slow(exchange=e, coin=event.coin)
+            ]
+            print(
+                f"💰 {event.coin.upper()}: buy {event.buy_exchange} @ {event.buy_price}, "
+                f"sell {event.sell_exchange} @ {event.sell_price} ({event.spread_pct:.2f}%)"
+                + (f" ⚠️ slow quote from {', '.join(slow)}" if slow else "")
+            )
+        else:
+            print(f"🏁 {event.coin.upper()}: spread closed ({event.spread_pct:.2f}%)")
+
 async def main_loop(manager: MainManager, interval_seconds: int = 1800):
     while True:
         start = asyncio.get_event_loop().time()
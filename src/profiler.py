@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import sys
+import time
+import threading
+import tracemalloc
+
+from types import FrameType
+from typing import List, Optional
+from pathlib import Path
+from datetime import datetime, timezone
+from collections import Counter
+
+def _stamp() -> str:
+    return datetime.now(tz=timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+
+def _label(frame: FrameType) -> str:
+    code = frame.f_code
+    return f"{getattr(code, 'co_qualname', code.co_name)} ({Path(code.co_filename).name})"
+
+class SamplingProfiler:
+    __THREAD_NAME = "sampling-profiler"
+    __SUFFIX = ".collapsed"
+
+    def __init__(self, directory: Path, duration_seconds: float = 30.0, interval_ms: float = 5.0):
+        self.directory = Path(directory)
+        self.duration_seconds = duration_seconds
+        self.interval_ms = interval_ms
+        self.last_path: Optional[Path] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> bool:
+        if self.running:
+            print("🔬 Profile already running")
+            return False
+        self._thread = threading.Thread(target=self.__run, name=self.__THREAD_NAME, daemon=True)
+        self._thread.start()
+        return True
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+
+    def __run(self) -> None:
+        started = _stamp()
+        print(f"🔬 Sampling every {self.interval_ms:g} ms for {self.duration_seconds:g}s")
+        stacks = self.__sample()
+        path = self.directory / f"profile-{started}-{_stamp()}{self.__SUFFIX}"
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with path.open(mode="w", encoding="utf-8") as stream:
+                # Collapsed stacks, one per line, ready for flamegraph.pl or speedscope.
+                for (stack, count) in sorted(stacks.items()):
+                    stream.write(f"{stack} {count}\n")
+        except OSError as e:
+            print("⚠️ Profile write failed:", e)
+            return
+        self.last_path = path
+        print(f"🔬 Profile with {sum(stacks.values())} samples written to {path}")
+
+    def __sample(self) -> Counter:
+        own = threading.get_ident()
+        names = {}
+        stacks: Counter = Counter()
+        interval = self.interval_ms / 1000
+        deadline = time.monotonic() + self.duration_seconds
+        while time.monotonic() < deadline:
+            for (ident, frame) in sys._current_frames().items():
+                if ident == own:
+                    continue
+                if ident not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                labels: List[str] = []
+                while frame is not None:
+                    labels.append(_label(frame))
+                    frame = frame.f_back
+                labels.append(names.get(ident, str(ident)))
+                stacks[";".join(reversed(labels))] += 1
+            time.sleep(interval)
+        return stacks
+
+class AllocationTracer:
+    __SUFFIX = ".txt"
+
+    def __init__(self, directory: Path, top: int = 25, frames: int = 1):
+        self.directory = Path(directory)
+        self.top = top
+        self.frames = frames
+        self.last_path: Optional[Path] = None
+        self._previous: Optional[tracemalloc.Snapshot] = None
+        self._lock = threading.Lock()
+
+    def dump(self) -> Optional[Path]:
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                # Allocations made before tracing started are invisible, the next dump has them.
+                tracemalloc.start(self.frames)
+                print("🧮 Tracing allocations, send the signal again for a snapshot")
+                return None
+            try:
+                return self.__dump()
+            except OSError as e:
+                print("⚠️ Allocation snapshot failed:", e)
+                return None
+
+    def stop(self) -> None:
+        with self._lock:
+            if tracemalloc.is_tracing():
+                tracemalloc.stop()
+            self._previous = None
+
+    def __dump(self) -> Path:
+        snapshot = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ])
+        (current, peak) = tracemalloc.get_traced_memory()
+        lines = [f"# {_stamp()} traced {current / 1_048_576:.1f} MB, peak {peak / 1_048_576:.1f} MB", "", "# top"]
+        for statistic in snapshot.statistics("traceback" if self.frames > 1 else "lineno")[:self.top]:
+            lines.append(str(statistic))
+            if self.frames > 1:
+                lines.extend(f"    {line}" for line in statistic.traceback.format())
+        if self._previous is not None:
+            lines.extend(["", "# growth since previous snapshot"])
+            lines.extend(str(d) for d in snapshot.compare_to(self._previous, "lineno")[:self.top])
+        self._previous = snapshot
+
+        path = self.directory / f"allocations-{_stamp()}{self.__SUFFIX}"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        self.last_path = path
+        print(f"🧮 Allocation snapshot written to {path}")
+        return path
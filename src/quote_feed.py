@@ -0,0 +1,324 @@
+from __future__ import annotations
+
+import os
+import json
+import mmap
+import struct
+import numpy as np
+
+from typing import Dict, List, Tuple, Iterable, Optional
+from pathlib import Path
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+
+_MAGIC = b"RQFD"
+_LAYOUT = 2
+
+# magic, layout, rows, columns, metadata capacity
+_HEADER = struct.Struct("<4sHxxIII")
+_HEADER_SIZE = 64
+
+# generation (odd while the metadata is rewritten), metadata length, closed flag
+_STATE_OFFSET = 24
+_STATE_GENERATION = 0
+_STATE_METADATA = 1
+_STATE_CLOSED = 2
+
+# pid of the writing service, a segment is only replaced once its owner is gone
+_OWNER_OFFSET = 48
+_OWNER = struct.Struct("<q")
+
+_SHM_DIRECTORY = Path("/dev/shm")
+
+# 8 byte words into a slot
+_SLOT_WORDS = 4
+_WORD_PRICE = 2
+_WORD_TIMESTAMP = 3
+
+SLOT = np.dtype([
+    ("seq", "<u8"),
+    ("coin", "<u4"),
+    ("exchange", "<u4"),
+    ("price", "<f8"),
+    ("timestamp", "<i8"),
+])
+
+def _owner(name: str, directory: Path = _SHM_DIRECTORY) -> Optional[int]:
+    # Read through a plain mapping, attaching with SharedMemory would have the resource tracker unlink it.
+    try:
+        descriptor = os.open(Path(directory) / name.lstrip("/"), os.O_RDONLY)
+    except FileNotFoundError:
+        return None
+    try:
+        if os.fstat(descriptor).st_size < _HEADER_SIZE:
+            return None
+        with mmap.mmap(descriptor, _HEADER_SIZE, access=mmap.ACCESS_READ) as header:
+            if header[:4] != _MAGIC or _HEADER.unpack_from(header, 0)[1] != _LAYOUT:
+                return None
+            return _OWNER.unpack_from(header, _OWNER_OFFSET)[0] or None
+    finally:
+        os.close(descriptor)
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def _metadata_capacity(rows: int) -> int:
+    # Room for a generous symbol per row, rounded to a cache line.
+    return (rows * 48 + 1024 + 63) // 64 * 64
+
+@dataclass
+class FeedSnapshot:
+    generation: int
+    coins: List[Optional[str]]
+    exchanges: List[str]
+    quotes: np.ndarray
+    prices: np.ndarray
+    timestamps: np.ndarray
+
+class QuoteFeed:
+    # Writer side, owned by the service. Slots are seqlocked, the symbol table is versioned by the generation.
+    def __init__(self, memory: shared_memory.SharedMemory, exchanges: Iterable[str]):
+        self.memory = memory
+        (_, _, self.rows, self.columns, self.metadata_capacity) = _HEADER.unpack_from(memory.buf, 0)
+        self.exchanges = list(exchanges)
+        self.exchange_index = {e: i for (i, e) in enumerate(self.exchanges)}
+        self.state = np.ndarray((3,), dtype="<u8", buffer=memory.buf, offset=_STATE_OFFSET)
+        self.quotes = np.ndarray(
+            (self.rows, self.columns), dtype=SLOT, buffer=memory.buf, offset=_HEADER_SIZE + self.metadata_capacity,
+        )
+        # Typed views over the slot words, a tick costs plain indexing instead of NumPy scalar writes.
+        words = memory.buf[_HEADER_SIZE + self.metadata_capacity:]
+        (self._seq, self._prices, self._timestamps) = (words.cast("Q"), words.cast("d"), words.cast("q"))
+        words.release()
+        self.coins: List[Optional[str]] = [None] * self.rows
+        self.rows_by_coin: Dict[str, int] = {}
+        self._slots: Dict[Tuple[str, str], int] = {}
+
+    @property
+    def name(self) -> str:
+        return self.memory.name
+
+    @property
+    def generation(self) -> int:
+        return int(self.state[_STATE_GENERATION])
+
+    @staticmethod
+    def size(rows: int, columns: int) -> int:
+        return _HEADER_SIZE + _metadata_capacity(rows) + rows * columns * SLOT.itemsize
+
+    @staticmethod
+    def create(name: str, capacity: int, exchanges: Iterable[str]) -> QuoteFeed:
+        exchanges = list(exchanges)
+        size = QuoteFeed.size(rows=capacity, columns=len(exchanges))
+        try:
+            memory = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            owner = _owner(name)
+            if owner is not None and _alive(owner):
+                raise FileExistsError(f"Quote feed {name} is published by running process {owner}") from None
+            # Left behind by a crashed run. Readers still mapping it see it closed and reopen.
+            print(f"♻️ Replacing stale quote feed {name}")
+            stale = shared_memory.SharedMemory(name=name)
+            if stale.size >= _HEADER_SIZE and bytes(stale.buf[:4]) == _MAGIC:
+                struct.pack_into("<Q", stale.buf, _STATE_OFFSET + _STATE_CLOSED * 8, 1)
+            stale.close()
+            stale.unlink()
+            memory = shared_memory.SharedMemory(name=name, create=True, size=size)
+
+        _HEADER.pack_into(memory.buf, 0, _MAGIC, _LAYOUT, capacity, len(exchanges), _metadata_capacity(capacity))
+        _OWNER.pack_into(memory.buf, _OWNER_OFFSET, os.getpid())
+        feed = QuoteFeed(memory=memory, exchanges=exchanges)
+        feed.state[:] = 0
+        feed.quotes[:] = np.zeros((), dtype=SLOT)
+        feed.quotes["coin"] = np.arange(capacity, dtype=np.uint32)[:, None]
+        feed.quotes["exchange"] = np.arange(len(exchanges), dtype=np.uint32)[None, :]
+        feed.quotes["price"] = np.nan
+        feed.set_watchlist([])
+        return feed
+
+    def set_watchlist(self, coins: Iterable[str]) -> List[str]:
+        wanted = list(dict.fromkeys(coins))
+        kept = set(wanted)
+        state = self.state
+        state[_STATE_GENERATION] += 1
+        try:
+            for coin in [c for c in self.rows_by_coin if c not in kept]:
+                row = self.rows_by_coin.pop(coin)
+                self.coins[row] = None
+                self.__clear(row)
+
+            free = [r for r in range(self.rows - 1, -1, -1) if self.coins[r] is None]
+            placed = []
+            for coin in wanted:
+                if coin not in self.rows_by_coin:
+                    if not free:
+                        print(f"⚠️ Quote feed is full, {coin.upper()} is not published")
+                        continue
+                    row = free.pop()
+                    self.__clear(row)
+                    self.rows_by_coin[coin] = row
+                    self.coins[row] = coin
+                placed.append(coin)
+
+            metadata = json.dumps({"exchanges": self.exchanges, "coins": self.coins}, separators=(",", ":")).encode()
+            if len(metadata) > self.metadata_capacity:
+                raise ValueError(f"Quote feed metadata needs {len(metadata)} bytes, {self.metadata_capacity} available")
+            self.memory.buf[_HEADER_SIZE:_HEADER_SIZE + len(metadata)] = metadata
+            state[_STATE_METADATA] = len(metadata)
+            self._slots = {
+                (coin, exchange): (row * self.columns + column) * _SLOT_WORDS
+                for (coin, row) in self.rows_by_coin.items()
+                for (exchange, column) in self.exchange_index.items()
+            }
+        finally:
+            state[_STATE_GENERATION] += 1
+        return placed
+
+    def publish(self, coin: str, exchange: str, price: float, timestamp: int) -> None:
+        slot = self._slots.get((coin, exchange))
+        if slot is None:
+            return
+        seq = self._seq
+        version = seq[slot] + 1
+        seq[slot] = version
+        self._prices[slot + _WORD_PRICE] = price
+        self._timestamps[slot + _WORD_TIMESTAMP] = timestamp
+        seq[slot] = version + 1
+
+    def close(self) -> None:
+        # A feed replaced by a newer run must not unlink the segment that took its name.
+        replaced = bool(self.state[_STATE_CLOSED])
+        self.state[_STATE_CLOSED] = 1
+        for view in (self._seq, self._prices, self._timestamps):
+            view.release()
+        self.state = self.quotes = None
+        self.memory.close()
+        if not replaced:
+            self.memory.unlink()
+
+    def __clear(self, row: int) -> None:
+        slots = self.quotes[row]
+        slots["seq"] += 1
+        slots["price"] = np.nan
+        slots["timestamp"] = 0
+        slots["seq"] += 1
+
+class QuoteFeedReader:
+    # Maps the feed read-only. The live `quotes` view is zero-copy, snapshot() gives a consistent
+    # copy in a buffer reused between calls, so reads cost no syscalls and no allocations.
+    def __init__(self, name: str, directory: Path = _SHM_DIRECTORY):
+        self.name = name
+        # Not SharedMemory: attaching registers the segment with the resource tracker, which unlinks it
+        # when the reader exits.
+        descriptor = os.open(Path(directory) / name.lstrip("/"), os.O_RDONLY)
+        try:
+            self._map = mmap.mmap(descriptor, 0, access=mmap.ACCESS_READ)
+        finally:
+            os.close(descriptor)
+        (magic, layout, self.rows, self.columns, self.metadata_capacity) = _HEADER.unpack_from(self._map, 0)
+        if magic != _MAGIC or layout != _LAYOUT:
+            self._map.close()
+            raise ValueError(f"Not a quote feed with layout {_LAYOUT}: {name}")
+
+        self.state = np.ndarray((3,), dtype="<u8", buffer=self._map, offset=_STATE_OFFSET)
+        self.quotes = np.ndarray(
+            (self.rows, self.columns), dtype=SLOT, buffer=self._map, offset=_HEADER_SIZE + self.metadata_capacity,
+        )
+        (self.seq, self.prices, self.timestamps) = (self.quotes["seq"], self.quotes["price"], self.quotes["timestamp"])
+        # Copies go through plain words, a structured copy is several times slower.
+        shape = (self.rows, self.columns, _SLOT_WORDS)
+        self._words = self.quotes.view("<u8").reshape(shape)
+        self._copy = np.empty(shape, dtype="<u8")
+        self._copy_seq = self._copy[..., 0]
+        self._buffer = self._copy.view(SLOT).reshape(self.quotes.shape)
+        self._stable = np.empty(self.quotes.shape, dtype=bool)
+        self._odd = np.empty(self.quotes.shape, dtype=np.uint64)
+        self.generation = -1
+        self.coins: List[Optional[str]] = []
+        self.exchanges: List[str] = []
+        self.coin_index: Dict[str, int] = {}
+        self.exchange_index: Dict[str, int] = {}
+        self.refresh()
+
+    @property
+    def closed(self) -> bool:
+        # The writer shut down or was replaced, open the feed again.
+        return bool(self.state[_STATE_CLOSED])
+
+    @property
+    def changed(self) -> bool:
+        return int(self.state[_STATE_GENERATION]) != self.generation
+
+    def refresh(self, attempts: int = 1000) -> bool:
+        # Reloads the symbol table if the writer swapped the watchlist, True when it did.
+        for _ in range(attempts):
+            generation = int(self.state[_STATE_GENERATION])
+            if generation == self.generation:
+                return False
+            if generation & 1:
+                continue
+            length = int(self.state[_STATE_METADATA])
+            metadata = self._map[_HEADER_SIZE:_HEADER_SIZE + min(length, self.metadata_capacity)]
+            if int(self.state[_STATE_GENERATION]) != generation:
+                continue
+            loaded = json.loads(metadata)
+            self.coins = loaded["coins"]
+            self.exchanges = loaded["exchanges"]
+            self.coin_index = {c: i for (i, c) in enumerate(self.coins) if c is not None}
+            self.exchange_index = {e: i for (i, e) in enumerate(self.exchanges)}
+            self.generation = generation
+            return True
+        raise TimeoutError(f"Quote feed {self.name} metadata kept changing")
+
+    def quote(self, coin: str, exchange: str, attempts: int = 100) -> Optional[Tuple[float, int]]:
+        for _ in range(attempts):
+            self.refresh()
+            (row, column) = (self.coin_index.get(coin), self.exchange_index.get(exchange))
+            if row is None or column is None:
+                return None
+            before = int(self.seq[row, column])
+            if before & 1:
+                continue
+            (price, timestamp) = (float(self.prices[row, column]), int(self.timestamps[row, column]))
+            if int(self.seq[row, column]) == before and not self.changed:
+                return None if price != price else (price, timestamp)
+        return None
+
+    def snapshot(self, attempts: int = 100) -> FeedSnapshot:
+        # The returned arrays are overwritten by the next snapshot, copy them to keep them.
+        (live, copy, buffer) = (self._words, self._copy, self._buffer)
+        for _ in range(attempts):
+            self.refresh()
+            generation = self.generation
+            np.copyto(copy, live)
+            for _ in range(attempts):
+                np.equal(self._copy_seq, self.seq, out=self._stable)
+                np.bitwise_and(self._copy_seq, 1, out=self._odd)
+                if self._stable.all() and not self._odd.any():
+                    break
+                # Only the slots written during the copy are read again.
+                torn = ~self._stable | self._odd.astype(bool)
+                copy[torn] = live[torn]
+            else:
+                raise TimeoutError(f"Quote feed {self.name} slots kept changing")
+            if int(self.state[_STATE_GENERATION]) == generation:
+                return FeedSnapshot(
+                    generation=generation,
+                    coins=self.coins,
+                    exchanges=self.exchanges,
+                    quotes=buffer,
+                    prices=buffer["price"],
+                    timestamps=buffer["timestamp"],
+                )
+        raise TimeoutError(f"Quote feed {self.name} metadata kept changing")
+
+    def close(self) -> None:
+        # Views must go before the mapping can be closed.
+        self.state = self.quotes = self.seq = self.prices = self.timestamps = self._words = None
+        self._map.close()
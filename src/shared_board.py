@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import os
+import struct
+import itertools
+import numpy as np
+
+from typing import Tuple, Optional
+from multiprocessing import shared_memory
+
+_MAGIC = b"RQBD"
+_VERSION = 1
+
+# magic, version, rows, columns, workers
+_HEADER = struct.Struct("<4sHIII")
+_HEADER_SIZE = 64
+
+# Each worker's counters sit on their own cache line.
+_STATS_WIDTH = 8
+_STAT_FRAMES = 0
+_STAT_HEARTBEAT = 1
+
+_names = itertools.count()
+
+SLOT = np.dtype([("seq", "<u8"), ("price", "<f8"), ("timestamp", "<i8"), ("reserved", "<u8")])
+
+class SharedQuoteBoard:
+    # Latest quote per coin row and exchange column. Every slot has a single writer, readers
+    # retry on an odd or changed sequence number, seqlock style.
+    def __init__(self, memory: shared_memory.SharedMemory, owner: bool):
+        self.memory = memory
+        self.owner = owner
+        (magic, version, self.rows, self.columns, self.workers) = _HEADER.unpack_from(memory.buf, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"Not a quote board: {memory.name}")
+
+        stats_size = self.workers * _STATS_WIDTH * 8
+        self.stats = np.ndarray((self.workers, _STATS_WIDTH), dtype="<u8", buffer=memory.buf, offset=_HEADER_SIZE)
+        self.slots = np.ndarray(
+            (self.rows, self.columns), dtype=SLOT, buffer=memory.buf, offset=_HEADER_SIZE + stats_size,
+        )
+        self.seq = self.slots["seq"]
+        self.prices = self.slots["price"]
+        self.timestamps = self.slots["timestamp"]
+
+    @property
+    def name(self) -> str:
+        return self.memory.name
+
+    @staticmethod
+    def size(rows: int, columns: int, workers: int) -> int:
+        return _HEADER_SIZE + workers * _STATS_WIDTH * 8 + rows * columns * SLOT.itemsize
+
+    @staticmethod
+    def create(rows: int, columns: int, workers: int, name: Optional[str] = None) -> SharedQuoteBoard:
+        memory = shared_memory.SharedMemory(
+            name=name or f"referee-board-{os.getpid()}-{next(_names)}",
+            create=True, size=SharedQuoteBoard.size(rows, columns, workers),
+        )
+        _HEADER.pack_into(memory.buf, 0, _MAGIC, _VERSION, rows, columns, workers)
+        board = SharedQuoteBoard(memory=memory, owner=True)
+        board.slots[:] = np.zeros((), dtype=SLOT)
+        board.prices[:] = np.nan
+        board.stats[:] = 0
+        return board
+
+    @staticmethod
+    def attach(name: str) -> SharedQuoteBoard:
+        return SharedQuoteBoard(memory=shared_memory.SharedMemory(name=name), owner=False)
+
+    def write(self, row: int, column: int, price: float, timestamp: int) -> None:
+        seq = self.seq
+        seq[row, column] += 1
+        self.prices[row, column] = price
+        self.timestamps[row, column] = timestamp
+        seq[row, column] += 1
+
+    def clear(self, row: int, column: Optional[int] = None) -> None:
+        columns = slice(None) if column is None else column
+        self.seq[row, columns] += 1
+        self.prices[row, columns] = np.nan
+        self.timestamps[row, columns] = 0
+        self.seq[row, columns] += 1
+
+    def read(self, row: int, column: int, attempts: int = 100) -> Optional[Tuple[float, int]]:
+        for _ in range(attempts):
+            before = int(self.seq[row, column])
+            if before & 1:
+                continue
+            (price, timestamp) = (float(self.prices[row, column]), int(self.timestamps[row, column]))
+            if int(self.seq[row, column]) == before:
+                return (None if np.isnan(price) else (price, timestamp))
+        return None
+
+    def changes(self, seen: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        # Slots written since `seen`, which is updated in place. Torn slots are left for the next call.
+        before = self.seq.copy()
+        prices = self.prices.copy()
+        timestamps = self.timestamps.copy()
+        after = self.seq.copy()
+        consistent = (before == after) & (before & 1 == 0)
+        changed = consistent & (before != seen)
+        seen[changed] = before[changed]
+        return changed, prices, timestamps
+
+    def publish(self, worker: int, frames: int, heartbeat_ns: int) -> None:
+        self.stats[worker, _STAT_FRAMES] = frames
+        self.stats[worker, _STAT_HEARTBEAT] = heartbeat_ns
+
+    def frames(self, worker: Optional[int] = None) -> int:
+        return int(self.stats[:, _STAT_FRAMES].sum() if worker is None else self.stats[worker, _STAT_FRAMES])
+
+    def heartbeat_ns(self, worker: int) -> int:
+        return int(self.stats[worker, _STAT_HEARTBEAT])
+
+    def close(self) -> None:
+        # Views must go before the mapping can be closed.
+        self.stats = self.slots = self.seq = self.prices = self.timestamps = None
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import asyncio
+
+from typing import Dict, Tuple, Optional
+
+from src.writer import DatabaseWriter
+from src.metrics import Registry
+
+class PriceSink:
+    def __init__(
+        self,
+        writer: DatabaseWriter,
+        flush_interval_ms: int = 250,
+        max_buffer_size: int = 1000,
+        metrics: Optional[Registry] = None,
+    ):
+        self.writer = writer
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_buffer_size = max_buffer_size
+        self._buffer: Dict[Tuple[str, str], Tuple[float, int]] = {}
+        # Set while the writer hands rows back, the size trigger then waits for the next interval.
+        self._backlogged = False
+        self._task: Optional[asyncio.Task] = None
+
+        registry = metrics or Registry()
+        registry.gauge("sink_buffer_size", "Latest prices waiting for the next flush").labels().set_function(lambda: len(self._buffer))
+        self._flushed = registry.counter("sink_flushed_rows_total", "Price rows handed to the writer").labels()
+        self._failures = registry.counter("sink_flush_failures_total", "Failed periodic flushes").labels()
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    def push(self, coin_name: str, exch_name: str, exch_price: float, timestamp: int) -> None:
+        self._buffer[(coin_name, exch_name)] = (exch_price, timestamp)
+        if len(self._buffer) >= self.max_buffer_size and not self._backlogged:
+            self.flush()
+
+    def flush(self) -> int:
+        if not self._buffer:
+            return 0
+        (buffer, self._buffer) = (self._buffer, {})
+        try:
+            rejected = self.writer.put_prices(
+                [(coin, exch, price, timestamp) for ((coin, exch), (price, timestamp)) in buffer.items()],
+            )
+        except Exception:
+            self.__restore(buffer)
+            raise
+        self._backlogged = bool(rejected)
+        if rejected:
+            self.__restore({(coin, exch): (price, timestamp) for (coin, exch, price, timestamp) in rejected})
+        flushed = len(buffer) - len(rejected)
+        self._flushed.inc(flushed)
+        return flushed
+
+    def discard(self) -> None:
+        self._buffer.clear()
+        self._backlogged = False
+
+    def start(self) -> asyncio.Task:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(coro=self.__flush_loop())
+        return self._task
+
+    async def stop(self, flush: bool = True) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if flush:
+            self.flush()
+        else:
+            self.discard()
+
+    def __restore(self, buffer: Dict[Tuple[str, str], Tuple[float, int]]) -> None:
+        # Prices pushed since the swap are newer, they win over the batch that failed.
+        buffer.update(self._buffer)
+        self._buffer = buffer
+
+    async def __flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                self._failures.inc()
+                print("⚠️ Price sink flush failed:", e)
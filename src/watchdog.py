@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import sys
+import time
+import asyncio
+import threading
+import traceback
+
+from typing import Dict, List, Optional
+from collections import deque
+from dataclasses import dataclass, field
+
+from src.basics import time_millis
+from src.latency import PERCENTILES, HdrHistogram
+from src.metrics import Registry
+
+@dataclass
+class Stall:
+    started_ms: int
+    duration_ms: float
+    task: Optional[str]
+    stack: List[str] = field(default_factory=list)
+
+class LoopWatchdog:
+    __THREAD_NAME = "loop-watchdog"
+
+    def __init__(
+        self,
+        interval_ms: int = 100,
+        threshold_ms: int = 250,
+        stack_depth: int = 20,
+        history: int = 50,
+        metrics: Optional[Registry] = None,
+    ):
+        self.interval_ms = interval_ms
+        self.threshold_ms = threshold_ms
+        self.stack_depth = stack_depth
+        self.lag_us = HdrHistogram()
+        self.stalls: deque[Stall] = deque(maxlen=history)
+        self.stall_count = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self._due = 0.0
+        self._open: Optional[Stall] = None
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+
+        registry = metrics or Registry()
+        lag = registry.gauge("loop_lag_ms", "Event loop scheduling lag since start", ("quantile",))
+        for p in PERCENTILES:
+            lag.labels(p / 100).set_function(lambda p=p: self.lag_us.percentile(p) / 1000)
+        registry.counter("loop_stalls_total", "Event loop stalls above the threshold").labels().set_function(
+            lambda: self.stall_count,
+        )
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._due = time.monotonic() + self.interval_ms / 1000
+        self._stopping.clear()
+        self._task = asyncio.create_task(coro=self.__beat(), name=self.__THREAD_NAME)
+        self._thread = threading.Thread(target=self.__watch, name=self.__THREAD_NAME, daemon=True)
+        self._thread.start()
+
+    async def stop(self) -> None:
+        self._stopping.set()
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            **{k: v / 1000 for (k, v) in self.lag_us.percentiles().items()},
+            "max": self.lag_us.max / 1000,
+            "stalls": self.stall_count,
+        }
+
+    async def __beat(self) -> None:
+        interval = self.interval_ms / 1000
+        while True:
+            await asyncio.sleep(interval)
+            now = time.monotonic()
+            lag = now - self._due
+            self.lag_us.record(int(lag * 1_000_000))
+            # Moving the deadline under the lock keeps the watcher from reopening a stall that just ended.
+            with self._lock:
+                (stall, self._open) = (self._open, None)
+                self._due = now + interval
+            if stall is not None:
+                stall.duration_ms = lag * 1000
+                self.__report(stall)
+
+    def __watch(self) -> None:
+        # Checks often enough to catch the stall while it is still running.
+        period = max(self.threshold_ms / 4, 5) / 1000
+        while not self._stopping.wait(period):
+            overdue_ms = (time.monotonic() - self._due) * 1000
+            if overdue_ms < self.threshold_ms:
+                continue
+            with self._lock:
+                if self._open is None:
+                    self._open = self.__sample(overdue_ms)
+
+    def __sample(self, overdue_ms: float) -> Stall:
+        frame = sys._current_frames().get(self._loop_thread)
+        stack = traceback.format_stack(frame, limit=self.stack_depth) if frame is not None else []
+        # Private to asyncio, but the only way to see the running task from another thread.
+        task = asyncio.tasks._current_tasks.get(self._loop)
+        name = None
+        if task is not None:
+            coro = task.get_coro()
+            name = f"{task.get_name()} ({getattr(coro, '__qualname__', coro)})"
+        return Stall(started_ms=time_millis() - int(overdue_ms), duration_ms=overdue_ms, task=name, stack=stack)
+
+    def __report(self, stall: Stall) -> None:
+        self.stall_count += 1
+        self.stalls.append(stall)
+        print(f"🐌 Event loop stalled for {stall.duration_ms:.0f} ms in {stall.task or 'a callback'}")
+        if stall.stack:
+            print("".join(stall.stack[-5:]).rstrip())
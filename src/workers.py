@@ -0,0 +1,358 @@
+from __future__ import annotations
+
+import os
+import time
+import zlib
+import asyncio
+import numpy as np
+import multiprocessing
+
+from typing import Dict, List, Tuple, Optional
+from multiprocessing.process import BaseProcess
+
+from src.config import Conflation, Exchange as ExchangeSettings
+from src.basics import StreamCallbacks
+from src.shared_board import SharedQuoteBoard
+
+from src.exchanges.base import BaseStreamer
+from src.exchanges.conflation import Conflator
+from src.exchanges.planner import ShardPlanner
+
+from src.exchanges.mexc.mexc import ALIAS as ALIAS_MEXC, run as run_mexc
+from src.exchanges.bybit import ALIAS as ALIAS_BYBIT, run as run_bybit
+from src.exchanges.binance import ALIAS as ALIAS_BINANCE, run as run_binance
+from src.exchanges.coinbase import ALIAS as ALIAS_COINBASE, run as run_coinbase
+
+COMMAND_ASSIGN = "assign"
+COMMAND_STOP = "stop"
+
+# coin, exchange, price, timestamp
+Quote = Tuple[str, str, float, int]
+
+_RUNNERS = {
+    ALIAS_MEXC: run_mexc,
+    ALIAS_BYBIT: run_bybit,
+    ALIAS_BINANCE: run_binance,
+    ALIAS_COINBASE: run_coinbase,
+}
+
+def worker_group(coin: str, groups: int) -> int:
+    # Stable across restarts and watchlist changes, unlike hash().
+    return zlib.crc32(coin.encode("utf-8")) % groups if groups > 1 else 0
+
+class ExchangeWorker:
+    def __init__(self, exchange: ExchangeSettings, board: SharedQuoteBoard, column: int, conflation: Conflation):
+        if exchange.name not in _RUNNERS:
+            raise ValueError(f"Unknown exchange: {exchange.name}")
+        self.exchange = exchange
+        self.board = board
+        self.column = column
+        self.conflator: Optional[Conflator] = None
+        if conflation.enabled:
+            self.conflator = Conflator(
+                deadband=conflation.deadband,
+                min_interval_ms=conflation.min_interval_ms,
+                max_staleness_ms=conflation.max_staleness_ms,
+            )
+        self.planner = ShardPlanner(
+            streams_per_connection=exchange.streams_per_connection,
+            args_per_message=exchange.args_per_message,
+            messages_per_second=exchange.messages_per_second,
+            max_frames_per_second=exchange.max_frames_per_second,
+        )
+        self.rows: Dict[str, int] = {}
+        self.shards: List[BaseStreamer] = []
+
+    @property
+    def frames(self) -> int:
+        return sum(s.frames for s in self.shards)
+
+    async def assign(self, rows: Dict[str, int]) -> None:
+        wanted = set(rows)
+        for streamer in list(self.shards):
+            stale = [c for c in streamer.coins if c not in wanted]
+            if len(stale) == len(streamer.coins):
+                await streamer.stop()
+                self.shards.remove(streamer)
+            elif stale:
+                await streamer.unsubscribe(coins=stale)
+        for coin in set(self.rows) - wanted:
+            if self.conflator is not None:
+                self.conflator.forget(coin)
+
+        # A row may have held another coin before, start it empty.
+        added = [c for c in rows if c not in self.rows or self.rows[c] != rows[c]]
+        for coin in added:
+            self.board.clear(row=rows[coin], column=self.column)
+        self.rows = dict(rows)
+
+        subscribed = {c for s in self.shards for c in s.coins}
+        added = [c for c in rows if c not in subscribed]
+        if not added:
+            return
+        callbacks = self.__callbacks(added)
+        (assigned, fresh) = self.planner.place(shards=[s.coins for s in self.shards], symbols=added)
+        for (streamer, chunk) in zip(list(self.shards), assigned):
+            if chunk:
+                await streamer.subscribe(coins=chunk, callbacks=callbacks)
+        for chunk in fresh:
+            self.shards.append(
+                _RUNNERS[self.exchange.name](
+                    url=self.exchange.websocket,
+                    coins=chunk,
+                    callbacks={c: callbacks[c] for c in chunk},
+                    conflator=self.conflator,
+                    planner=self.planner,
+                ),
+            )
+
+    async def stop(self) -> None:
+        await asyncio.gather(*(s.stop() for s in self.shards), return_exceptions=True)
+        self.shards.clear()
+
+    def __callbacks(self, coins: List[str]) -> StreamCallbacks:
+        write = self.board.write
+        column = self.column
+        return {
+            coin: lambda price, timestamp, row=self.rows[coin]: write(row, column, price, timestamp)
+            for coin in coins
+        }
+
+def restart_delay(restarts: int, base_seconds: float = 0.5, max_seconds: float = 30.0) -> float:
+    # Doubles with every restart in a row, so a crash-looping worker does not hammer the venue.
+    return min(max_seconds, base_seconds * 2 ** max(0, restarts - 1))
+
+def worker_main(
+    exchange: ExchangeSettings,
+    conflation: Conflation,
+    board_name: str,
+    column: int,
+    index: int,
+    commands: multiprocessing.Queue,
+) -> None:
+    try:
+        asyncio.run(_worker(exchange, conflation, board_name, column, index, commands))
+    except KeyboardInterrupt:
+        pass
+
+async def _worker(
+    exchange: ExchangeSettings,
+    conflation: Conflation,
+    board_name: str,
+    column: int,
+    index: int,
+    commands: multiprocessing.Queue,
+) -> None:
+    board = SharedQuoteBoard.attach(board_name)
+    worker = ExchangeWorker(exchange=exchange, board=board, column=column, conflation=conflation)
+    loop = asyncio.get_running_loop()
+    parent = os.getppid()
+
+    async def _publish():
+        while True:
+            board.publish(worker=index, frames=worker.frames, heartbeat_ns=time.time_ns())
+            if os.getppid() != parent:
+                # Orphaned by a supervisor that died without stopping us.
+                os._exit(1)
+            await asyncio.sleep(0.1)
+
+    publisher = asyncio.create_task(_publish())
+    try:
+        while True:
+            (command, payload) = await loop.run_in_executor(None, commands.get)
+            if command == COMMAND_STOP:
+                break
+            if command == COMMAND_ASSIGN:
+                await worker.assign(payload)
+    finally:
+        publisher.cancel()
+        await asyncio.gather(publisher, return_exceptions=True)
+        await worker.stop()
+        board.close()
+
+class ProcessSupervisor:
+    __CHECK_INTERVAL_SECONDS = 1.0
+    __STOP_TIMEOUT_SECONDS = 5.0
+
+    def __init__(
+        self,
+        exchanges: List[ExchangeSettings],
+        conflation: Conflation,
+        capacity: int = 1024,
+        processes_per_exchange: int = 1,
+        heartbeat_timeout_seconds: float = 5.0,
+        max_restart_delay_seconds: float = 30.0,
+    ):
+        self.exchanges = list(exchanges)
+        self.heartbeat_timeout_ns = int(heartbeat_timeout_seconds * 1e9)
+        self.max_restart_delay_seconds = max_restart_delay_seconds
+        self.conflation = conflation
+        self.capacity = capacity
+        self.groups = max(1, processes_per_exchange)
+        self.columns = {e.name: i for (i, e) in enumerate(self.exchanges)}
+        # Workers are (exchange, group) pairs, each writes its own rows of its exchange's column.
+        self.workers = [(e.name, g) for e in self.exchanges for g in range(self.groups)]
+        self.board = SharedQuoteBoard.create(rows=capacity, columns=len(self.exchanges), workers=len(self.workers))
+        self.rows: Dict[str, int] = {}
+        self.restarts: Dict[Tuple[str, int], int] = {w: 0 for w in self.workers}
+        # Restarts in a row, reset once a worker outlives the longest delay.
+        self._streaks: Dict[Tuple[str, int], int] = {w: 0 for w in self.workers}
+        self._spawned: Dict[Tuple[str, int], int] = {}
+        self._due: Dict[Tuple[str, int], int] = {}
+        self._coins: List[Optional[str]] = [None] * capacity
+        self._free = list(range(capacity - 1, -1, -1))
+        self._released: List[int] = []
+        self._assigned: Dict[Tuple[str, int], Dict[str, int]] = {w: {} for w in self.workers}
+        self._processes: Dict[Tuple[str, int], BaseProcess] = {}
+        self._queues: Dict[Tuple[str, int], multiprocessing.Queue] = {}
+        self._seen = np.zeros((capacity, len(self.exchanges)), dtype=np.uint64)
+        self._context = multiprocessing.get_context("spawn")
+        self._monitor: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    def start(self) -> None:
+        if self._monitor is not None:
+            return
+        self._stopping = False
+        for worker in self.workers:
+            self.__spawn(worker)
+        self._monitor = asyncio.create_task(coro=self.__monitor_loop())
+
+    def set_watchlist(self, coins: List[str]) -> List[str]:
+        # Rows dropped in the previous round are reused only now, after every worker has let go of them.
+        self._free.extend(self._released)
+        self._released = []
+        wanted = set(coins)
+        for coin in [c for c in self.rows if c not in wanted]:
+            row = self.rows.pop(coin)
+            self._coins[row] = None
+            self._released.append(row)
+
+        placed = []
+        for coin in coins:
+            if coin not in self.rows:
+                if not self._free:
+                    print(f"⚠️ Shared quote board is full, {coin.upper()} is not streamed")
+                    continue
+                row = self._free.pop()
+                self.board.clear(row=row)
+                self._seen[row] = self.board.seq[row]
+                self.rows[coin] = row
+                self._coins[row] = coin
+            placed.append(coin)
+        return placed
+
+    def assign(self, exchange: str, coins: List[str]) -> None:
+        rows = {c: self.rows[c] for c in coins if c in self.rows}
+        for group in range(self.groups):
+            worker = (exchange, group)
+            self._assigned[worker] = {c: r for (c, r) in rows.items() if worker_group(c, self.groups) == group}
+            self.__send(worker, (COMMAND_ASSIGN, self._assigned[worker]))
+
+    def poll(self) -> List[Quote]:
+        (changed, prices, timestamps) = self.board.changes(self._seen)
+        (rows, columns) = changed.nonzero()
+        quotes = []
+        for (row, column) in zip(rows.tolist(), columns.tolist()):
+            coin = self._coins[row]
+            price = prices[row, column]
+            if coin is None or price != price:
+                continue
+            quotes.append((coin, self.exchanges[column].name, float(price), int(timestamps[row, column])))
+        return quotes
+
+    def frames(self, exchange: Optional[str] = None) -> int:
+        if exchange is None:
+            return self.board.frames()
+        return sum(self.board.frames(i) for (i, (e, _)) in enumerate(self.workers) if e == exchange)
+
+    def pids(self) -> List[int]:
+        return [p.pid for p in self._processes.values() if p.pid is not None]
+
+    async def stop(self) -> None:
+        self._stopping = True
+        if self._monitor is not None:
+            self._monitor.cancel()
+            await asyncio.gather(self._monitor, return_exceptions=True)
+            self._monitor = None
+        for worker in self._processes:
+            self.__send(worker, (COMMAND_STOP, None))
+        loop = asyncio.get_running_loop()
+        for process in self._processes.values():
+            await loop.run_in_executor(None, process.join, self.__STOP_TIMEOUT_SECONDS)
+            if process.is_alive():
+                process.kill()
+                await loop.run_in_executor(None, process.join)
+        for commands in self._queues.values():
+            commands.close()
+        self._processes.clear()
+        self._queues.clear()
+        self._due.clear()
+
+    def close(self) -> None:
+        self.board.close()
+
+    async def __monitor_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.__CHECK_INTERVAL_SECONDS)
+            now = time.time_ns()
+            for (worker, process) in list(self._processes.items()):
+                if self._stopping:
+                    break
+                due = self._due.get(worker)
+                if due is not None:
+                    if now >= due:
+                        del self._due[worker]
+                        self.__spawn(worker)
+                    continue
+                if process.is_alive():
+                    # A fresh worker has not published yet, give it the timeout from its spawn.
+                    heartbeat = max(self.board.heartbeat_ns(self.workers.index(worker)), self._spawned[worker])
+                    if now - heartbeat <= self.heartbeat_timeout_ns:
+                        if now - self._spawned[worker] > self.max_restart_delay_seconds * 1e9:
+                            self._streaks[worker] = 0
+                        continue
+                    # Hung, the event loop of the worker no longer runs.
+                    process.kill()
+                    reason = f"missed heartbeats for {(now - heartbeat) / 1e9:.1f}s"
+                else:
+                    reason = f"exited with code {process.exitcode}"
+                self.restarts[worker] += 1
+                self._streaks[worker] += 1
+                delay = restart_delay(self._streaks[worker], max_seconds=self.max_restart_delay_seconds)
+                print(
+                    f"♻️ {worker[0]} worker {worker[1]} {reason}, "
+                    f"restart #{self.restarts[worker]} in {delay:.1f}s"
+                )
+                self._due[worker] = now + int(delay * 1e9)
+
+    def __spawn(self, worker: Tuple[str, int]) -> None:
+        (exchange, group) = worker
+        old = self._queues.pop(worker, None)
+        if old is not None:
+            old.close()
+        commands = self._context.Queue()
+        process = self._context.Process(
+            target=worker_main,
+            args=(
+                self.exchanges[self.columns[exchange]],
+                self.conflation,
+                self.board.name,
+                self.columns[exchange],
+                self.workers.index(worker),
+                commands,
+            ),
+            name=f"referee-{exchange}-{group}",
+            daemon=True,
+        )
+        process.start()
+        self._spawned[worker] = time.time_ns()
+        self._processes[worker] = process
+        self._queues[worker] = commands
+        if self._assigned[worker]:
+            commands.put((COMMAND_ASSIGN, self._assigned[worker]))
+
+    def __send(self, worker: Tuple[str, int], command: Tuple[str, Optional[Dict[str, int]]]) -> None:
+        commands = self._queues.get(worker)
+        if commands is not None:
+            commands.put(command)
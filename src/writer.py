@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import time
+import itertools
+import threading
+
+from typing import Any, Dict, List, Tuple, Hashable, Callable, Optional
+from concurrent.futures import Future
+
+from src.database import Database, PriceRow
+from src.metrics import Registry
+
+POLICY_BLOCK = "block"
+POLICY_DROP_OLDEST = "drop_oldest"
+POLICY_LATEST = "latest"
+
+_POLICIES = (POLICY_BLOCK, POLICY_DROP_OLDEST, POLICY_LATEST)
+
+class DatabaseWriter:
+    __THREAD_NAME = "database-writer"
+
+    def __init__(
+        self,
+        database: Database,
+        capacity: int = 10_000,
+        policy: str = POLICY_LATEST,
+        metrics: Optional[Registry] = None,
+        on_written: Optional[Callable[[List[PriceRow]], None]] = None,
+    ):
+        if policy not in _POLICIES:
+            raise ValueError(f"Unknown backpressure policy: {policy}")
+        self.database = database
+        self.capacity = capacity
+        self.policy = policy
+        self.dropped = 0
+        self.rejected = 0
+        self.on_written = on_written
+        self._queue: Dict[Hashable, Tuple[Optional[PriceRow], Optional[Callable[[], Any]], Optional[Future]]] = {}
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._closing = False
+        self._thread: Optional[threading.Thread] = None
+
+        registry = metrics or Registry()
+        registry.gauge("writer_queue_depth", "Rows and jobs waiting for the writer thread").labels().set_function(lambda: self.depth)
+        registry.counter("writer_dropped_total", "Rows dropped by the backpressure policy").labels().set_function(lambda: self.dropped)
+        registry.counter("writer_rejected_total", "Rows handed back to the producer by the block policy").labels().set_function(
+            lambda: self.rejected,
+        )
+        self._written = registry.counter("writer_rows_total", "Price rows written").labels()
+        self._failures = registry.counter("writer_failures_total", "Failed price writes").labels()
+        self._write_seconds = registry.histogram("writer_write_seconds", "Time to write one batch of prices").labels()
+
+    @property
+    def depth(self) -> int:
+        return len(self._queue)
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.__run_loop, name=self.__THREAD_NAME, daemon=True)
+            self._thread.start()
+
+    def close(self, timeout: float | None = None) -> None:
+        with self._condition:
+            self._closing = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    def put_prices(self, rows: List[PriceRow]) -> List[PriceRow]:
+        # Called from the event loop, so it never waits. Under the block policy the rows that did not
+        # fit are returned for the producer to keep and offer again.
+        with self._condition:
+            if self._closing:
+                raise RuntimeError("Database writer is closed")
+            rejected = [row for row in rows if not self.__put(key=(row[0], row[1]), row=row)]
+            self.rejected += len(rejected)
+            self._condition.notify_all()
+        return rejected
+
+    def call(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        future: Future = Future()
+        with self._condition:
+            if self._closing:
+                raise RuntimeError("Database writer is closed")
+            self._queue[next(self._sequence)] = (None, lambda: fn(*args, **kwargs), future)
+            self._condition.notify_all()
+        return future
+
+    def __put(self, key: Hashable, row: PriceRow) -> bool:
+        if self.policy == POLICY_LATEST and key in self._queue:
+            del self._queue[key]
+            self._queue[key] = (row, None, None)
+            return True
+
+        if self.policy != POLICY_LATEST:
+            key = (key, next(self._sequence))
+
+        while len(self._queue) >= self.capacity:
+            if self.policy == POLICY_BLOCK:
+                return False
+            if not self.__drop_oldest_row():
+                # Only jobs are queued and those are never dropped, the new row gives way instead.
+                self.dropped += 1
+                return True
+        self._queue[key] = (row, None, None)
+        return True
+
+    def __drop_oldest_row(self) -> bool:
+        for (key, (row, _, _)) in self._queue.items():
+            if row is not None:
+                del self._queue[key]
+                self.dropped += 1
+                return True
+        return False
+
+    def __run_loop(self) -> None:
+        while True:
+            with self._condition:
+                while not self._queue and not self._closing:
+                    self._condition.wait()
+                if not self._queue and self._closing:
+                    return
+                (items, self._queue) = (list(self._queue.values()), {})
+                self._condition.notify_all()
+
+            rows: List[PriceRow] = []
+            for (row, job, future) in items:
+                if row is not None:
+                    rows.append(row)
+                    continue
+                self.__write(rows)
+                rows = []
+                if future.set_running_or_notify_cancel():
+                    try:
+                        future.set_result(job())
+                    except BaseException as e:
+                        future.set_exception(e)
+            self.__write(rows)
+
+    def __write(self, rows: List[PriceRow]) -> None:
+        if not rows:
+            return
+        started = time.perf_counter()
+        try:
+            self.database.insert_prices(rows)
+        except Exception as e:
+            self._failures.inc()
+            print("⚠️ Database write failed:", e)
+            return
+        self._write_seconds.observe(time.perf_counter() - started)
+        self._written.inc(len(rows))
+        if self.on_written is not None:
+            try:
+                self.on_written(rows)
+            except Exception as e:
+                print("⚠️ Database write hook failed:", e)
@@ -0,0 +1,20 @@
+from benchmarks.suite import BENCHMARKS, run_suite, compare
+
+def _results(**rates):
+    return {"results": {name.replace("_", "."): {"ops_per_second": rate} for (name, rate) in rates.items()}}
+
+def test_compare_flags_slowdowns_beyond_tolerance():
+    baseline = _results(parse_mexc=1000.0, parse_bybit=1000.0, database_file=1000.0)
+    baseline["tolerance"] = 0.3
+    baseline["tolerances"] = {"database.*": 0.6}
+
+    current = _results(parse_mexc=500.0, parse_bybit=800.0, database_file=500.0, parse_new=1.0)
+    regressions = compare(current=current, baseline=baseline)
+    assert [r[0] for r in regressions] == ["parse.mexc"]
+
+    assert compare(current=current, baseline=baseline, tolerance=0.6) == []
+
+def test_suite_runs_every_benchmark_at_small_scale():
+    results = run_suite(scale=0.01)["results"]
+    assert set(results) == set(BENCHMARKS)
+    assert all(r["ops_per_second"] > 0 for r in results.values())
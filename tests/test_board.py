@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from src.board import QuoteBoard
+
+def test_snapshot_spreads():
+    board = QuoteBoard(coins=["btc", "eth", "sol"], exchanges=["mexc", "bybit", "binance"], max_age_ms=1_000)
+    board.update(coin="btc", exchange="mexc", price=100.0, timestamp=10_000)
+    board.update(coin="btc", exchange="bybit", price=102.0, timestamp=10_000)
+    board.update(coin="btc", exchange="binance", price=101.0, timestamp=10_000)
+    board.update(coin="eth", exchange="binance", price=50.0, timestamp=10_000)
+    board.update(coin="doge", exchange="binance", price=1.0, timestamp=10_000)
+
+    snapshot = board.snapshot(now_ms=10_500)
+
+    assert snapshot.quotes.tolist() == [3, 1, 0]
+    assert snapshot.min_price[0] == 100.0 and snapshot.max_price[0] == 102.0
+    assert snapshot.exchanges[snapshot.buy_exchange[0]] == "mexc"
+    assert snapshot.exchanges[snapshot.sell_exchange[0]] == "bybit"
+    assert snapshot.spread_pct[0] == pytest.approx(2.0)
+
+    assert snapshot.min_price[1] == 50.0 and np.isnan(snapshot.spread_pct[1])
+    assert snapshot.buy_exchange[2] == -1 and np.isnan(snapshot.min_price[2])
+
+def test_snapshot_masks_stale_quotes():
+    board = QuoteBoard(coins=["btc"], exchanges=["mexc", "bybit", "binance"], max_age_ms=1_000)
+    board.update(coin="btc", exchange="mexc", price=90.0, timestamp=1_000)
+    board.update(coin="btc", exchange="bybit", price=100.0, timestamp=5_000)
+    board.update(coin="btc", exchange="binance", price=101.0, timestamp=5_000)
+
+    snapshot = board.snapshot(now_ms=5_500)
+    assert snapshot.min_price[0] == 100.0
+    assert snapshot.spread_pct[0] == pytest.approx(1.0)
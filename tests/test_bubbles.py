@@ -0,0 +1,132 @@
+import gzip
+import json
+import pytest
+import pytest_asyncio
+
+from aiohttp import web
+
+from src.config import BubblesFilter
+from src.interests.bubbles import BubblesSource, bubbles_fetch, _project
+from src.interests.cache import ListingCache
+from src.interests.decoder import JsonArrayDecoder
+
+ITEMS = [
+    {
+        "cg_id": f"coin-{i}",
+        "symbol": f"C{i}",
+        "marketcap": 1000 + i,
+        "exchangePrices": {"Binance": 1.0, "MEXC": 1.1},
+        "performance": {"day": 1.0, "hour4": 2.0, "hour": 3.0, "min15": 4.0, "year": 5.0},
+        "image": "x" * 200,
+    } for i in range(300)
+]
+
+def test_decoder_handles_arbitrary_chunk_boundaries():
+    payload = json.dumps([{"a": "ü", "b": [1, 2]}, {"c": None}, 3]).encode()
+    for size in (1, 2, 7, len(payload)):
+        decoder = JsonArrayDecoder()
+        items = []
+        for i in range(0, len(payload), size):
+            items.extend(decoder.feed(payload[i:i + size]))
+        items.extend(decoder.close())
+        assert items == [{"a": "ü", "b": [1, 2]}, {"c": None}, 3]
+
+def test_decoder_rejects_truncated_payload():
+    decoder = JsonArrayDecoder()
+    assert decoder.feed(b'[{"a": 1}, {"b"') == [{"a": 1}]
+    with pytest.raises(ValueError):
+        decoder.close()
+
+def test_decoder_keeps_only_the_fields_filters_read():
+    decoder = JsonArrayDecoder(object_pairs_hook=_project)
+    (item,) = decoder.feed(json.dumps([ITEMS[0]]).encode()) + decoder.close()
+    assert item == {
+        "cg_id": "coin-0",
+        "symbol": "C0",
+        "marketcap": 1000,
+        "exchangePrices": {"Binance": None, "MEXC": None},
+        "performance": {"day": 1.0, "hour4": 2.0, "hour": 3.0, "min15": 4.0},
+    }
+
+@pytest_asyncio.fixture
+async def cryptobubbles():
+    body = gzip.compress(json.dumps(ITEMS).encode())
+    etag = '"v1"'
+    requests = []
+
+    async def bubbles(request):
+        requests.append(dict(request.headers))
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304)
+        return web.Response(
+            body=body,
+            content_type="application/json",
+            headers={"ETag": etag, "Content-Encoding": "gzip"},
+        )
+
+    app = web.Application()
+    app.router.add_get("/bubbles1000.usd", bubbles)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    yield f"http://127.0.0.1:{port}/bubbles1000.usd", requests
+    await runner.cleanup()
+
+@pytest.mark.asyncio
+async def test_source_parses_compressed_payload_and_skips_unchanged(cryptobubbles):
+    (url, requests) = cryptobubbles
+    source = BubblesSource(url=url)
+    try:
+        first = await source.fetch()
+        second = await source.fetch()
+    finally:
+        await source.close()
+
+    assert "gzip" in requests[0]["Accept-Encoding"]
+    assert requests[1]["If-None-Match"] == '"v1"'
+    assert source.not_modified == 1
+    assert second is first
+
+    assert len(first) == len(ITEMS)
+    assert first.ids[0] == "coin-0"
+    assert first.symbols[0] == "c0"
+    assert first.market_cap[0] == 1000.0
+    assert first.performance[0].tolist() == [1.0, 2.0, 3.0, 4.0]
+    assert first.listed[0] == ["binance", "mexc"]
+    assert first.exchanges[0] == 0b0101
+
+@pytest.mark.asyncio
+async def test_fetch_applies_each_filter_to_one_snapshot(cryptobubbles):
+    (url, _) = cryptobubbles
+    cache = ListingCache(path=None)
+    for i in range(len(ITEMS)):
+        cache.put(f"coin-{i}", ["binance", "coinbase"] if i % 2 else ["binance"])
+
+    def _filter(cap_min: float, cap_max: float, listed: int, day: float) -> BubblesFilter:
+        return BubblesFilter(
+            market_cap_min=cap_min,
+            market_cap_max=cap_max,
+            listed_exchanges=listed,
+            performance_per_day=day,
+            performance_per_hour_4=0,
+            performance_per_hour_1=0,
+            performance_per_minutes_15=0,
+        )
+
+    source = BubblesSource(url=url)
+    try:
+        (wide, paired, strict) = await bubbles_fetch(
+            [_filter(1000, 1009, 1, 0.5), _filter(1000, 1009, 2, 0.5), _filter(0, 10 ** 9, 1, 2.0)],
+            source=source,
+            cache=cache,
+        )
+    finally:
+        await source.close()
+
+    assert [b.id for b in wide] == [f"coin-{i}" for i in range(9, -1, -1)]
+    assert [b.id for b in paired] == ["coin-9", "coin-7", "coin-5", "coin-3", "coin-1"]
+    assert paired[0].listed_exc == ["binance", "coinbase"]
+    assert paired[0].performance == {"day": 1.0, "hour4": 2.0, "hour": 3.0, "min15": 4.0}
+    assert strict == []
@@ -0,0 +1,48 @@
+import pytest
+
+from unittest.mock import patch
+
+from src.interests.bubble import Bubble
+from src.interests.cache import ListingCache
+from src.interests.coingecko import usdt_exchanges
+
+def test_ttl_and_negative_entries():
+    cache = ListingCache(ttl_ms=1_000, negative_ttl_ms=100)
+    cache.put("bitcoin", ["binance", "mexc"], now_ms=0)
+    cache.put("ghost", None, now_ms=0)
+
+    assert cache.get("bitcoin", now_ms=500) == (True, ["binance", "mexc"])
+    assert cache.get("ghost", now_ms=50) == (True, None)
+    assert cache.get("ghost", now_ms=150) == (False, None)
+    assert cache.get("bitcoin", now_ms=1_000) == (False, None)
+    assert cache.get("unknown", now_ms=0) == (False, None)
+    assert cache.stats() == {"hits": 2, "misses": 3, "entries": 2}
+
+def test_survives_restart(tmp_path):
+    path = tmp_path / "listings.json"
+    cache = ListingCache(path=path)
+    cache.put("bitcoin", ["binance"])
+    cache.put("ghost", None)
+    cache.save()
+
+    restored = ListingCache(path=path)
+    assert len(restored) == 2
+    assert restored.get("bitcoin") == (True, ["binance"])
+    assert restored.get("ghost") == (True, None)
+
+@pytest.mark.asyncio
+async def test_usdt_exchanges_skips_network_on_hits():
+    cache = ListingCache()
+    cache.put("bitcoin", ["binance", "bybit"])
+    cache.put("ghost", None)
+    bubbles = [
+        Bubble(id="bitcoin", symbol="btc", market_cap=1.0, listed_exc=["mexc"], performance={}),
+        Bubble(id="ghost", symbol="gst", market_cap=1.0, listed_exc=["mexc"], performance={}),
+    ]
+
+    with patch("src.interests.coingecko.ClientSession") as session:
+        await usdt_exchanges(bubbles, cache=cache)
+        session.assert_not_called()
+
+    assert bubbles[0].listed_exc == ["binance", "bybit"]
+    assert bubbles[1].listed_exc == []
@@ -0,0 +1,57 @@
+import gzip
+import json
+import pytest
+
+from src.config import Settings, BubblesFilter, Exchange, Conflation
+from src.exchanges.capture import FrameRecorder, read_frames, read_coins
+from benchmarks.replay import replay
+
+def _ticker(symbol: str, price: float, timestamp: int) -> str:
+    return json.dumps({"e": "24hrTicker", "s": symbol, "c": str(price), "E": timestamp})
+
+def test_recorder_round_trip(tmp_path):
+    recorder = FrameRecorder(path=tmp_path / "mexc.frames.gz")
+    recorder.subscribed(["btc", "eth"])
+    recorder.write("pong", receive_ns=1)
+    recorder.write(b"\x0a\x01x", receive_ns=2)
+    recorder.subscribed(["sol"])
+    recorder.close()
+
+    assert recorder.frames == 2
+    assert list(read_frames(recorder.path)) == [(1, "pong"), (2, b"\x0a\x01x")]
+    assert read_coins(recorder.path) == ["btc", "eth", "sol"]
+
+def test_truncated_capture_keeps_complete_frames(tmp_path):
+    recorder = FrameRecorder(path=tmp_path / "binance.frames.gz")
+    for i in range(100):
+        recorder.write(_ticker("BTCUSDT", 100.0 + i, i), receive_ns=i)
+    recorder.close()
+
+    data = gzip.decompress(recorder.path.read_bytes())
+    truncated = tmp_path / "truncated.frames.gz"
+    truncated.write_bytes(gzip.compress(data[:len(data) // 2]))
+    frames = list(read_frames(truncated))
+    assert 0 < len(frames) < 100
+    assert frames[-1][1] == _ticker("BTCUSDT", 100.0 + len(frames) - 1, len(frames) - 1)
+
+@pytest.mark.asyncio
+async def test_replay_drives_the_tick_chain(tmp_path):
+    recorder = FrameRecorder(path=tmp_path / "binance.frames.gz")
+    recorder.subscribed(["btc", "eth"])
+    for i in range(50):
+        recorder.write(_ticker("BTCUSDT", 100.0 + i, i), receive_ns=i * 1000)
+        recorder.write(_ticker("ETHUSDT", 10.0 + i, i), receive_ns=i * 1000 + 1)
+        recorder.write(_ticker("XRPUSDT", 1.0, i), receive_ns=i * 1000 + 2)
+    recorder.close()
+
+    settings = Settings(
+        filter=BubblesFilter(0, 0, 0, 0, 0, 0, 0),
+        exchanges=[Exchange(name="binance", websocket="")],
+        conflation=Conflation(enabled=False),
+    )
+    report = await replay(path=recorder.path, exchange="binance", settings=settings)
+
+    assert report.frames == 150
+    assert report.ticks == 100
+    assert report.frames_per_second > 0
+    assert set(report.latency_us) == {"p50", "p90", "p99", "p99.9", "max"}
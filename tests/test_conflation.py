@@ -0,0 +1,54 @@
+import json
+import time
+
+from src.exchanges.binance import BinanceStreamer
+from src.exchanges.conflation import Conflator
+
+def test_deadband_suppresses_flat_prices():
+    conflator = Conflator(deadband=0.001, min_interval_ms=0, max_staleness_ms=10_000)
+    assert conflator.admit(coin="btc", price=100.0, now_ms=0)
+    assert not conflator.admit(coin="btc", price=100.05, now_ms=10)
+    assert conflator.admit(coin="btc", price=100.2, now_ms=20)
+    assert conflator.admit(coin="eth", price=100.2, now_ms=20)
+    assert (conflator.forwarded, conflator.suppressed) == (3, 1)
+
+def test_min_interval_and_staleness_override():
+    conflator = Conflator(deadband=0.001, min_interval_ms=100, max_staleness_ms=1_000)
+    assert conflator.admit(coin="btc", price=100.0, now_ms=0)
+    assert not conflator.admit(coin="btc", price=110.0, now_ms=50)
+    assert conflator.admit(coin="btc", price=110.0, now_ms=150)
+    assert not conflator.admit(coin="btc", price=110.0, now_ms=900)
+    assert conflator.admit(coin="btc", price=110.0, now_ms=1_150)
+    assert conflator.suppressed == 2
+
+def test_moves_inside_the_interval_are_held_and_released():
+    conflator = Conflator(deadband=0.001, min_interval_ms=100, max_staleness_ms=1_000)
+    assert conflator.admit(coin="btc", price=100.0, now_ms=0, timestamp=1)
+    assert not conflator.admit(coin="btc", price=105.0, now_ms=20, timestamp=2)
+    assert not conflator.admit(coin="btc", price=106.0, now_ms=40, timestamp=3)
+    assert conflator.admit(coin="eth", price=1.0, now_ms=40)
+
+    assert conflator.release(coins={"btc"}, now_ms=90) == []
+    assert conflator.release(coins={"eth"}, now_ms=100) == []
+    assert conflator.release(coins={"btc"}, now_ms=100) == [("btc", 106.0, 3)]
+    assert conflator.release(coins={"btc"}, now_ms=300) == []
+    assert (conflator.forwarded, conflator.suppressed) == (3, 1)
+
+    # A held move that falls back into the band of the last sent price is dropped.
+    assert not conflator.admit(coin="btc", price=110.0, now_ms=150, timestamp=4)
+    assert not conflator.admit(coin="btc", price=106.05, now_ms=160, timestamp=5)
+    assert conflator.release(coins={"btc"}, now_ms=400) == []
+
+def test_streamer_forwards_released_moves():
+    ticks = []
+    streamer = BinanceStreamer(
+        url="",
+        coins=["btc"],
+        callbacks={"btc": lambda price, timestamp: ticks.append(price)},
+        conflator=Conflator(deadband=0.001, min_interval_ms=60_000, max_staleness_ms=120_000),
+    )
+    streamer._handle_frame(json.dumps({"e": "24hrTicker", "E": 1, "s": "BTCUSDT", "c": "100.0"}))
+    streamer._handle_frame(json.dumps({"e": "24hrTicker", "E": 2, "s": "BTCUSDT", "c": "101.0"}))
+    assert ticks == [100.0]
+    streamer._release_held(now_ms=int(time.monotonic() * 1000) + 60_000)
+    assert ticks == [100.0, 101.0]
@@ -53,4 +53,73 @@ def test_insert_price(db):
         assert len(rows) == 1
         updated = rows[0]
         assert updated.price == pytest.approx(51000.5)
-        assert updated.timestamp == 1_600_000_100
\ No newline at end of file
+        assert updated.timestamp == 1_600_000_100
+
+def test_insert_prices(db):
+    db.insert_prices([
+        ("BTC", "binance", 50000.0, 1_600_000_000),
+        ("ETH", "binance", 3000.0, 1_600_000_000),
+        ("BTC", "bybit", 50001.0, 1_600_000_001),
+    ])
+    db.insert_prices([("BTC", "binance", 50002.0, 1_600_000_002)])
+
+    with Session(db.engine) as sess:
+        rows = sess.execute(
+            select(Coin.name, Exchange.name, PriceRecord.price)
+            .join(Coin, PriceRecord.coin_id == Coin.id)
+            .join(Exchange, PriceRecord.exchange_id == Exchange.id)
+        ).all()
+        assert sorted(rows) == [
+            ("BTC", "binance", 50002.0),
+            ("BTC", "bybit", 50001.0),
+            ("ETH", "binance", 3000.0),
+        ]
+
+
+def test_retain_prices_by_coin_and_exchange(db):
+    db.insert_prices([
+        ("btc", "binance", 1.0, 1),
+        ("btc", "bybit", 2.0, 1),
+        ("eth", "binance", 3.0, 1),
+    ])
+    db.retain_prices(pairs=[("btc", "binance"), ("eth", "bybit")])
+
+    with Session(db.engine) as sess:
+        rows = sess.execute(
+            select(Coin.name, Exchange.name)
+            .select_from(PriceRecord)
+            .join(Coin, PriceRecord.coin_id == Coin.id)
+            .join(Exchange, PriceRecord.exchange_id == Exchange.id)
+        ).all()
+        assert rows == [("btc", "binance")]
+
+def test_register_and_clear(db):
+    db.register(coins=["btc", "eth"], exchanges=["binance", "bybit"])
+    assert set(db.coin_ids) == {"btc", "eth"}
+    assert set(db.exchange_ids) == {"binance", "bybit"}
+
+    db.register(coins=["btc", "sol"])
+    assert len(set(db.coin_ids.values())) == 3
+
+    db.clear()
+    assert db.coin_ids == {} and db.exchange_ids == {}
+
+    db.register(coins=["sol"], exchanges=["mexc"])
+    db.insert_price(coin_name="sol", exch_name="mexc", exch_price=1.5, timestamp=1)
+    with Session(db.engine) as sess:
+        record = sess.execute(select(PriceRecord)).scalar_one()
+        assert record.coin_id == db.coin_ids["sol"]
+        assert record.exchange_id == db.exchange_ids["mexc"]
+
+def test_load_registry(tmp_path):
+    url = f"sqlite:///{tmp_path / 'data.db'}"
+    first = Database(url=url)
+    first.register(coins=["btc"], exchanges=["binance"])
+    first.close()
+
+    second = Database(url=url)
+    assert second.coin_ids == {}
+    second.load_registry()
+    assert second.coin_ids == first.coin_ids
+    assert second.exchange_ids == first.exchange_ids
+    second.close()
@@ -0,0 +1,69 @@
+import pytest
+
+from src.detector import EVENT_OPEN, EVENT_CLOSE, SpreadDetector
+
+def test_open_and_close_with_hysteresis():
+    events = []
+    detector = SpreadDetector(entry_spread_pct=2.0, exit_spread_pct=1.0, on_event=events.append)
+
+    assert detector.update(coin="btc", exchange="mexc", price=100.0, timestamp=1) is None
+    assert detector.update(coin="btc", exchange="bybit", price=100.8, timestamp=2) is None
+
+    opened = detector.update(coin="btc", exchange="binance", price=102.5, timestamp=3)
+    assert opened.kind == EVENT_OPEN
+    assert (opened.buy_exchange, opened.sell_exchange) == ("mexc", "binance")
+    assert opened.spread_pct == pytest.approx(2.5)
+
+    # Between exit and entry thresholds: no flapping.
+    assert detector.update(coin="btc", exchange="binance", price=101.5, timestamp=4) is None
+    assert detector.update(coin="btc", exchange="binance", price=102.2, timestamp=5) is None
+    assert detector.is_open("btc")
+
+    closed = detector.update(coin="btc", exchange="binance", price=100.5, timestamp=6)
+    assert closed.kind == EVENT_CLOSE
+    assert closed.sell_exchange == "bybit"
+    assert [e.kind for e in events] == [EVENT_OPEN, EVENT_CLOSE]
+
+def test_extremes_follow_worsening_holder():
+    detector = SpreadDetector(entry_spread_pct=5.0, exit_spread_pct=1.0)
+    detector.update(coin="eth", exchange="mexc", price=90.0, timestamp=1)
+    detector.update(coin="eth", exchange="bybit", price=100.0, timestamp=1)
+    detector.update(coin="eth", exchange="binance", price=99.2, timestamp=1)
+    assert detector.is_open("eth")
+
+    # The cheapest venue moves up; the next cheapest becomes the buy side.
+    closed = detector.update(coin="eth", exchange="mexc", price=99.5, timestamp=2)
+    assert closed.kind == EVENT_CLOSE
+    assert (closed.buy_exchange, closed.sell_exchange) == ("binance", "bybit")
+
+def test_stale_venues_stop_counting():
+    events = []
+    detector = SpreadDetector(entry_spread_pct=2.0, exit_spread_pct=1.0, on_event=events.append, max_age_ms=1_000)
+    detector.update(coin="btc", exchange="mexc", price=100.0, timestamp=0)
+    detector.update(coin="btc", exchange="bybit", price=100.5, timestamp=0)
+    detector.update(coin="btc", exchange="binance", price=100.2, timestamp=500)
+
+    # mexc went quiet, its old low must not open a spread against a move on the live venues.
+    assert detector.update(coin="btc", exchange="bybit", price=102.5, timestamp=1_600) is None
+    assert detector.update(coin="btc", exchange="binance", price=99.0, timestamp=1_700).kind == EVENT_OPEN
+
+    # The sell leg goes stale while binance keeps quoting: the spread closes on the legs it had.
+    closed = detector.update(coin="btc", exchange="binance", price=99.1, timestamp=2_700)
+    assert closed.kind == EVENT_CLOSE
+    assert (closed.buy_exchange, closed.sell_exchange) == ("binance", "bybit")
+    assert [e.kind for e in events] == [EVENT_OPEN, EVENT_CLOSE]
+
+def test_expire_closes_spreads_with_no_ticks_left():
+    detector = SpreadDetector(entry_spread_pct=2.0, exit_spread_pct=1.0, max_age_ms=1_000)
+    detector.update(coin="btc", exchange="mexc", price=100.0, timestamp=0)
+    detector.update(coin="btc", exchange="bybit", price=103.0, timestamp=0)
+    assert detector.is_open("btc")
+
+    assert detector.expire(now_ms=900) == []
+    (closed,) = detector.expire(now_ms=1_100)
+    assert closed.kind == EVENT_CLOSE and (closed.buy_exchange, closed.sell_exchange) == ("mexc", "bybit")
+    assert not detector.is_open("btc") and detector.expire(now_ms=5_000) == []
+
+def test_invalid_thresholds():
+    with pytest.raises(ValueError):
+        SpreadDetector(entry_spread_pct=1.0, exit_spread_pct=2.0)
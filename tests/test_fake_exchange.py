@@ -0,0 +1,61 @@
+import asyncio
+import pytest
+
+from benchmarks.fake_exchange import FakeExchange, VENUES
+from src.exchanges.mexc.mexc import run as run_mexc
+from src.exchanges.bybit import run as run_bybit
+from src.exchanges.binance import run as run_binance
+from src.exchanges.coinbase import run as run_coinbase
+
+RUNNERS = {
+    "mexc": run_mexc,
+    "bybit": run_bybit,
+    "binance": run_binance,
+    "coinbase": run_coinbase,
+}
+
+async def _wait_for(condition, timeout: float = 5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline
+        await asyncio.sleep(0.01)
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("venue", VENUES)
+async def test_streamer_receives_ticks_from_fake_venue(venue):
+    exchange = FakeExchange(venue=venue, messages_per_symbol=50, tick_ms=10, seed=1)
+    url = await exchange.start()
+    ticks = {"btc": [], "eth": []}
+    streamer = RUNNERS[venue](
+        url=url,
+        coins=["btc", "eth"],
+        callbacks={c: (lambda price, timestamp, c=c: ticks[c].append(price)) for c in ticks},
+    )
+    try:
+        await _wait_for(lambda: all(len(t) >= 3 for t in ticks.values()))
+        assert all(p > 0 for t in ticks.values() for p in t)
+
+        await streamer.unsubscribe(coins=["eth"])
+        await asyncio.sleep(0.1)
+        received = len(ticks["eth"])
+        await asyncio.sleep(0.1)
+        assert len(ticks["eth"]) == received
+    finally:
+        await streamer.stop()
+        await exchange.stop()
+
+@pytest.mark.asyncio
+async def test_streamer_reconnects_after_disconnect():
+    exchange = FakeExchange(venue="binance", messages_per_symbol=50, tick_ms=10, seed=1)
+    url = await exchange.start()
+    ticks = []
+    streamer = RUNNERS["binance"](url=url, coins=["btc"], callbacks={"btc": lambda price, timestamp: ticks.append(price)})
+    try:
+        await _wait_for(lambda: len(ticks) >= 3)
+        await exchange.kick()
+        await _wait_for(lambda: exchange.connections == 2)
+        received = len(ticks)
+        await _wait_for(lambda: len(ticks) > received + 3)
+    finally:
+        await streamer.stop()
+        await exchange.stop()
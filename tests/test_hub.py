@@ -0,0 +1,138 @@
+import json
+import time
+import socket
+import asyncio
+import aiohttp
+import pytest
+
+from contextlib import asynccontextmanager
+
+from src.detector import EVENT_OPEN, EVENT_CLOSE, SpreadEvent
+from src.hub import QuoteHub
+from src.metrics import Registry
+
+async def _receive(ws, timeout: float = 5.0):
+    message = await ws.receive(timeout=timeout)
+    assert message.type == aiohttp.WSMsgType.TEXT
+    return json.loads(message.data)
+
+async def _wait_for(condition, timeout: float = 10.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline
+        await asyncio.sleep(0.01)
+
+@asynccontextmanager
+async def _hub():
+    hub = QuoteHub(port=0, send_timeout_seconds=0.5, metrics=Registry())
+    await hub.start()
+    try:
+        yield hub
+    finally:
+        await hub.stop()
+
+@pytest.mark.asyncio
+async def test_clients_get_their_coins_from_the_latest_quote_on():
+    async with _hub() as hub:
+        hub.publish_quote("btc", "binance", 100.0, 1)
+        async with aiohttp.ClientSession() as session:
+            async with session.ws_connect(f"http://127.0.0.1:{hub.port}/ws") as ws:
+                await ws.send_str(json.dumps({"op": "subscribe", "coins": ["btc"]}))
+                updates = await _receive(ws)
+                assert [u["type"] for u in updates] == ["quote", "subscribed"]
+                assert updates[0]["price"] == 100.0 and updates[1]["coins"] == ["btc"]
+
+                hub.publish_quote("eth", "binance", 5.0, 2)
+                hub.publish_quote("btc", "bybit", 101.0, 2)
+                hub.publish_spread(SpreadEvent(EVENT_OPEN, "btc", "binance", "bybit", 100.0, 101.0, 1.0, 2))
+                updates = await _receive(ws)
+                assert [(u["type"], u["coin"]) for u in updates] == [("quote", "btc"), ("spread", "btc")]
+                assert updates[1]["event"] == EVENT_OPEN and updates[1]["sell_exchange"] == "bybit"
+
+                # Unread spread events queue up instead of replacing each other.
+                hub.publish_spread(SpreadEvent(EVENT_CLOSE, "btc", "binance", "bybit", 100.0, 100.0, 0.0, 3))
+                hub.publish_spread(SpreadEvent(EVENT_OPEN, "btc", "bybit", "binance", 99.0, 100.0, 1.0, 4))
+                updates = await _receive(ws)
+                assert [u["event"] for u in updates] == [EVENT_CLOSE, EVENT_OPEN]
+
+                await ws.send_str("not json")
+                assert (await _receive(ws))[0]["type"] == "error"
+                await ws.send_str(json.dumps({"op": "unsubscribe", "coins": ["btc"]}))
+                assert (await _receive(ws))[0]["coins"] == []
+                await _wait_for(lambda: not hub._subscribers)
+            await _wait_for(lambda: not hub.clients)
+        assert hub.total("sent") == 8
+
+@pytest.mark.asyncio
+async def test_throttled_clients_get_conflated_batches():
+    async with _hub() as hub:
+        async with aiohttp.ClientSession() as session:
+            async with session.ws_connect(f"http://127.0.0.1:{hub.port}/ws?interval_ms=200") as ws:
+                await ws.send_str(json.dumps({"op": "subscribe", "coins": "*"}))
+                assert (await _receive(ws))[0]["all"]
+
+                for i in range(100):
+                    hub.publish_quote("btc", "binance", float(i), i)
+                    hub.publish_quote(f"coin{i % 3}", "binance", float(i), i)
+                updates = await _receive(ws)
+                assert len(updates) == 4
+                assert updates[0]["price"] == 99.0
+                assert hub.total("conflated") == 196
+
+@pytest.mark.asyncio
+async def test_full_queues_drop_the_oldest_keys():
+    async with _hub() as hub:
+        hub.max_pending = 2
+        async with aiohttp.ClientSession() as session:
+            async with session.ws_connect(f"http://127.0.0.1:{hub.port}/ws") as ws:
+                await ws.send_str(json.dumps({"op": "subscribe", "coins": ["a", "b", "c"]}))
+                await _receive(ws)
+                for coin in ("a", "b", "c"):
+                    hub.publish_quote(coin, "binance", 1.0, 1)
+                assert [u["coin"] for u in await _receive(ws)] == ["b", "c"]
+                assert hub.total("evicted") == 1
+
+@pytest.mark.asyncio
+async def test_a_stalled_client_never_blocks_publishing():
+    async with _hub() as hub:
+        # A raw socket that upgrades and then never reads.
+        stalled = socket.socket()
+        stalled.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+        stalled.connect(("127.0.0.1", hub.port))
+        stalled.setblocking(False)
+        (reader, writer) = await asyncio.open_connection(sock=stalled)
+        writer.write(
+            f"GET /ws HTTP/1.1\r\nHost: 127.0.0.1:{hub.port}\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+            "Sec-WebSocket-Key: dGhlIHNhbXBsZSBub25jZQ==\r\nSec-WebSocket-Version: 13\r\n\r\n".encode()
+        )
+        assert (await reader.readuntil(b"\r\n\r\n")).startswith(b"HTTP/1.1 101")
+        await _wait_for(lambda: len(hub.clients) == 1)
+        (client,) = hub.clients
+        # Small kernel buffers so the unread data reaches the transport quickly.
+        client.transport.get_extra_info("socket").setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4096)
+        hub.subscribe(client, ["*"])
+
+        async with aiohttp.ClientSession() as session:
+            async with session.ws_connect(f"http://127.0.0.1:{hub.port}/ws") as ws:
+                await ws.send_str(json.dumps({"op": "subscribe", "coins": ["btc"]}))
+                await _receive(ws)
+
+                slowest = 0.0
+                for i in range(400):
+                    start = time.perf_counter()
+                    for c in range(200):
+                        hub.publish_quote(f"coin{c}", "binance", float(i), i)
+                    hub.publish_quote("btc", "binance", float(i), i)
+                    slowest = max(slowest, time.perf_counter() - start)
+                    await asyncio.sleep(0)
+                    if hub.slow_disconnects:
+                        break
+                await _wait_for(lambda: hub.slow_disconnects == 1)
+                assert slowest < 0.25
+                assert len(client.pending) <= hub.max_pending
+
+                # The healthy client keeps up with the latest price.
+                last = None
+                while last != float(i):
+                    last = (await _receive(ws))[-1]["price"]
+        writer.close()
@@ -0,0 +1,56 @@
+import numpy as np
+
+from src.journal import TickJournal, TickJournalReader
+
+def _fill(journal, start, count):
+    for i in range(count):
+        journal.append(coin_id=i % 3, exchange_id=i % 2, price=100.0 + i, exchange_ts=start + i - 5, receive_ts=start + i)
+
+def test_append_rotate_and_scan(tmp_path):
+    journal = TickJournal(directory=tmp_path, segment_records=4)
+    _fill(journal, start=1_000, count=10)
+
+    assert len(list(tmp_path.glob("*.ticks"))) == 3
+
+    with TickJournalReader(directory=tmp_path) as reader:
+        chunks = list(reader.scan(start_ms=1_002, end_ms=1_008))
+        assert all(not c.flags.owndata and not c.flags.writeable for c in chunks)
+
+        records = np.concatenate(chunks)
+        assert records["receive_ts"].tolist() == list(range(1_002, 1_008))
+        assert records["price"].tolist() == [102.0, 103.0, 104.0, 105.0, 106.0, 107.0]
+        assert records["exchange_ts"][0] == 997
+        del chunks
+
+        journal.close()
+        assert sum(len(c) for c in reader.scan(start_ms=0, end_ms=10_000)) == 10
+    assert not reader._maps
+
+def test_receive_ts_kept_monotonic(tmp_path):
+    journal = TickJournal(directory=tmp_path, segment_records=8)
+    journal.append(coin_id=1, exchange_id=1, price=1.0, exchange_ts=1, receive_ts=50)
+    journal.append(coin_id=1, exchange_id=1, price=2.0, exchange_ts=2, receive_ts=40)
+    journal.close()
+
+    with TickJournalReader(directory=tmp_path) as reader:
+        records = next(reader.scan(start_ms=0, end_ms=100))
+        assert records["receive_ts"].tolist() == [50, 50]
+        del records
+
+def test_retention_deletes_old_segments(tmp_path):
+    journal = TickJournal(directory=tmp_path, segment_records=2, retention_ms=100)
+    _fill(journal, start=1_000, count=4)
+    assert len(list(tmp_path.glob("*.ticks"))) == 2
+
+    journal.append(coin_id=0, exchange_id=0, price=1.0, exchange_ts=1_200, receive_ts=1_200)
+    names = sorted(p.name for p in tmp_path.glob("*.ticks"))
+    assert len(names) == 1 and names[0].startswith(f"{1_200:016d}")
+    journal.close()
+
+def test_slow_feeds_rotate_by_age_and_reach_retention(tmp_path):
+    journal = TickJournal(directory=tmp_path, segment_records=1_000, retention_ms=100, segment_ms=50)
+    for ts in (1_000, 1_040, 1_060, 1_100, 1_170):
+        journal.append(coin_id=0, exchange_id=0, price=1.0, exchange_ts=ts, receive_ts=ts)
+    names = sorted(p.name for p in tmp_path.glob("*.ticks"))
+    assert [n[:16] for n in names] == [f"{1_060:016d}", f"{1_170:016d}"]
+    journal.close()
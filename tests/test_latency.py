@@ -0,0 +1,124 @@
+import json
+import math
+import time
+import random
+import asyncio
+import threading
+
+import pytest
+
+from src.latency import STAGE_NETWORK, STAGE_PARSE, STAGE_PERSIST, HdrHistogram, ClockOffset, VenueLatency, LatencyTracer
+from src.exchanges.binance import BinanceStreamer
+from src.exchanges.conflation import Conflator
+
+def test_histogram_percentiles_within_relative_error():
+    rng = random.Random(3)
+    values = sorted(int(rng.lognormvariate(8.0, 2.0)) for _ in range(20_000))
+    histogram = HdrHistogram()
+    for value in values:
+        histogram.record(value)
+
+    assert histogram.count == len(values)
+    assert (histogram.min, histogram.max) == (values[0], values[-1])
+    for p in (50, 90, 99, 99.9):
+        exact = values[max(0, math.ceil(round(len(values) * p / 100, 9)) - 1)]
+        assert abs(histogram.percentile(p) - exact) <= max(1, exact * 0.01)
+
+def test_histogram_small_values_are_exact_and_intervals_subtract():
+    histogram = HdrHistogram()
+    for value in (3, 3, 7, 200):
+        histogram.record(value)
+    assert histogram.percentiles((25, 50, 75, 100)) == {"p25": 3, "p50": 3, "p75": 7, "p100": 200}
+
+    earlier = histogram.copy()
+    histogram.record(5_000_000)
+    interval = histogram.since(earlier)
+    assert interval.count == 1
+    assert abs(interval.percentile(50) - 5_000_000) <= 50_000
+
+    merged = HdrHistogram()
+    merged.merge(histogram)
+    merged.merge(histogram)
+    assert merged.count == 10
+    assert merged.percentile(100) == histogram.percentile(100)
+
+def test_clock_offset_is_a_windowed_minimum():
+    offset = ClockOffset(window_ms=10_000, slots=10)
+    assert offset.update(delay_us=5_000, now_ms=0) == 5_000
+    assert offset.update(delay_us=2_000, now_ms=500) == 2_000
+    assert offset.update(delay_us=9_000, now_ms=5_000) == 2_000
+    # The 2 ms sample ages out of the window, the floor rises to the next one.
+    assert offset.update(delay_us=8_000, now_ms=10_500) == 8_000
+
+def test_venue_removes_skew_and_flags_slow_quotes():
+    venue = VenueLatency(exchange="binance", slow_ms=100)
+    skew_ms = -40_000
+    base_ns = 1_700_000_000_000 * 1_000_000
+
+    for (i, network_ms) in enumerate((5, 7, 6, 5)):
+        exchange_ts = 1_700_000_000_000 + i * 1000
+        receive_ns = base_ns + (i * 1000 + network_ms + skew_ms) * 1_000_000
+        assert not venue.observe(coin="btc", exchange_ts=exchange_ts, receive_ns=receive_ns, parsed_ns=receive_ns + 20_000)
+
+    network = venue.histograms[STAGE_NETWORK]
+    assert network.max <= 2_000
+    assert venue.offset.offset_us == (5 + skew_ms) * 1000
+    assert venue.histograms[STAGE_PARSE].percentile(50) == 20
+
+    receive_ns = base_ns + (5000 + 500 + skew_ms) * 1_000_000
+    assert venue.observe(coin="eth", exchange_ts=1_700_000_005_000, receive_ns=receive_ns, parsed_ns=receive_ns)
+    assert venue.is_slow("eth") and not venue.is_slow("btc")
+    assert venue.slow == 1
+
+def test_streamer_feeds_all_stages():
+    tracer = LatencyTracer(exchanges=["binance"], slow_ms=1000)
+    venue = tracer.venues["binance"]
+    streamer = BinanceStreamer(
+        url="",
+        coins=["btc"],
+        callbacks={"btc": lambda price, timestamp: None},
+        conflator=Conflator(deadband=0.01, max_staleness_ms=60_000),
+        latency=venue,
+    )
+
+    def _frame(price: float, timestamp: int) -> str:
+        return json.dumps({"e": "24hrTicker", "E": timestamp, "s": "BTCUSDT", "c": str(price)})
+
+    now_ns = 1_700_000_000_000 * 1_000_000
+    streamer._handle_frame(_frame(100.0, 1_700_000_000_000), receive_ns=now_ns + 3_000_000)
+    # Suppressed by the deadband, never persisted.
+    streamer._handle_frame(_frame(100.1, 1_700_000_000_001), receive_ns=now_ns + 4_000_000)
+    tracer.on_written([("btc", "binance", 100.1, 1_700_000_000_001)])
+    assert venue.histograms[STAGE_PERSIST].count == 0
+    tracer.on_written([("btc", "binance", 100.0, 1_700_000_000_000)])
+
+    assert venue.histograms[STAGE_NETWORK].count == 2
+    assert venue.histograms[STAGE_PERSIST].count == 1
+    stats = tracer.stats()["binance"]
+    assert stats["stages"][STAGE_PERSIST]["count"] == 1
+    assert set(stats["stages"][STAGE_NETWORK]) == {"count", "p50", "p90", "p99", "p99.9"}
+    assert tracer.summary()[0].startswith("binance: 2 ticks")
+    assert tracer.summary() == []
+
+@pytest.mark.asyncio
+async def test_writer_thread_hands_persists_to_the_loop():
+    tracer = LatencyTracer(exchanges=["binance"], loop=asyncio.get_running_loop())
+    venue = tracer.venues["binance"]
+    venue.observe(coin="btc", exchange_ts=1_700_000_000_000, receive_ns=time.time_ns(), parsed_ns=time.time_ns())
+
+    writer = threading.Thread(target=tracer.on_written, args=([("btc", "binance", 100.0, 1_700_000_000_000)],))
+    writer.start()
+    writer.join()
+    # Nothing changes until the loop runs the handed over rows.
+    assert venue.histograms[STAGE_PERSIST].count == 0
+    await asyncio.sleep(0)
+    assert venue.histograms[STAGE_PERSIST].count == 1
+    assert "btc" not in venue._pending
+
+def test_older_rows_keep_the_newer_pending_tick():
+    venue = VenueLatency(exchange="binance")
+    venue.observe(coin="btc", exchange_ts=2, receive_ns=2_000_000, parsed_ns=2_000_000)
+    venue.persisted(coin="btc", exchange_ts=1, persisted_ns=3_000_000)
+    assert venue.histograms[STAGE_PERSIST].count == 0
+    venue.persisted(coin="btc", exchange_ts=2, persisted_ns=3_000_000)
+    assert venue.histograms[STAGE_PERSIST].count == 1
@@ -0,0 +1,111 @@
+import pytest
+import pytest_asyncio
+
+from aiohttp import web, ClientSession
+
+from src.interests.bubble import Bubble
+from src.interests.coingecko import usdt_exchanges
+from src.interests.listings import ListingIndex
+from src.interests.scheduler import TokenBucket
+
+def _ticker(coin_id: str, target_id: str = "tether"):
+    return {"coin_id": coin_id, "target_coin_id": target_id}
+
+@pytest_asyncio.fixture
+async def coingecko():
+    pages = {
+        "binance": [
+            [_ticker(f"coin-{i}") for i in range(99)] + [_ticker("bitcoin")],
+            [_ticker("ethereum"), _ticker("solana", target_id="usd")],
+        ],
+        "gdax": [
+            [_ticker("bitcoin"), _ticker("bitcoin", target_id="usd")],
+        ],
+    }
+    requests = []
+
+    async def tickers(request):
+        exchange_id = request.match_info["exchange_id"]
+        page = int(request.query["page"])
+        requests.append((exchange_id, page))
+        if len(requests) == 1:
+            return web.Response(status=429, headers={"Retry-After": "0"})
+        if exchange_id not in pages:
+            return web.Response(status=500)
+        return web.json_response({"tickers": pages[exchange_id][page - 1]})
+
+    async def coin_tickers(request):
+        requests.append((request.match_info["coin_id"], None))
+        return web.Response(status=500)
+
+    app = web.Application()
+    app.router.add_get("/exchanges/{exchange_id}/tickers", tickers)
+    app.router.add_get("/coins/{coin_id}/tickers", coin_tickers)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    yield f"http://127.0.0.1:{port}", requests
+    await runner.cleanup()
+
+@pytest.mark.asyncio
+async def test_refresh_builds_usdt_index_from_pages(coingecko):
+    (base_url, requests) = coingecko
+    index = ListingIndex(
+        exchanges={"binance": "binance", "gdax": "coinbase"},
+        api_url=base_url + "/exchanges/{exchange_id}/tickers",
+    )
+    bucket = TokenBucket(capacity=10, refill_per_second=100)
+
+    assert not index.is_fresh
+    async with ClientSession() as session:
+        assert await index.refresh(session=session, bucket=bucket)
+
+    assert index.is_fresh
+    assert index.pages == 3
+    assert len(requests) == 4
+    assert len(index) == 101
+    assert index.lookup("bitcoin") == ["binance", "coinbase"]
+    assert index.lookup("ethereum") == ["binance"]
+    assert index.lookup("solana") == []
+
+@pytest.mark.asyncio
+async def test_a_failed_exchange_keeps_the_others(coingecko):
+    (base_url, requests) = coingecko
+    index = ListingIndex(
+        exchanges={"binance": "binance", "gdax": "coinbase", "mxc": "mexc"},
+        api_url=base_url + "/exchanges/{exchange_id}/tickers",
+    )
+    bucket = TokenBucket(capacity=10, refill_per_second=100)
+    async with ClientSession() as session:
+        assert await index.refresh(session=session, bucket=bucket)
+
+    assert index.is_fresh and index.failed == {"mexc"}
+    assert index.lookup("bitcoin") == ["binance", "coinbase"]
+
+    # The failed exchange falls back to the cryptobubbles listing, the loaded ones do not.
+    bubbles = [Bubble(id="bitcoin", symbol="btc", market_cap=1.0, listed_exc=["mexc", "bybit"], performance={})]
+    await usdt_exchanges(bubbles, bucket=bucket, index=index, api_url=base_url + "/coins/{coin_id}/tickers")
+    assert bubbles[0].listed_exc == ["binance", "coinbase", "mexc"]
+
+@pytest.mark.asyncio
+async def test_usdt_exchanges_uses_index_instead_of_coin_lookups(coingecko):
+    (base_url, requests) = coingecko
+    index = ListingIndex(
+        exchanges={"binance": "binance", "gdax": "coinbase"},
+        api_url=base_url + "/exchanges/{exchange_id}/tickers",
+    )
+    bubbles = [
+        Bubble(id="bitcoin", symbol="btc", market_cap=1.0, listed_exc=["mexc"], performance={}),
+        Bubble(id="solana", symbol="sol", market_cap=1.0, listed_exc=["mexc"], performance={}),
+    ]
+    bucket = TokenBucket(capacity=10, refill_per_second=100)
+
+    await usdt_exchanges(bubbles, bucket=bucket, index=index, api_url=base_url + "/coins/{coin_id}/tickers")
+    assert bubbles[0].listed_exc == ["binance", "coinbase"]
+    assert bubbles[1].listed_exc == ["mexc"]
+
+    fetched = len(requests)
+    await usdt_exchanges(bubbles, bucket=bucket, index=index, api_url=base_url + "/coins/{coin_id}/tickers")
+    assert len(requests) == fetched
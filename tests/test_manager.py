@@ -0,0 +1,182 @@
+import os
+import pytest
+
+from typing import List
+from unittest.mock import patch
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from src.basics import time_millis
+from src.config import Settings, BubblesFilter, Exchange, Conflation
+from src.database import Database, Coin, PriceRecord
+from src.hub import HubClient, QuoteHub
+from src.interests.bubble import Bubble
+from src.interests.movers import MoverEngine
+from src.manager import MainManager
+from src.metrics import Registry
+from src.quote_feed import QuoteFeed, QuoteFeedReader
+from src.writer import DatabaseWriter
+
+class FakeStreamer:
+    def __init__(self, url, coins, callbacks, conflator=None, planner=None, recorder=None, metrics=None, latency=None):
+        self.url = url
+        self.coins = list(coins)
+        self.callbacks = dict(callbacks)
+        self.frames = 0
+        self.stopped = False
+
+    async def subscribe(self, coins, callbacks):
+        self.coins.extend(coins)
+        self.callbacks.update({c: callbacks[c] for c in coins})
+
+    async def unsubscribe(self, coins):
+        self.coins = [c for c in self.coins if c not in coins]
+        for c in coins:
+            del self.callbacks[c]
+
+    async def stop(self):
+        self.stopped = True
+
+def _bubbles(symbols: List[str], exchanges: List[str]) -> List[Bubble]:
+    return [Bubble(id=s, symbol=s, market_cap=1.0, listed_exc=exchanges, performance={}) for s in symbols]
+
+@pytest.fixture
+def manager():
+    database = Database(url="sqlite:///:memory:")
+    writer = DatabaseWriter(database=database)
+    writer.start()
+    settings = Settings(
+        filter=BubblesFilter(0, 0, 0, 0, 0, 0, 0),
+        exchanges=[Exchange(name="mexc", websocket="wss://mexc", streams_per_connection=30, max_frames_per_second=10), Exchange(name="binance", websocket="wss://binance")],
+        conflation=Conflation(enabled=False),
+    )
+    started = []
+
+    def _run(url, coins, callbacks, conflator=None, planner=None, recorder=None, metrics=None, latency=None):
+        streamer = FakeStreamer(url=url, coins=coins, callbacks=callbacks, conflator=conflator, planner=planner, recorder=recorder, metrics=metrics)
+        started.append(streamer)
+        return streamer
+
+    with patch("src.manager.run_mexc", new=_run), patch("src.manager.run_binance", new=_run):
+        main_manager = MainManager(settings=settings, database=database, writer=writer)
+        main_manager.started = started
+        yield main_manager
+    writer.close()
+
+@pytest.mark.asyncio
+async def test_start_diffs_watchlist(manager):
+    symbols = [f"c{i}" for i in range(35)]
+    await manager._start(_bubbles(symbols, ["mexc", "binance"]))
+
+    mexc = manager.streamers["mexc"]
+    assert [len(s.coins) for s in mexc] == [30, 5]
+    assert [len(s.coins) for s in manager.streamers["binance"]] == [35]
+    assert len(manager.started) == 3
+
+    manager.started[0].callbacks["c0"](10.0, 1)
+    manager.started[0].callbacks["c1"](11.0, 1)
+
+    await manager._start(_bubbles(symbols[1:] + ["new"], ["mexc", "binance"]))
+    assert len(manager.started) == 3
+    assert "c0" not in mexc[0].coins
+    assert "new" in mexc[0].coins and len(mexc[0].coins) == 30
+    assert sorted(manager.streamers["binance"][0].coins) == sorted(symbols[1:] + ["new"])
+
+    manager.writer.call(lambda: None).result(timeout=5)
+    with Session(manager.database.engine) as sess:
+        names = sess.execute(
+            select(Coin.name).join(PriceRecord, PriceRecord.coin_id == Coin.id)
+        ).scalars().all()
+        assert names == ["c1"]
+
+@pytest.mark.asyncio
+async def test_start_stops_emptied_shards(manager):
+    await manager._start(_bubbles([f"c{i}" for i in range(35)], ["mexc"]))
+    last = manager.streamers["mexc"][1]
+
+    await manager._start(_bubbles([f"c{i}" for i in range(30)], ["mexc"]))
+    assert last.stopped
+    assert len(manager.streamers["mexc"]) == 1
+    assert manager.board.coins == [f"c{i}" for i in range(30)]
+
+@pytest.mark.asyncio
+async def test_board_is_read_by_the_metrics(manager):
+    await manager._start(_bubbles(["c0", "c1"], ["mexc", "binance"]))
+    now = time_millis()
+    manager.streamers["binance"][0].callbacks["c0"](100.0, now)
+    manager.streamers["mexc"][0].callbacks["c0"](102.0, now)
+    manager.streamers["binance"][0].callbacks["c1"](5.0, now)
+    assert manager.metrics.get("board_paired_coins").labels().get() == 1
+    assert manager.metrics.get("board_max_spread_pct").labels().get() == pytest.approx(2.0)
+
+def test_refresh_histogram_covers_paced_refreshes(manager):
+    manager._refresh_seconds.observe(90.0)
+    rendered = manager.metrics.render()
+    assert 'referee_watchlist_refresh_seconds_bucket{le="120"} 1' in rendered
+    assert 'referee_watchlist_refresh_seconds_bucket{le="60"} 0' in rendered
+
+
+@pytest.mark.asyncio
+async def test_rebalance_splits_hot_shard(manager):
+    await manager._start(_bubbles([f"c{i}" for i in range(10)], ["mexc"]))
+    (hot,) = manager.streamers["mexc"]
+    hot.frames = 1_000
+
+    await manager._rebalance(interval_seconds=10)
+    assert [len(s.coins) for s in manager.streamers["mexc"]] == [5, 5]
+    assert set(manager.streamers["mexc"][1].callbacks) == {f"c{i}" for i in range(5, 10)}
+
+    await manager._rebalance(interval_seconds=10)
+    assert len(manager.streamers["mexc"]) == 2
+
+@pytest.mark.asyncio
+async def test_movers_join_fetched_watchlist(manager):
+    manager.discovery = MoverEngine(
+        filter=manager.settings.filter,
+        exchanges=["mexc", "binance"],
+        on_change=manager._on_movers,
+    )
+    manager.fetched = _bubbles(["a", "b"], ["mexc"])
+    manager.discovery.movers = _bubbles(["b", "m"], ["binance"])
+
+    assert await manager._apply_watchlist()
+    assert [b.symbol for b in manager.watchlist] == ["a", "b", "m"]
+    assert manager.streamers["binance"][0].coins == ["m"]
+    assert not await manager._apply_watchlist()
+
+    manager.discovery.movers = []
+    await manager._on_movers([])
+    assert [b.symbol for b in manager.watchlist] == ["a", "b"]
+    assert manager.streamers["binance"] == []
+
+
+@pytest.mark.asyncio
+async def test_ticks_reach_the_quote_feed(manager):
+    manager.feed = QuoteFeed.create(name=f"referee-manager-{os.getpid()}", capacity=8, exchanges=["mexc", "binance"])
+    reader = QuoteFeedReader(manager.feed.name)
+    try:
+        await manager._start(_bubbles(["c0", "c1"], ["mexc", "binance"]))
+        manager.streamers["binance"][0].callbacks["c1"](10.0, 5)
+        assert reader.quote("c1", "binance") == (10.0, 5)
+
+        await manager._start(_bubbles(["c1", "c2"], ["mexc", "binance"]))
+        assert reader.changed and reader.quote("c0", "binance") is None
+        assert reader.quote("c1", "binance") == (10.0, 5)
+    finally:
+        reader.close()
+        manager.feed.close()
+
+@pytest.mark.asyncio
+async def test_ticks_and_spreads_reach_hub_subscribers(manager):
+    manager.hub = QuoteHub(metrics=Registry())
+    client = HubClient(socket=None, max_pending=16, interval_ms=0)
+    manager.hub.subscribe(client, ["c1"])
+    await manager._start(_bubbles(["c0", "c1"], ["mexc", "binance"]))
+    manager.streamers["binance"][0].callbacks["c0"](9.0, 5)
+    manager.streamers["binance"][0].callbacks["c1"](10.0, 5)
+    manager.streamers["mexc"][0].callbacks["c1"](12.0, 6)
+    assert sorted(client.pending) == [("quote", "c1", "binance"), ("quote", "c1", "mexc"), ("spread", "c1", "1")]
+
+    await manager._start(_bubbles(["c1"], ["mexc", "binance"]))
+    assert ("c0", "binance") not in manager.hub._latest
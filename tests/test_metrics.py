@@ -0,0 +1,94 @@
+import json
+import pytest
+import aiohttp
+
+from src.database import Database
+from src.metrics import Registry, MetricsServer
+from src.writer import DatabaseWriter
+from src.exchanges.base import StreamerMetrics
+from src.exchanges.binance import BinanceStreamer
+from src.exchanges.conflation import Conflator
+
+def _frame(symbol: str, price: float) -> str:
+    return json.dumps({"e": "24hrTicker", "E": 1, "s": symbol, "c": str(price)})
+
+def test_render_counters_gauges_and_histograms():
+    registry = Registry()
+    frames = registry.counter("frames_total", "Frames", ("exchange",))
+    frames.labels("binance").inc()
+    frames.labels("binance").inc(2)
+    registry.gauge("depth", "Depth").labels().set_function(lambda: 7)
+    latency = registry.histogram("write_seconds", "Writes", buckets=(0.1, 1.0))
+    latency.labels().observe(0.05)
+    latency.labels().observe(0.5)
+    latency.labels().observe(5.0)
+
+    text = registry.render()
+    assert "# TYPE referee_frames_total counter" in text
+    assert 'referee_frames_total{exchange="binance"} 3' in text
+    assert "referee_depth 7" in text
+    assert 'referee_write_seconds_bucket{le="0.1"} 1' in text
+    assert 'referee_write_seconds_bucket{le="1"} 2' in text
+    assert 'referee_write_seconds_bucket{le="+Inf"} 3' in text
+    assert "referee_write_seconds_sum 5.55" in text
+    assert "referee_write_seconds_count 3" in text
+
+def test_registering_twice_returns_the_same_series():
+    registry = Registry()
+    assert registry.counter("a_total", "A", ("x",)) is registry.counter("a_total", "A", ("x",))
+    with pytest.raises(ValueError):
+        registry.gauge("a_total", "A", ("x",))
+    with pytest.raises(ValueError):
+        registry.counter("a_total", "A", ("x",)).labels("1", "2")
+
+def test_streamer_counts_ticks_and_drops_by_reason():
+    registry = Registry()
+    ticks = []
+    streamer = BinanceStreamer(
+        url="",
+        coins=["btc"],
+        callbacks={"btc": lambda price, timestamp: ticks.append(price)},
+        conflator=Conflator(deadband=0.01, max_staleness_ms=60_000),
+        metrics=StreamerMetrics(registry=registry, exchange="binance", shard="0"),
+    )
+    streamer._handle_frame(_frame("BTCUSDT", 100.0))
+    streamer._handle_frame(_frame("BTCUSDT", 100.1))
+    streamer._handle_frame(_frame("ETHUSDT", 10.0))
+    streamer._handle_frame(json.dumps({"result": None, "id": 1}))
+
+    assert ticks == [100.0]
+    text = registry.render()
+    assert 'referee_ticks_total{exchange="binance",shard="0"} 1' in text
+    for reason in ("unparsed", "unsubscribed", "conflated"):
+        assert f'referee_frames_dropped_total{{exchange="binance",shard="0",reason="{reason}"}} 1' in text
+    assert 'referee_parse_seconds_count{exchange="binance",shard="0"} 4' in text
+
+def test_writer_reports_depth_and_write_latency():
+    registry = Registry()
+    database = Database(url="sqlite:///:memory:")
+    writer = DatabaseWriter(database=database, metrics=registry)
+    writer.call(database.register, coins=["btc"], exchanges=["binance"])
+    writer.put_prices([("btc", "binance", 1.0, 1)])
+    assert "referee_writer_queue_depth 2" in registry.render()
+
+    writer.start()
+    writer.close()
+    text = registry.render()
+    assert "referee_writer_queue_depth 0" in text
+    assert "referee_writer_rows_total 1" in text
+    assert "referee_writer_write_seconds_count 1" in text
+
+@pytest.mark.asyncio
+async def test_server_serves_text_format():
+    registry = Registry()
+    registry.counter("up_total", "Up").labels().inc()
+    server = MetricsServer(registry=registry, port=0)
+    port = await server.start()
+    try:
+        async with aiohttp.ClientSession() as session:
+            async with session.get(f"http://127.0.0.1:{port}/metrics") as response:
+                assert response.status == 200
+                assert response.headers["Content-Type"].startswith("text/plain")
+                assert "referee_up_total 1" in await response.text()
+    finally:
+        await server.stop()
@@ -0,0 +1,148 @@
+import json
+import math
+import asyncio
+import numpy as np
+import pytest
+
+from unittest.mock import patch
+
+from src.config import BubblesFilter
+from src.exchanges.binance import BinanceMarketStreamer
+from src.exchanges.mexc.mexc import MexcMarketStreamer
+from src.exchanges.mexc.proto.PushDataV3ApiWrapper_pb2 import PushDataV3ApiWrapper
+from src.interests.bubbles import BubbleColumns, make_bubble
+from src.interests.movers import MoverWindows, MoverEngine
+
+MINUTE = 60_000
+HOUR = 60 * MINUTE
+
+def _columns(symbols, caps, listed):
+    return BubbleColumns(
+        ids=[f"{s}-id" for s in symbols],
+        symbols=list(symbols),
+        listed=[list(x) for x in listed],
+        market_cap=np.array(caps, dtype=np.float64),
+        performance=np.zeros((len(symbols), 4)),
+        exchanges=np.zeros(len(symbols), dtype=np.uint8),
+    )
+
+def test_windows_carry_quiet_symbols_forward():
+    windows = MoverWindows(resolution_ms=MINUTE)
+    start = 1_000 * HOUR
+    windows.update(coin="abc", price=100.0, day_change=1.0, timestamp=start)
+    windows.update(coin="abc", price=110.0, day_change=11.0, timestamp=start + 4 * HOUR)
+
+    changes = windows.changes(now_ms=start + 4 * HOUR)
+    assert changes[0, 0] == 11.0
+    assert math.isclose(changes[0, 1], 10.0)
+    assert math.isclose(changes[0, 2], 10.0)
+    assert math.isclose(changes[0, 3], 10.0)
+
+    # Seen for less than the window: no reference yet.
+    windows.update(coin="new", price=5.0, day_change=0.0, timestamp=start + 4 * HOUR)
+    assert np.isnan(windows.changes(now_ms=start + 4 * HOUR)[1, 1])
+
+    # No trades since: the move is zero, not unknown.
+    assert windows.changes(now_ms=start + 9 * HOUR)[0, 3] == 0.0
+
+def test_engine_qualifies_movers_and_holds_them():
+    filter = BubblesFilter(
+        market_cap_min=10,
+        market_cap_max=1000,
+        listed_exchanges=2,
+        performance_per_day=5,
+        performance_per_hour_4=2,
+        performance_per_hour_1=1,
+        performance_per_minutes_15=0.5,
+    )
+
+    async def _on_change(movers):
+        pass
+
+    engine = MoverEngine(
+        filter=filter,
+        exchanges=["mexc", "binance", "bybit"],
+        on_change=_on_change,
+        hold_ms=10 * MINUTE,
+    )
+    engine.set_universe(_columns(
+        ["abc", "big", "one"],
+        [100, 10 ** 6, 100],
+        [["bybit", "kraken"], ["bybit"], []],
+    ))
+
+    start = 1_000 * HOUR
+    for coin in ("abc", "big", "one"):
+        engine.update(venue="binance", tickers=[(coin, 100.0, 10.0, start)])
+        engine.update(venue="binance", tickers=[(coin, 105.0, 10.0, start + 4 * HOUR)])
+    engine.update(venue="mexc", tickers=[("xyz", 1.0, 50.0, start)])
+
+    movers = engine.evaluate(now_ms=start + 4 * HOUR)
+    assert [b.symbol for b in movers] == ["abc"]
+    assert movers[0].id == "abc-id"
+    assert movers[0].listed_exc == ["binance", "bybit"]
+    assert movers[0].performance["day"] == 10.0
+
+    assert [b.symbol for b in engine.evaluate(now_ms=start + 4 * HOUR + 5 * MINUTE)] == ["abc"]
+    assert engine.evaluate(now_ms=start + 4 * HOUR + 20 * MINUTE) == []
+
+@pytest.mark.asyncio
+async def test_failed_changes_are_retried():
+    calls = []
+
+    async def _on_change(movers):
+        calls.append([b.symbol for b in movers])
+        if len(calls) == 1:
+            raise RuntimeError("writer closed")
+
+    engine = MoverEngine(
+        filter=BubblesFilter(
+            market_cap_min=0,
+            market_cap_max=10 ** 9,
+            listed_exchanges=1,
+            performance_per_day=0,
+            performance_per_hour_4=0,
+            performance_per_hour_1=0,
+            performance_per_minutes_15=0,
+        ),
+        exchanges=["binance"],
+        on_change=_on_change,
+        evaluate_interval_ms=10,
+    )
+    movers = [make_bubble(id="abc-id", symbol="abc", market_cap=1.0, listed_exc=["binance"], performance={})]
+    with patch.object(engine, "evaluate", return_value=movers):
+        engine.start()
+        try:
+            while len(calls) < 2:
+                await asyncio.sleep(0.01)
+            await asyncio.sleep(0.05)
+        finally:
+            await engine.stop()
+    assert calls == [["abc"], ["abc"]]
+    assert engine.movers == movers
+
+def test_binance_market_frame():
+    received = []
+    streamer = BinanceMarketStreamer(url="wss://binance", on_tickers=received.extend)
+    frame = json.dumps([
+        {"e": "24hrMiniTicker", "E": 7, "s": "BTCUSDT", "c": "110", "o": "100"},
+        {"e": "24hrMiniTicker", "E": 7, "s": "ETHBTC", "c": "0.05", "o": "0.05"},
+    ])
+    streamer._handle_frame(frame)
+    assert len(received) == 1
+    (coin, price, change, timestamp) = received[0]
+    assert (coin, price, timestamp) == ("btc", 110.0, 7)
+    assert math.isclose(change, 10.0)
+
+def test_mexc_market_frame():
+    received = []
+    streamer = MexcMarketStreamer(url="wss://mexc", on_tickers=received.extend)
+    assert streamer._get_subscribe_payload([])["params"] == ["spot@public.miniTickers.v3.api.pb@24H"]
+    wrapper = PushDataV3ApiWrapper(channel="spot@public.miniTickers.v3.api.pb@24H", sendTime=9)
+    wrapper.publicMiniTickers.items.add(symbol="ABCUSDT", price="2.5", rate="-0.031")
+    wrapper.publicMiniTickers.items.add(symbol="ABCUSDC", price="2.5", rate="0")
+    streamer._handle_frame(wrapper.SerializeToString())
+    assert len(received) == 1
+    (coin, price, change, timestamp) = received[0]
+    assert (coin, price, timestamp) == ("abc", 2.5, 9)
+    assert math.isclose(change, -3.1)
@@ -0,0 +1,34 @@
+import pytest
+import asyncio
+
+from src.exchanges.planner import ShardPlanner
+
+def test_plan_and_place():
+    planner = ShardPlanner(streams_per_connection=3)
+    assert planner.plan(["a", "b", "c", "d"]) == [["a", "b", "c"], ["d"]]
+
+    (assigned, fresh) = planner.place(shards=[["a", "b", "c"], ["d"]], symbols=["e", "f", "g", "h", "i"])
+    assert assigned == [[], ["e", "f"]]
+    assert fresh == [["g", "h", "i"]]
+
+def test_unlimited_planner():
+    planner = ShardPlanner()
+    assert planner.plan(["a", "b"]) == [["a", "b"]]
+    assert planner.place(shards=[["a"]], symbols=["b", "c"]) == ([["b", "c"]], [])
+    assert planner.batches(["a", "b"]) == [["a", "b"]]
+
+def test_batches_and_spill():
+    planner = ShardPlanner(args_per_message=2, max_frames_per_second=100)
+    assert planner.batches(["a", "b", "c"]) == [["a", "b"], ["c"]]
+    assert planner.spill(shard=["a", "b", "c", "d"], frames_per_second=50) == []
+    assert planner.spill(shard=["a", "b", "c", "d"], frames_per_second=150) == ["c", "d"]
+    assert planner.spill(shard=["a"], frames_per_second=150) == []
+
+@pytest.mark.asyncio
+async def test_throttle_paces_messages():
+    planner = ShardPlanner(messages_per_second=50)
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    for _ in range(5):
+        await planner.throttle()
+    assert loop.time() - start >= 4 / 50 * 0.9
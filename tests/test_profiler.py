@@ -0,0 +1,39 @@
+import time
+import threading
+
+from src.profiler import SamplingProfiler, AllocationTracer
+
+def _spin(until: float) -> None:
+    while time.monotonic() < until:
+        sum(range(1000))
+
+def test_profile_writes_collapsed_stacks(tmp_path):
+    worker = threading.Thread(target=_spin, args=(time.monotonic() + 1.0,), name="parser-worker")
+    worker.start()
+    profiler = SamplingProfiler(directory=tmp_path, duration_seconds=0.2, interval_ms=2)
+    assert profiler.start()
+    assert not profiler.start()
+    profiler.join(timeout=5)
+    worker.join()
+
+    lines = profiler.last_path.read_text().splitlines()
+    assert profiler.last_path.name.startswith("profile-") and profiler.last_path.suffix == ".collapsed"
+    spinning = [l for l in lines if l.startswith("parser-worker;") and "_spin (test_profiler.py)" in l]
+    assert spinning
+    assert all(int(l.rsplit(" ", 1)[1]) > 0 for l in lines)
+
+def test_allocation_snapshots_report_growth(tmp_path):
+    tracer = AllocationTracer(directory=tmp_path, top=10)
+    try:
+        assert tracer.dump() is None
+        first = tracer.dump()
+        retained = [bytearray(4096) for _ in range(500)]
+        second = tracer.dump()
+    finally:
+        tracer.stop()
+
+    assert first.exists()
+    text = second.read_text()
+    assert "# growth since previous snapshot" in text
+    assert "test_profiler.py" in text.split("# growth since previous snapshot")[1]
+    assert len(retained) == 500
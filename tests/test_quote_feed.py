@@ -0,0 +1,103 @@
+import os
+import struct
+import subprocess
+import sys
+import numpy as np
+import pytest
+
+from src.quote_feed import QuoteFeed, QuoteFeedReader
+
+@pytest.fixture
+def feed():
+    feed = QuoteFeed.create(name=f"referee-test-{os.getpid()}", capacity=4, exchanges=["binance", "bybit"])
+    yield feed
+    feed.close()
+
+def test_reader_sees_published_quotes_without_writing(feed):
+    feed.set_watchlist(["btc", "eth"])
+    reader = QuoteFeedReader(feed.name)
+    try:
+        assert reader.coins[:2] == ["btc", "eth"] and reader.exchanges == ["binance", "bybit"]
+        assert reader.quote("btc", "bybit") is None
+
+        feed.publish("btc", "bybit", 101.5, 7)
+        feed.publish("doge", "bybit", 1.0, 7)
+        assert reader.quote("btc", "bybit") == (101.5, 7)
+        assert reader.quote("doge", "bybit") is None
+
+        snapshot = reader.snapshot()
+        assert snapshot.prices[0, 1] == 101.5 and snapshot.timestamps[0, 1] == 7
+        assert np.isnan(snapshot.prices[1]).all()
+        assert (snapshot.quotes["coin"][1, 0], snapshot.quotes["exchange"][1, 1]) == (1, 1)
+        assert not reader.quotes.flags.writeable
+        with pytest.raises(ValueError):
+            reader.prices[0, 0] = 1.0
+    finally:
+        reader.close()
+
+def test_watchlist_swap_bumps_the_generation(feed):
+    feed.set_watchlist(["btc", "eth"])
+    reader = QuoteFeedReader(feed.name)
+    try:
+        feed.publish("btc", "binance", 1.0, 1)
+        generation = reader.generation
+        assert generation % 2 == 0 and not reader.changed
+
+        feed.set_watchlist(["eth", "sol"])
+        assert reader.changed
+        # The row btc left behind is handed to sol, empty.
+        assert reader.quote("sol", "binance") is None
+        assert reader.quote("btc", "binance") is None
+        assert reader.generation > generation
+        assert reader.coin_index == {"sol": 0, "eth": 1}
+
+        feed.publish("sol", "binance", 2.0, 2)
+        snapshot = reader.snapshot()
+        assert snapshot.generation == reader.generation
+        assert snapshot.coins[0] == "sol" and snapshot.prices[0, 0] == 2.0
+    finally:
+        reader.close()
+
+def test_full_feed_skips_coins(feed):
+    assert feed.set_watchlist(["a", "b", "c", "d", "e"]) == ["a", "b", "c", "d"]
+
+def test_torn_slots_are_not_returned(feed):
+    feed.set_watchlist(["btc"])
+    reader = QuoteFeedReader(feed.name)
+    try:
+        feed.publish("btc", "binance", 1.0, 1)
+        # A writer caught halfway has an odd sequence number.
+        feed.quotes["seq"][0, 0] += 1
+        feed.quotes["price"][0, 0] = 2.0
+        assert reader.quote("btc", "binance", attempts=3) is None
+        with pytest.raises(TimeoutError):
+            reader.snapshot(attempts=3)
+
+        feed.quotes["seq"][0, 0] += 1
+        assert reader.snapshot().prices[0, 0] == 2.0
+    finally:
+        reader.close()
+
+def test_live_segment_is_not_replaced(feed):
+    with pytest.raises(FileExistsError):
+        QuoteFeed.create(name=feed.name, capacity=8, exchanges=["binance"])
+    reader = QuoteFeedReader(feed.name)
+    assert not reader.closed and reader.rows == 4
+    reader.close()
+
+def test_stale_segment_is_replaced_and_readers_told(feed):
+    feed.set_watchlist(["btc"])
+    # As if the service that created it had crashed.
+    dead = subprocess.run([sys.executable, "-c", "import os; print(os.getpid())"], capture_output=True, text=True)
+    struct.pack_into("<q", feed.memory.buf, 48, int(dead.stdout))
+    stale = QuoteFeedReader(feed.name)
+    replacement = QuoteFeed.create(name=feed.name, capacity=8, exchanges=["binance"])
+    try:
+        assert stale.closed
+        fresh = QuoteFeedReader(feed.name)
+        assert not fresh.closed and (fresh.rows, fresh.columns) == (8, 1)
+        fresh.close()
+    finally:
+        stale.close()
+        replacement.close()
+    assert not os.path.exists(f"/dev/shm/{feed.name}")
@@ -0,0 +1,87 @@
+import time
+import pytest
+import pytest_asyncio
+
+from aiohttp import web
+
+from src.interests.bubble import Bubble
+from src.interests.cache import ListingCache
+from src.interests.coingecko import usdt_exchanges
+from src.interests.scheduler import TokenBucket
+
+@pytest.mark.asyncio
+async def test_bucket_limits_burst():
+    bucket = TokenBucket(capacity=2, refill_per_second=50)
+    start = time.monotonic()
+    for _ in range(4):
+        await bucket.acquire()
+    assert time.monotonic() - start >= 2 / 50 * 0.9
+
+@pytest.mark.asyncio
+async def test_penalize_backs_off_and_slows_refill():
+    bucket = TokenBucket(capacity=1, refill_per_second=100)
+    bucket.penalize(retry_after=0.05)
+    assert bucket.refill_per_second == 50
+
+    start = time.monotonic()
+    await bucket.acquire()
+    assert time.monotonic() - start >= 0.05
+
+    bucket.reward()
+    assert bucket.refill_per_second == 55
+
+@pytest_asyncio.fixture
+async def coingecko():
+    calls = {"bitcoin": 0, "ghost": 0}
+
+    async def tickers(request):
+        coin_id = request.match_info["coin_id"]
+        calls[coin_id] += 1
+        if coin_id == "ghost":
+            return web.Response(status=500)
+        if calls[coin_id] == 1:
+            return web.Response(status=429, headers={"Retry-After": "0"})
+        return web.json_response({"tickers": [
+            {"target_coin_id": "tether", "market": {"identifier": "binance"}},
+            {"target_coin_id": "tether", "market": {"identifier": "gdax"}},
+            {"target_coin_id": "usd", "market": {"identifier": "bybit_spot"}},
+        ]})
+
+    app = web.Application()
+    app.router.add_get("/coins/{coin_id}/tickers", tickers)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    yield f"http://127.0.0.1:{port}/coins/{{coin_id}}/tickers", calls
+    await runner.cleanup()
+
+@pytest.mark.asyncio
+async def test_usdt_exchanges_retries_rate_limited_coins(coingecko):
+    (api_url, calls) = coingecko
+    bubbles = [
+        Bubble(id="bitcoin", symbol="btc", market_cap=1.0, listed_exc=["mexc"], performance={}),
+        Bubble(id="ghost", symbol="gst", market_cap=1.0, listed_exc=["mexc"], performance={}),
+    ]
+    bucket = TokenBucket(capacity=10, refill_per_second=100)
+
+    await usdt_exchanges(bubbles, bucket=bucket, max_attempts=2, api_url=api_url)
+
+    assert bubbles[0].listed_exc == ["binance", "coinbase"]
+    assert bubbles[1].listed_exc == []
+    assert calls == {"bitcoin": 2, "ghost": 2}
+    assert bucket.failures == 1
+
+@pytest.mark.asyncio
+async def test_failed_lookups_fall_back_to_the_last_known_listing(coingecko):
+    (api_url, calls) = coingecko
+    cache = ListingCache(ttl_ms=1_000)
+    cache.put("ghost", ["bybit"], now_ms=0)
+    bubbles = [Bubble(id="ghost", symbol="gst", market_cap=1.0, listed_exc=["mexc"], performance={})]
+    bucket = TokenBucket(capacity=10, refill_per_second=100)
+
+    await usdt_exchanges(bubbles, cache=cache, bucket=bucket, max_attempts=1, api_url=api_url)
+    assert bubbles[0].listed_exc == ["bybit"] and bucket.failures == 1
+    # Retried only after the negative TTL, still with the listing it had.
+    assert cache.get("ghost") == (True, ["bybit"])
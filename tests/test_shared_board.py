@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from src.shared_board import SharedQuoteBoard
+
+@pytest.fixture
+def board():
+    board = SharedQuoteBoard.create(rows=4, columns=2, workers=2)
+    yield board
+    board.close()
+
+def test_writes_are_visible_through_an_attached_view(board):
+    reader = SharedQuoteBoard.attach(board.name)
+    try:
+        assert (reader.rows, reader.columns, reader.workers) == (4, 2, 2)
+        assert reader.read(row=1, column=0) is None
+
+        board.write(row=1, column=0, price=101.5, timestamp=7)
+        board.publish(worker=1, frames=42, heartbeat_ns=9)
+        assert reader.read(row=1, column=0) == (101.5, 7)
+        assert reader.frames() == 42 and reader.heartbeat_ns(1) == 9
+
+        board.clear(row=1)
+        assert reader.read(row=1, column=0) is None
+    finally:
+        reader.close()
+
+def test_changes_skip_torn_and_seen_slots(board):
+    seen = np.zeros((4, 2), dtype=np.uint64)
+    board.write(row=0, column=1, price=1.0, timestamp=1)
+    board.write(row=2, column=0, price=2.0, timestamp=2)
+    # A writer caught halfway has an odd sequence number.
+    board.seq[3, 1] += 1
+    board.prices[3, 1] = 3.0
+
+    (changed, prices, timestamps) = board.changes(seen)
+    assert sorted(zip(*changed.nonzero())) == [(0, 1), (2, 0)]
+    assert prices[2, 0] == 2.0 and timestamps[0, 1] == 1
+    assert board.read(row=3, column=1, attempts=3) is None
+
+    board.seq[3, 1] += 1
+    (changed, _, _) = board.changes(seen)
+    assert list(zip(*changed.nonzero())) == [(3, 1)]
+    (changed, _, _) = board.changes(seen)
+    assert not changed.any()
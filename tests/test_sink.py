@@ -0,0 +1,74 @@
+import pytest
+import asyncio
+
+from unittest.mock import MagicMock
+
+from src.writer import DatabaseWriter
+from src.sink import PriceSink
+
+@pytest.fixture
+def writer():
+    writer = MagicMock(spec=DatabaseWriter)
+    writer.put_prices.return_value = []
+    return writer
+
+def test_push_keeps_latest_price(writer):
+    sink = PriceSink(writer=writer, max_buffer_size=10)
+    sink.push(coin_name="btc", exch_name="binance", exch_price=1.0, timestamp=1)
+    sink.push(coin_name="btc", exch_name="binance", exch_price=2.0, timestamp=2)
+    sink.push(coin_name="btc", exch_name="bybit", exch_price=3.0, timestamp=3)
+
+    assert len(sink) == 2
+    assert sink.flush() == 2
+    writer.put_prices.assert_called_once_with([("btc", "binance", 2.0, 2), ("btc", "bybit", 3.0, 3)])
+    assert len(sink) == 0
+
+def test_push_flushes_on_size(writer):
+    sink = PriceSink(writer=writer, max_buffer_size=2)
+    sink.push(coin_name="btc", exch_name="binance", exch_price=1.0, timestamp=1)
+    writer.put_prices.assert_not_called()
+    sink.push(coin_name="eth", exch_name="binance", exch_price=2.0, timestamp=1)
+    writer.put_prices.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_flush_on_interval_and_stop(writer):
+    sink = PriceSink(writer=writer, flush_interval_ms=10)
+    sink.start()
+    sink.push(coin_name="btc", exch_name="binance", exch_price=1.0, timestamp=1)
+    await asyncio.sleep(0.05)
+    writer.put_prices.assert_called_once()
+
+    sink.push(coin_name="btc", exch_name="binance", exch_price=2.0, timestamp=2)
+    await sink.stop(flush=False)
+    assert writer.put_prices.call_count == 1
+    assert len(sink) == 0
+
+def test_failed_flush_keeps_the_batch(writer):
+    sink = PriceSink(writer=writer, max_buffer_size=10)
+    sink.push(coin_name="btc", exch_name="binance", exch_price=1.0, timestamp=1)
+    sink.push(coin_name="eth", exch_name="binance", exch_price=2.0, timestamp=1)
+
+    def _fail(rows):
+        sink.push(coin_name="btc", exch_name="binance", exch_price=3.0, timestamp=2)
+        raise RuntimeError("Database writer is closed")
+    writer.put_prices.side_effect = _fail
+    with pytest.raises(RuntimeError):
+        sink.flush()
+    assert len(sink) == 2
+
+    writer.put_prices.side_effect = None
+    sink.flush()
+    writer.put_prices.assert_called_with([("btc", "binance", 3.0, 2), ("eth", "binance", 2.0, 1)])
+
+def test_rows_handed_back_wait_in_the_buffer(writer):
+    sink = PriceSink(writer=writer, max_buffer_size=2)
+    writer.put_prices.return_value = [("eth", "binance", 2.0, 1)]
+    sink.push(coin_name="btc", exch_name="binance", exch_price=1.0, timestamp=1)
+    sink.push(coin_name="eth", exch_name="binance", exch_price=2.0, timestamp=1)
+    assert writer.put_prices.call_count == 1 and len(sink) == 1
+
+    # No size-triggered flush while the writer is full, the interval flush offers the rows again.
+    sink.push(coin_name="sol", exch_name="binance", exch_price=3.0, timestamp=1)
+    assert writer.put_prices.call_count == 1
+    writer.put_prices.return_value = []
+    assert sink.flush() == 2 and len(sink) == 0
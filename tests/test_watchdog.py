@@ -0,0 +1,47 @@
+import time
+import asyncio
+import pytest
+
+from src.metrics import Registry
+from src.watchdog import LoopWatchdog
+
+def _busy_parser(seconds: float) -> None:
+    time.sleep(seconds)
+
+@pytest.mark.asyncio
+async def test_records_lag_and_samples_stalls():
+    registry = Registry()
+    watchdog = LoopWatchdog(interval_ms=10, threshold_ms=50, metrics=registry)
+    watchdog.start()
+    try:
+        await asyncio.sleep(0.1)
+
+        async def _ingest():
+            _busy_parser(0.25)
+
+        await asyncio.create_task(_ingest(), name="ingest")
+        await asyncio.sleep(0.1)
+    finally:
+        await watchdog.stop()
+
+    assert watchdog.stall_count == 1
+    stall = watchdog.stalls[-1]
+    assert stall.task.startswith("ingest")
+    assert "_busy_parser" in "".join(stall.stack)
+    assert stall.duration_ms >= 200
+
+    stats = watchdog.stats()
+    assert stats["max"] >= 200
+    assert stats["p50"] < 50
+    text = registry.render()
+    assert "referee_loop_stalls_total 1" in text
+    assert 'referee_loop_lag_ms{quantile="0.5"}' in text
+
+@pytest.mark.asyncio
+async def test_quiet_loop_has_no_stalls():
+    watchdog = LoopWatchdog(interval_ms=10, threshold_ms=100)
+    watchdog.start()
+    await asyncio.sleep(0.2)
+    await watchdog.stop()
+    assert watchdog.stall_count == 0
+    assert watchdog.lag_us.count >= 10
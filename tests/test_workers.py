@@ -0,0 +1,104 @@
+import os
+import signal
+import asyncio
+import pytest
+
+from benchmarks.fake_exchange import FakeExchange
+from src.config import Conflation, Exchange
+from src.workers import ProcessSupervisor, worker_group, restart_delay
+
+async def _wait_for(condition, timeout: float = 20.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline
+        await asyncio.sleep(0.05)
+
+def test_worker_groups_are_stable():
+    coins = [f"coin{i}" for i in range(100)]
+    groups = [worker_group(c, 3) for c in coins]
+    assert groups == [worker_group(c, 3) for c in coins]
+    assert set(groups) == {0, 1, 2}
+    assert all(worker_group(c, 1) == 0 for c in coins)
+
+def test_restarts_in_a_row_back_off():
+    assert [restart_delay(n, base_seconds=0.5, max_seconds=5.0) for n in range(1, 7)] == [0.5, 1.0, 2.0, 4.0, 5.0, 5.0]
+
+def test_rows_are_reused_one_round_after_release():
+    supervisor = ProcessSupervisor(exchanges=[Exchange(name="binance", websocket="")], conflation=Conflation(), capacity=3)
+    try:
+        assert supervisor.set_watchlist(["a", "b", "c", "d"]) == ["a", "b", "c"]
+        released = supervisor.rows["a"]
+        supervisor.set_watchlist(["b", "c", "d"])
+        assert "d" not in supervisor.rows
+        supervisor.set_watchlist(["b", "c", "d"])
+        assert supervisor.rows["d"] == released
+    finally:
+        supervisor.close()
+
+@pytest.mark.asyncio
+async def test_workers_stream_into_the_board_and_restart_alone():
+    venues = {v: FakeExchange(venue=v, messages_per_symbol=20, tick_ms=20, seed=1) for v in ("binance", "bybit")}
+    urls = {v: await e.start() for (v, e) in venues.items()}
+    supervisor = ProcessSupervisor(
+        exchanges=[Exchange(name=v, websocket=u) for (v, u) in urls.items()],
+        conflation=Conflation(enabled=False),
+        capacity=8,
+    )
+    quotes = []
+    try:
+        supervisor.set_watchlist(["btc", "eth"])
+        supervisor.start()
+        supervisor.assign(exchange="binance", coins=["btc", "eth"])
+        supervisor.assign(exchange="bybit", coins=["btc"])
+
+        def _seen(exchange, coin):
+            quotes.extend(supervisor.poll())
+            return any(q[0] == coin and q[1] == exchange for q in quotes)
+
+        await _wait_for(lambda: _seen("binance", "eth") and _seen("bybit", "btc"))
+        assert all(q[2] > 0 for q in quotes)
+        assert not any(q[1] == "bybit" and q[0] == "eth" for q in quotes)
+        # Frame counts are published every 100 ms, separately from the quotes.
+        await _wait_for(lambda: supervisor.frames("binance") > 0)
+
+        bybit = supervisor._processes[("bybit", 0)]
+        binance = supervisor._processes[("binance", 0)]
+        bybit.kill()
+        await _wait_for(lambda: supervisor.restarts[("bybit", 0)] == 1)
+        assert supervisor._processes[("binance", 0)] is binance and binance.is_alive()
+
+        quotes.clear()
+        await _wait_for(lambda: _seen("bybit", "btc"))
+    finally:
+        await supervisor.stop()
+        supervisor.close()
+        for exchange in venues.values():
+            await exchange.stop()
+
+@pytest.mark.asyncio
+async def test_hung_workers_are_replaced():
+    venue = FakeExchange(venue="binance", messages_per_symbol=20, tick_ms=20, seed=1)
+    url = await venue.start()
+    supervisor = ProcessSupervisor(
+        exchanges=[Exchange(name="binance", websocket=url)],
+        conflation=Conflation(enabled=False),
+        capacity=8,
+        heartbeat_timeout_seconds=3.0,
+    )
+    try:
+        supervisor.set_watchlist(["btc"])
+        supervisor.start()
+        supervisor.assign(exchange="binance", coins=["btc"])
+        await _wait_for(lambda: any(q[0] == "btc" for q in supervisor.poll()))
+
+        hung = supervisor._processes[("binance", 0)]
+        # Stopped, not dead: only the missing heartbeats give it away.
+        os.kill(hung.pid, signal.SIGSTOP)
+        await _wait_for(lambda: supervisor.restarts[("binance", 0)] == 1)
+        await _wait_for(lambda: not hung.is_alive())
+        await _wait_for(lambda: supervisor._processes[("binance", 0)] is not hung)
+        await _wait_for(lambda: any(q[0] == "btc" for q in supervisor.poll()))
+    finally:
+        await supervisor.stop()
+        supervisor.close()
+        await venue.stop()
@@ -0,0 +1,85 @@
+import pytest
+import threading
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from src.database import Database, PriceRecord
+from src.writer import DatabaseWriter, POLICY_BLOCK, POLICY_DROP_OLDEST, POLICY_LATEST
+
+@pytest.fixture
+def db():
+    return Database(url="sqlite:///:memory:")
+
+def _prices(db):
+    with Session(db.engine) as sess:
+        return sorted((r.coin_id, r.exchange_id, r.price) for r in sess.execute(select(PriceRecord)).scalars())
+
+def test_writes_on_own_thread_and_drains_on_close(db):
+    writer = DatabaseWriter(database=db)
+    writer.start()
+    writer.call(db.register, coins=["btc", "eth"], exchanges=["binance"]).result(timeout=5)
+    thread = writer.call(threading.current_thread).result(timeout=5)
+    assert thread is not threading.current_thread()
+
+    writer.put_prices([("btc", "binance", 1.0, 1), ("eth", "binance", 2.0, 1)])
+    writer.put_prices([("btc", "binance", 3.0, 2)])
+    writer.close()
+
+    assert writer.depth == 0
+    assert _prices(db) == sorted([(db.coin_ids["btc"], 1, 3.0), (db.coin_ids["eth"], 1, 2.0)])
+
+def test_jobs_keep_order_with_rows(db):
+    writer = DatabaseWriter(database=db)
+    writer.put_prices([("btc", "binance", 1.0, 1)])
+    writer.call(db.clear)
+    writer.put_prices([("btc", "binance", 2.0, 2)])
+    writer.start()
+    writer.close()
+
+    assert _prices(db) == [(1, 1, 2.0)]
+
+def test_latest_policy_conflates_per_key(db):
+    writer = DatabaseWriter(database=db, capacity=2, policy=POLICY_LATEST)
+    writer.put_prices([("btc", "binance", 1.0, 1), ("btc", "binance", 2.0, 2), ("eth", "binance", 3.0, 3)])
+    assert writer.depth == 2 and writer.dropped == 0
+
+    writer.put_prices([("sol", "binance", 4.0, 4)])
+    assert writer.depth == 2 and writer.dropped == 1
+
+def test_drop_oldest_policy(db):
+    writer = DatabaseWriter(database=db, capacity=2, policy=POLICY_DROP_OLDEST)
+    writer.put_prices([("btc", "binance", 1.0, 1), ("btc", "binance", 2.0, 2), ("btc", "binance", 3.0, 3)])
+    assert writer.depth == 2 and writer.dropped == 1
+
+    writer.start()
+    writer.close()
+    assert _prices(db) == [(1, 1, 3.0)]
+
+def test_block_policy_hands_rows_back(db):
+    writer = DatabaseWriter(database=db, capacity=1, policy=POLICY_BLOCK)
+    assert writer.put_prices([("btc", "binance", 1.0, 1)]) == []
+    assert writer.put_prices([("btc", "binance", 2.0, 2), ("eth", "binance", 3.0, 2)]) == [
+        ("btc", "binance", 2.0, 2), ("eth", "binance", 3.0, 2),
+    ]
+    assert writer.depth == 1 and writer.rejected == 2 and writer.dropped == 0
+
+    writer.start()
+    writer.close()
+    assert _prices(db) == [(1, 1, 1.0)]
+
+def test_rows_give_way_to_queued_jobs(db):
+    writer = DatabaseWriter(database=db, capacity=1, policy=POLICY_DROP_OLDEST)
+    writer.call(db.clear)
+    assert writer.put_prices([("btc", "binance", 1.0, 1)]) == []
+    assert writer.depth == 1 and writer.dropped == 1
+
+def test_closed_writer_refuses_rows(db):
+    writer = DatabaseWriter(database=db)
+    writer.close()
+    with pytest.raises(RuntimeError):
+        writer.put_prices([("btc", "binance", 1.0, 1)])
+
+def test_unknown_policy(db):
+    with pytest.raises(ValueError):
+        DatabaseWriter(database=db, policy="spill")